@@ -0,0 +1,104 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from .conexion_bd import configurar_ruta_base_de_datos, crear_tablas, obtener_pool
+from .daos import ReseñaDAO
+
+# Latencia de la búsqueda de texto completo (FTS5) según el tamaño de la tabla Reseñas,
+# comparada con un LIKE '%...%' sobre el contenido. Usa una base de datos temporal.
+# Uso: python -m CapaDeDatos.benchmark_busqueda [tamaño1 tamaño2 ...]
+
+TAMAÑOS_POR_DEFECTO = (1_000, 10_000, 100_000)
+REPETICIONES = 30
+NUM_JUEGOS = 200
+
+# Palabras ordenadas de más a menos frecuente (distribución de Zipf): las de relleno aparecen en casi
+# todas las reseñas y los términos de las consultas son cada vez más selectivos.
+VOCABULARIO = (
+    "el la de que y en un es muy pero con por para lo más juego me no se una los del como bien todo "
+    "bueno malo mejor peor tiene hay esta está mucho poco también sin sobre hasta cuando porque "
+    "gráficos historia combate jefes mundo abierto música banda sonora personajes misiones dificultad "
+    "exploración mapa rendimiento fps errores actualización multijugador cooperativo campaña final "
+    "diálogos armas magia habilidades progresión inventario precio duración rejugable ambientación "
+    "sigilo puzles plataformas carreras estrategia turnos táctico narrativa doblaje controles cámara"
+).split()
+
+PESOS_VOCABULARIO = [1 / (posicion + 1) for posicion in range(len(VOCABULARIO))]
+
+CONSULTAS = ("juego", "gráficos", "banda sonora", "combate jefes", "multi*", "doblaje cámara")
+
+
+def _generar_contenido(aleatorio):
+    return " ".join(aleatorio.choices(VOCABULARIO, weights=PESOS_VOCABULARIO, k=aleatorio.randint(8, 40)))
+
+def _preparar_catalogo(num_usuarios):
+    with obtener_pool().transaccion() as conexion:
+        conexion.executemany("INSERT OR IGNORE INTO Juegos (nombre, descripcion) VALUES (?, '');",
+                             ((f"Juego {i}",) for i in range(NUM_JUEGOS)))
+        conexion.executemany("INSERT OR IGNORE INTO Usuarios (nombre_usuario, tipo_usuario) VALUES (?, 'usuario_normal');",
+                             ((f"usuario{i}",) for i in range(num_usuarios)))
+
+def _cargar_reseñas(reseña_dao, desde, hasta, aleatorio):
+    # La reseña n es del usuario n // NUM_JUEGOS al juego n % NUM_JUEGOS: nunca se repite el par
+    for inicio in range(desde, hasta, 1000):
+        reseña_dao.insertar_reseñas_lote([
+            (n % NUM_JUEGOS + 1, n // NUM_JUEGOS + 1, aleatorio.randint(1, 10), _generar_contenido(aleatorio), "")
+            for n in range(inicio, min(inicio + 1000, hasta))
+        ])
+
+def _medir(funcion):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+def _buscar_con_like(texto):
+    conexion = obtener_pool().obtener()
+    try:
+        # Sin índice aplicable, LIKE recorre toda la tabla (igual que FTS, que ordena todas las coincidencias)
+        return conexion.execute("SELECT COUNT(*) FROM Reseñas WHERE contenido LIKE ?;", (f"%{texto}%",)).fetchone()
+    finally:
+        obtener_pool().devolver(conexion)
+
+def ejecutar_benchmark(tamaños=TAMAÑOS_POR_DEFECTO):
+    aleatorio = random.Random(42)
+    directorio = tempfile.mkdtemp(prefix="benchmark_busqueda_")
+    configurar_ruta_base_de_datos(os.path.join(directorio, "benchmark.sqlite"))
+    try:
+        crear_tablas()
+        _preparar_catalogo(max(tamaños) // NUM_JUEGOS + 1)
+        reseña_dao = ReseñaDAO()
+        cargadas = 0
+        resultados = []
+        for tamaño in sorted(tamaños):
+            inicio = time.perf_counter()
+            _cargar_reseñas(reseña_dao, cargadas, tamaño, aleatorio)
+            segundos_carga = time.perf_counter() - inicio
+            cargadas = tamaño
+            reseña_dao.optimizar_indice_busqueda()
+
+            print(f"\n--- {tamaño} reseñas (carga con índice FTS: {segundos_carga:.2f} s) ---")
+            print(f"{'consulta':<28}{'FTS p50':>10}{'FTS p95':>10}{'juego p50':>11}{'LIKE p50':>10}")
+            for texto in CONSULTAS:
+                fts_p50, fts_p95 = _medir(lambda: reseña_dao.buscar_reseñas(texto))
+                juego_p50, _ = _medir(lambda: reseña_dao.buscar_reseñas(texto, id_juego=1))
+                like_p50, _ = _medir(lambda: _buscar_con_like(texto.rstrip("*")))
+                print(f"{texto:<28}{fts_p50:>8.2f}ms{fts_p95:>8.2f}ms{juego_p50:>9.2f}ms{like_p50:>8.2f}ms")
+                resultados.append((tamaño, texto, fts_p50, fts_p95, juego_p50, like_p50))
+        return resultados
+    finally:
+        configurar_ruta_base_de_datos(None)
+        for nombre in os.listdir(directorio):
+            os.remove(os.path.join(directorio, nombre))
+        os.rmdir(directorio)
+
+
+if __name__ == '__main__':
+    ejecutar_benchmark(tuple(int(t) for t in sys.argv[1:]) or TAMAÑOS_POR_DEFECTO)
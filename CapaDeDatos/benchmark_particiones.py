@@ -0,0 +1,78 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from .conexion_bd import configurar_ruta_base_de_datos, crear_tablas
+from .daos import JuegoDAO, ReseñaDAO, UsuarioDAO
+from .particiones import (JuegoDAOParticionado, ReseñaDAOParticionado, UsuarioDAOParticionado, configurar_particiones,
+                          obtener_particiones)
+
+# Rendimiento de escritura según el número de particiones: NUM_HILOS hilos registran reseñas de una en una
+# (registrar_reseña, una transacción cada una, como enviar_reseña) contra juegos repartidos entre las particiones.
+# Con 1 es la base de datos sin particionar. Usa un directorio temporal.
+# Uso: python -m CapaDeDatos.benchmark_particiones [reseñas_por_hilo]
+
+NUM_PARTICIONES_BENCHMARK = (1, 2, 4, 8)
+NUM_HILOS = 8
+NUM_JUEGOS = 64
+RESEÑAS_POR_HILO_POR_DEFECTO = 2000
+
+
+def _preparar_datos(num_usuarios):
+    if obtener_particiones():
+        juego_dao, usuario_dao = JuegoDAOParticionado(), UsuarioDAOParticionado()
+    else:
+        juego_dao, usuario_dao = JuegoDAO(), UsuarioDAO()
+    juego_dao.insertar_juegos_lote([(i, f"Juego {i}", "") for i in range(1, NUM_JUEGOS + 1)])
+    usuario_dao.insertar_usuarios_lote([(i, f"usuario{i}", 'usuario_normal') for i in range(1, num_usuarios + 1)])
+
+def _escribir(reseña_dao, hilo, reseñas_por_hilo, errores):
+    # La reseña n del hilo es del usuario (hilo, n // NUM_JUEGOS) al juego n % NUM_JUEGOS: nunca se repite el par
+    usuarios_por_hilo = reseñas_por_hilo // NUM_JUEGOS + 1
+    for n in range(reseñas_por_hilo):
+        id_usuario = hilo * usuarios_por_hilo + n // NUM_JUEGOS + 1
+        if reseña_dao.registrar_reseña((n + hilo) % NUM_JUEGOS + 1, id_usuario, n % 10 + 1, "Reseña del benchmark") is None:
+            errores.append(n)
+
+def _medir(num_particiones, reseñas_por_hilo):
+    directorio = tempfile.mkdtemp(prefix="benchmark_particiones_")
+    configurar_ruta_base_de_datos(os.path.join(directorio, "benchmark.sqlite"))
+    configurar_particiones(num_particiones, os.path.join(directorio, "particiones"))
+    try:
+        crear_tablas()
+        _preparar_datos(NUM_HILOS * (reseñas_por_hilo // NUM_JUEGOS + 1))
+        reseña_dao = ReseñaDAOParticionado() if obtener_particiones() else ReseñaDAO()
+        errores = []
+        hilos = [threading.Thread(target=_escribir, args=(reseña_dao, hilo, reseñas_por_hilo, errores))
+                 for hilo in range(NUM_HILOS)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+        if errores:
+            print(f"{len(errores)} reseñas no se registraron con {num_particiones} particiones.")
+        return segundos
+    finally:
+        configurar_particiones(1)
+        configurar_ruta_base_de_datos(None)
+        shutil.rmtree(directorio)
+
+def ejecutar_benchmark(reseñas_por_hilo=RESEÑAS_POR_HILO_POR_DEFECTO):
+    total = NUM_HILOS * reseñas_por_hilo
+    print(f"\n{NUM_HILOS} hilos, {total} reseñas en transacciones individuales.")
+    print(f"{'particiones':<13}{'duración':>10}{'reseñas/s':>12}{'aceleración':>13}")
+    resultados = []
+    for num_particiones in NUM_PARTICIONES_BENCHMARK:
+        segundos = _medir(num_particiones, reseñas_por_hilo)
+        resultados.append((num_particiones, segundos, total / segundos))
+        print(f"{num_particiones:<13}{segundos:>9.2f}s{total / segundos:>12.0f}{resultados[0][1] / segundos:>12.2f}x")
+    return resultados
+
+
+if __name__ == '__main__':
+    ejecutar_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else RESEÑAS_POR_HILO_POR_DEFECTO)
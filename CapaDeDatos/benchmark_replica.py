@@ -0,0 +1,139 @@
+import os
+import queue
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from .conexion_bd import configurar_ruta_base_de_datos, crear_tablas, obtener_pool
+from .daos import JuegoDAO, ReseñaDAO
+from .replica import INTERVALO_REFRESCO, ReplicaLectura
+
+# Latencia de lectura en disco frente a la réplica en memoria, y retraso de la réplica: un hilo inserta reseñas de
+# una en una mientras se leen listados y detalles de juegos; otro hilo mide cuánto tarda en verse en la réplica
+# una de cada MUESTREO_RETRASO reseñas. Usa una base de datos temporal.
+# Uso: python -m CapaDeDatos.benchmark_replica [num_reseñas]
+
+NUM_RESEÑAS_POR_DEFECTO = 100_000
+NUM_JUEGOS = 200
+NUM_LECTURAS = 2000
+MAX_ESCRITURAS_BENCHMARK = 200_000
+MUESTREO_RETRASO = 50 # una de cada tantas escrituras mide su retraso de visibilidad
+
+
+class _EscritorContinuo(threading.Thread):
+    def __init__(self, primera_reseña, replica):
+        super().__init__(name="EscritorBenchmark", daemon=True)
+        self.reseña_dao = ReseñaDAO()
+        self.reseña_dao_replica = ReseñaDAO(replica)
+        self.siguiente = primera_reseña
+        self.retrasos = []
+        self.parar = threading.Event()
+        self._pendientes = queue.Queue()
+        self._verificador = threading.Thread(target=self._medir_retrasos, name="RetrasoBenchmark", daemon=True)
+
+    def run(self):
+        # La reseña n es del usuario n // NUM_JUEGOS al juego n % NUM_JUEGOS: nunca se repite el par
+        self._verificador.start()
+        while not self.parar.is_set():
+            n = self.siguiente
+            self.siguiente += 1
+            id_juego, id_usuario = n % NUM_JUEGOS + 1, n // NUM_JUEGOS + 1
+            self.reseña_dao.insertar_reseñas_lote([(id_juego, id_usuario, 7, "Reseña del benchmark", "")])
+            if n % MUESTREO_RETRASO == 0:
+                self._pendientes.put((id_juego, id_usuario, time.perf_counter()))
+        self._pendientes.put(None)
+        self._verificador.join()
+
+    def _medir_retrasos(self):
+        while (pendiente := self._pendientes.get()) is not None:
+            id_juego, id_usuario, confirmada = pendiente
+            while not self.reseña_dao_replica.verificar_existencia_reseña(id_juego, id_usuario):
+                if self.parar.is_set():
+                    return
+                time.sleep(0.001)
+            self.retrasos.append((time.perf_counter() - confirmada) * 1000)
+
+def _percentiles(latencias):
+    latencias = sorted(latencias)
+    if not latencias:
+        return 0.0, 0.0, 0.0, 0.0
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p))]
+    return statistics.median(latencias), percentil(0.95), percentil(0.99), latencias[-1]
+
+def _preparar_datos(num_reseñas, aleatorio):
+    with obtener_pool().transaccion() as conexion:
+        conexion.executemany("INSERT INTO Juegos (nombre, descripcion) VALUES (?, '');",
+                             ((f"Juego {i}",) for i in range(NUM_JUEGOS)))
+        conexion.executemany("INSERT INTO Usuarios (nombre_usuario, tipo_usuario) VALUES (?, 'usuario_normal');",
+                             ((f"usuario{i}",) for i in range((num_reseñas + MAX_ESCRITURAS_BENCHMARK) // NUM_JUEGOS + 1)))
+    reseña_dao = ReseñaDAO()
+    for inicio in range(0, num_reseñas, 5000):
+        reseña_dao.insertar_reseñas_lote([
+            (n % NUM_JUEGOS + 1, n // NUM_JUEGOS + 1, aleatorio.randint(1, 10), "texto " * aleatorio.randint(5, 60), "")
+            for n in range(inicio, min(inicio + 5000, num_reseñas))
+        ])
+
+def _medir_lecturas(pool, aleatorio):
+    # (listado de juegos, detalle de un juego con sus reseñas) como en obtener_juegos / obtener_detalles_juego_con_reseñas
+    juego_dao, reseña_dao = JuegoDAO(pool), ReseñaDAO(pool)
+    listados, detalles = [], []
+    for _ in range(NUM_LECTURAS):
+        inicio = time.perf_counter()
+        juego_dao.obtener_todos_los_juegos()
+        listados.append((time.perf_counter() - inicio) * 1000)
+        id_juego = aleatorio.randint(1, NUM_JUEGOS)
+        inicio = time.perf_counter()
+        with pool.conexion():
+            juego_dao.obtener_juego_por_id(id_juego)
+            reseña_dao.obtener_reseñas_por_juego(id_juego)
+        detalles.append((time.perf_counter() - inicio) * 1000)
+    return listados, detalles
+
+def ejecutar_benchmark(num_reseñas=NUM_RESEÑAS_POR_DEFECTO):
+    aleatorio = random.Random(42)
+    directorio = tempfile.mkdtemp(prefix="benchmark_replica_")
+    configurar_ruta_base_de_datos(os.path.join(directorio, "benchmark.sqlite"))
+    replica = escritor = None
+    try:
+        crear_tablas()
+        _preparar_datos(num_reseñas, aleatorio)
+        replica = ReplicaLectura(intervalo_refresco=INTERVALO_REFRESCO).iniciar()
+        escritor = _EscritorContinuo(num_reseñas, replica)
+        escritor.start()
+
+        resultados = []
+        for nombre, pool in (("disco", obtener_pool()), ("réplica", replica)):
+            listados, detalles = _medir_lecturas(pool, aleatorio)
+            resultados.append((f"{nombre}: listado", listados))
+            resultados.append((f"{nombre}: detalle", detalles))
+        escritor.parar.set()
+        escritor.join()
+        resultados.append(("retraso de la réplica", escritor.retrasos))
+
+        print(f"\n{num_reseñas} reseñas, {NUM_JUEGOS} juegos; escritor continuo; refresco cada {replica.intervalo_refresco:g}s.")
+        print(f"{'medida':<24}{'muestras':>9}{'p50':>11}{'p95':>11}{'p99':>11}{'máx':>11}")
+        for nombre, latencias in resultados:
+            p50, p95, p99, maximo = _percentiles(latencias)
+            print(f"{nombre:<24}{len(latencias):>9}{p50:>9.2f}ms{p95:>9.2f}ms{p99:>9.2f}ms{maximo:>9.2f}ms")
+        estadisticas = replica.estadisticas()
+        print(f"Refrescos: {estadisticas['refrescos']} (sin cambios: {estadisticas['refrescos_sin_cambios']}), "
+              f"última copia {estadisticas['segundos_ultima_copia'] * 1000:.1f} ms; "
+              f"lecturas desviadas a disco: {estadisticas['lecturas_disco']}.")
+        return resultados
+    finally:
+        if escritor is not None:
+            escritor.parar.set()
+            escritor.join()
+        if replica is not None:
+            replica.detener()
+        configurar_ruta_base_de_datos(None)
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    ejecutar_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RESEÑAS_POR_DEFECTO)
@@ -0,0 +1,109 @@
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from .conexion_bd import configurar_ruta_base_de_datos, crear_tablas, obtener_pool
+from .daos import ReseñaDAO
+from .respaldos import PAGINAS_POR_PASO, PAUSA_ENTRE_PASOS, crear_respaldo
+
+# Duración de un respaldo en caliente y su efecto en la latencia de las escrituras que ocurren a la vez:
+# un hilo inserta reseñas de una en una (como enviar_reseña) mientras se respalda. Usa una base de datos temporal.
+# Uso: python -m CapaDeDatos.benchmark_respaldos [num_reseñas]
+
+NUM_RESEÑAS_POR_DEFECTO = 200_000
+NUM_JUEGOS = 200
+SEGUNDOS_REFERENCIA = 3.0
+MAX_ESCRITURAS_BENCHMARK = 500_000 # usuarios de sobra para que el escritor no repita pares (juego, usuario)
+CONFIGURACIONES = (
+    ("pasos de 64 páginas", 64, PAUSA_ENTRE_PASOS),
+    (f"pasos de {PAGINAS_POR_PASO} páginas", PAGINAS_POR_PASO, PAUSA_ENTRE_PASOS),
+    ("un solo paso", -1, 0),
+)
+
+
+class _EscritorContinuo(threading.Thread):
+    def __init__(self, primera_reseña):
+        super().__init__(name="EscritorBenchmark", daemon=True)
+        self.reseña_dao = ReseñaDAO()
+        self.siguiente = primera_reseña
+        self.latencias = []
+        self.parar = threading.Event()
+
+    def run(self):
+        # La reseña n es del usuario n // NUM_JUEGOS al juego n % NUM_JUEGOS: nunca se repite el par
+        while not self.parar.is_set():
+            n = self.siguiente
+            self.siguiente += 1
+            inicio = time.perf_counter()
+            self.reseña_dao.insertar_reseñas_lote([(n % NUM_JUEGOS + 1, n // NUM_JUEGOS + 1, 7, "Reseña del benchmark", "")])
+            self.latencias.append((time.perf_counter() - inicio) * 1000)
+
+    def tomar_latencias(self):
+        latencias, self.latencias = self.latencias, []
+        return latencias
+
+def _percentiles(latencias):
+    latencias = sorted(latencias)
+    if not latencias:
+        return 0.0, 0.0, 0.0, 0.0
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p))]
+    return statistics.median(latencias), percentil(0.95), percentil(0.99), latencias[-1]
+
+def _preparar_datos(num_reseñas, aleatorio):
+    with obtener_pool().transaccion() as conexion:
+        conexion.executemany("INSERT INTO Juegos (nombre, descripcion) VALUES (?, '');",
+                             ((f"Juego {i}",) for i in range(NUM_JUEGOS)))
+        conexion.executemany("INSERT INTO Usuarios (nombre_usuario, tipo_usuario) VALUES (?, 'usuario_normal');",
+                             ((f"usuario{i}",) for i in range((num_reseñas + MAX_ESCRITURAS_BENCHMARK) // NUM_JUEGOS + 1)))
+    reseña_dao = ReseñaDAO()
+    for inicio in range(0, num_reseñas, 5000):
+        reseña_dao.insertar_reseñas_lote([
+            (n % NUM_JUEGOS + 1, n // NUM_JUEGOS + 1, aleatorio.randint(1, 10), "texto " * aleatorio.randint(5, 60), "")
+            for n in range(inicio, min(inicio + 5000, num_reseñas))
+        ])
+
+def ejecutar_benchmark(num_reseñas=NUM_RESEÑAS_POR_DEFECTO):
+    aleatorio = random.Random(42)
+    directorio = tempfile.mkdtemp(prefix="benchmark_respaldos_")
+    configurar_ruta_base_de_datos(os.path.join(directorio, "benchmark.sqlite"))
+    escritor = None
+    try:
+        crear_tablas()
+        inicio = time.perf_counter()
+        _preparar_datos(num_reseñas, aleatorio)
+        tamaño = os.path.getsize(os.path.join(directorio, "benchmark.sqlite")) / 1_048_576
+        print(f"\n{num_reseñas} reseñas cargadas en {time.perf_counter() - inicio:.2f} s ({tamaño:.1f} MB).")
+
+        escritor = _EscritorContinuo(num_reseñas)
+        escritor.start()
+        time.sleep(SEGUNDOS_REFERENCIA)
+        resultados = [("sin respaldo", SEGUNDOS_REFERENCIA, None, None, escritor.tomar_latencias())]
+        for nombre, paginas_por_paso, pausa in CONFIGURACIONES:
+            respaldo = crear_respaldo(os.path.join(directorio, "respaldos"), retencion=0,
+                                      paginas_por_paso=paginas_por_paso, pausa=pausa)
+            resultados.append((nombre, respaldo['segundos'], respaldo['pasos'], respaldo['reinicios'], escritor.tomar_latencias()))
+
+        print(f"\n{'escenario':<24}{'duración':>10}{'pasos':>7}{'reinicios':>10}{'escrituras':>11}"
+              f"{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}")
+        for nombre, segundos, pasos, reinicios, latencias in resultados:
+            p50, p95, p99, maximo = _percentiles(latencias)
+            print(f"{nombre:<24}{segundos:>9.2f}s{pasos if pasos is not None else '-':>7}"
+                  f"{reinicios if reinicios is not None else '-':>10}{len(latencias):>11}"
+                  f"{p50:>7.2f}ms{p95:>7.2f}ms{p99:>7.2f}ms{maximo:>7.2f}ms")
+        return resultados
+    finally:
+        if escritor is not None:
+            escritor.parar.set()
+            escritor.join()
+        configurar_ruta_base_de_datos(None)
+        shutil.rmtree(directorio)
+
+
+if __name__ == '__main__':
+    ejecutar_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RESEÑAS_POR_DEFECTO)
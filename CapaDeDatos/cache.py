@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import starmap
+
+from .daos import JuegoDAO, UsuarioDAO
+from .metricas import obtener_logger
+
+CAPACIDAD_CACHE = 1024
+TTL_CACHE = 60.0 # segundos; None desactiva la caducidad
+INTERVALO_VERIFICACION_VERSION = 1.0 # segundos entre consultas a VersionesDatos
+
+_CLAVE_TODOS = ('todos',)
+_NO_ENCONTRADO = object()
+_log = obtener_logger(__name__)
+
+
+class CacheLRU:
+    def __init__(self, capacidad=CAPACIDAD_CACHE, ttl=TTL_CACHE):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._datos = OrderedDict() # clave -> (valor, instante_caducidad)
+        self._lock = threading.Lock()
+        self._generacion = 0 # cambia con cada invalidación para no guardar cargas que se solaparon con una escritura
+        self._estadisticas = {'aciertos': 0, 'fallos': 0, 'desalojos': 0, 'invalidaciones': 0}
+
+    def obtener(self, clave, cargar):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave, _NO_ENCONTRADO)
+            if entrada is not _NO_ENCONTRADO:
+                valor, caducidad = entrada
+                if caducidad is None or caducidad > ahora:
+                    self._datos.move_to_end(clave)
+                    self._estadisticas['aciertos'] += 1
+                    return valor
+                del self._datos[clave]
+            self._estadisticas['fallos'] += 1
+            generacion = self._generacion
+
+        valor = cargar()
+        if valor is None:
+            return None # no se guardan las búsquedas sin resultado
+
+        with self._lock:
+            if generacion == self._generacion:
+                caducidad = ahora + self.ttl if self.ttl is not None else None
+                self._datos[clave] = (valor, caducidad)
+                self._datos.move_to_end(clave)
+                while len(self._datos) > self.capacidad:
+                    self._datos.popitem(last=False)
+                    self._estadisticas['desalojos'] += 1
+        return valor
+
+    def obtener_varios(self, claves, cargar_varios):
+        # Como obtener(), pero las claves que faltan se cargan juntas: cargar_varios(faltantes) -> {clave: valor}
+        ahora = time.monotonic()
+        encontrados = {}
+        faltantes = []
+        with self._lock:
+            for clave in claves:
+                entrada = self._datos.get(clave, _NO_ENCONTRADO)
+                if entrada is not _NO_ENCONTRADO and (entrada[1] is None or entrada[1] > ahora):
+                    self._datos.move_to_end(clave)
+                    encontrados[clave] = entrada[0]
+                else:
+                    faltantes.append(clave)
+            self._estadisticas['aciertos'] += len(encontrados)
+            self._estadisticas['fallos'] += len(faltantes)
+            generacion = self._generacion
+
+        if faltantes:
+            cargados = cargar_varios(faltantes)
+            encontrados.update(cargados)
+            with self._lock:
+                if generacion == self._generacion:
+                    caducidad = ahora + self.ttl if self.ttl is not None else None
+                    for clave, valor in cargados.items():
+                        self._datos[clave] = (valor, caducidad)
+                        self._datos.move_to_end(clave)
+                    while len(self._datos) > self.capacidad:
+                        self._datos.popitem(last=False)
+                        self._estadisticas['desalojos'] += 1
+        return encontrados
+
+    def invalidar(self, *claves):
+        with self._lock:
+            self._generacion += 1
+            for clave in claves:
+                self._datos.pop(clave, None)
+            self._estadisticas['invalidaciones'] += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+            self._estadisticas['invalidaciones'] += 1
+
+    def estadisticas(self):
+        with self._lock:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['entradas'] = len(self._datos)
+        total = estadisticas['aciertos'] + estadisticas['fallos']
+        estadisticas['tasa_aciertos'] = estadisticas['aciertos'] / total if total else 0.0
+        return estadisticas
+
+
+class _CacheDAO:
+    # Mezcla para los DAOs con caché. Con invalidacion_entre_procesos, el contador de VersionesDatos
+    # (incrementado por triggers en cada escritura) vacía la caché cuando otro proceso modifica la tabla.
+    # Las lecturas se cargan con super(): la misma caché sirve sobre los DAOs particionados (particiones.py).
+    TABLA = None
+
+    def _iniciar_cache(self, capacidad, ttl, invalidacion_entre_procesos, intervalo_verificacion):
+        self.cache = CacheLRU(capacidad, ttl)
+        self.invalidacion_entre_procesos = invalidacion_entre_procesos
+        self.intervalo_verificacion = intervalo_verificacion
+        self._version_conocida = None
+        self._ultima_verificacion = 0.0
+
+    def _leer_con_cache(self, clave, cargar):
+        if self.invalidacion_entre_procesos:
+            self._verificar_version()
+        return self.cache.obtener(clave, cargar)
+
+    def _verificar_version(self):
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion < self.intervalo_verificacion:
+            return
+        self._ultima_verificacion = ahora
+        try:
+            version = self.obtener_version_tabla(self.TABLA)
+        except sqlite3.Error:
+            self.invalidacion_entre_procesos = False
+            _log.warning("No existe la tabla VersionesDatos; se desactiva la invalidación de caché entre procesos.")
+            return
+        if version != self._version_conocida:
+            if self._version_conocida is not None:
+                self.cache.limpiar()
+            self._version_conocida = version
+
+    # La caché guarda tuplas inmutables; los modelos (fabrica) se construyen al servir cada lectura
+
+    def _fila(self, fila, fabrica):
+        return fabrica(*fila) if fabrica is not None and fila is not None else fila
+
+    def _filas(self, filas, fabrica):
+        if filas is None:
+            return None
+        return list(starmap(fabrica, filas)) if fabrica is not None else list(filas)
+
+    def invalidar(self, *ids):
+        self.cache.invalidar(_CLAVE_TODOS, *ids)
+
+    def invalidar_todo(self):
+        self.cache.limpiar()
+
+
+class JuegoDAOConCache(_CacheDAO, JuegoDAO):
+    TABLA = 'Juegos'
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE, ttl=TTL_CACHE, invalidacion_entre_procesos=False,
+                 intervalo_verificacion=INTERVALO_VERIFICACION_VERSION):
+        super().__init__()
+        self._iniciar_cache(capacidad, ttl, invalidacion_entre_procesos, intervalo_verificacion)
+
+    def obtener_juego_por_id(self, id_juego, fabrica=None):
+        cargar = super().obtener_juego_por_id
+        fila = self._leer_con_cache(id_juego, lambda: cargar(id_juego))
+        return self._fila(fila, fabrica)
+
+    def obtener_todos_los_juegos(self, fabrica=None):
+        juegos = self._leer_con_cache(_CLAVE_TODOS, super().obtener_todos_los_juegos)
+        return self._filas(juegos, fabrica)
+
+    def insertar_juego(self, nombre, descripcion=""):
+        id_juego = super().insertar_juego(nombre, descripcion)
+        self.invalidar()
+        return id_juego
+
+    def insertar_juegos_si_no_existen(self, filas):
+        insertados = super().insertar_juegos_si_no_existen(filas)
+        self.invalidar()
+        return insertados
+
+    def recalcular_puntuaciones(self, id_juego=None):
+        recalculado = super().recalcular_puntuaciones(id_juego)
+        self.invalidar_todo()
+        return recalculado
+
+    def recalibrar_clasificacion(self, votos_previos=None, media_previa=None):
+        recalibrado = super().recalibrar_clasificacion(votos_previos, media_previa)
+        self.invalidar_todo()
+        return recalibrado
+
+
+class UsuarioDAOConCache(_CacheDAO, UsuarioDAO):
+    TABLA = 'Usuarios'
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE, ttl=TTL_CACHE, invalidacion_entre_procesos=False,
+                 intervalo_verificacion=INTERVALO_VERIFICACION_VERSION):
+        super().__init__()
+        self._iniciar_cache(capacidad, ttl, invalidacion_entre_procesos, intervalo_verificacion)
+
+    def obtener_usuario_por_id(self, id_usuario, fabrica=None):
+        cargar = super().obtener_usuario_por_id
+        fila = self._leer_con_cache(id_usuario, lambda: cargar(id_usuario))
+        return self._fila(fila, fabrica)
+
+    def obtener_todos_los_usuarios(self, fabrica=None):
+        usuarios = self._leer_con_cache(_CLAVE_TODOS, super().obtener_todos_los_usuarios)
+        return self._filas(usuarios, fabrica)
+
+    def obtener_usuarios_por_ids(self, ids_usuarios, fabrica=None):
+        if self.invalidacion_entre_procesos:
+            self._verificar_version()
+        cargar = super().obtener_usuarios_por_ids
+        encontrados = self.cache.obtener_varios(
+            list(dict.fromkeys(ids_usuarios)),
+            lambda faltantes: {fila[0]: fila for fila in cargar(faltantes)})
+        return self._filas(encontrados.values(), fabrica)
+
+    def insertar_usuario(self, nombre_usuario, tipo_usuario):
+        id_usuario = super().insertar_usuario(nombre_usuario, tipo_usuario)
+        self.invalidar()
+        return id_usuario
+
+    def insertar_usuarios_si_no_existen(self, filas):
+        insertados = super().insertar_usuarios_si_no_existen(filas)
+        self.invalidar()
+        return insertados
@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import islice
+
+from .cache import INTERVALO_VERIFICACION_VERSION
+from .daos import INDICE_PUNTUACION_PONDERADA, JuegoDAO
+from .metricas import obtener_logger
+
+TAMAÑO_BLOQUE_CLASIFICACION = 512 # claves por bloque de _ListaOrdenada (se parte al llegar al doble)
+
+_log = obtener_logger(__name__)
+
+
+class _ListaOrdenada:
+    # Lista ordenada partida en bloques de como mucho 2·tamaño_bloque claves, con el máximo de cada bloque en
+    # _maximos y un árbol de Fenwick con el tamaño de cada bloque. Buscar el bloque y contar las claves anteriores
+    # es O(log n); insertar o borrar solo desplaza las claves de un bloque (acotado), no las de toda la lista.
+    # Partir o quitar un bloque reconstruye los índices en O(n / tamaño_bloque), una vez cada muchas operaciones.
+    def __init__(self, claves=(), tamaño_bloque=TAMAÑO_BLOQUE_CLASIFICACION):
+        # claves: ya ordenadas
+        self.tamaño_bloque = tamaño_bloque
+        claves = list(claves)
+        self._bloques = [claves[i:i + tamaño_bloque] for i in range(0, len(claves), tamaño_bloque)]
+        self._total = len(claves)
+        self._reconstruir_indices()
+
+    def _reconstruir_indices(self):
+        self._maximos = [bloque[-1] for bloque in self._bloques]
+        arbol = [0] + [len(bloque) for bloque in self._bloques]
+        for i in range(1, len(arbol)):
+            padre = i + (i & -i)
+            if padre < len(arbol):
+                arbol[padre] += arbol[i]
+        self._arbol = arbol
+
+    def _sumar_tamaño(self, indice_bloque, delta):
+        i = indice_bloque + 1
+        while i < len(self._arbol):
+            self._arbol[i] += delta
+            i += i & -i
+
+    def _claves_anteriores(self, indice_bloque):
+        # Claves en los bloques anteriores a indice_bloque
+        total, i = 0, indice_bloque
+        while i > 0:
+            total += self._arbol[i]
+            i -= i & -i
+        return total
+
+    def agregar(self, clave):
+        if not self._bloques:
+            self._bloques.append([clave])
+            self._total = 1
+            self._reconstruir_indices()
+            return
+        i = min(bisect_left(self._maximos, clave), len(self._bloques) - 1)
+        bloque = self._bloques[i]
+        insort(bloque, clave)
+        self._maximos[i] = bloque[-1]
+        self._total += 1
+        if len(bloque) > 2 * self.tamaño_bloque:
+            self._bloques[i:i + 1] = [bloque[:self.tamaño_bloque], bloque[self.tamaño_bloque:]]
+            self._reconstruir_indices()
+        else:
+            self._sumar_tamaño(i, 1)
+
+    def eliminar(self, clave):
+        # La clave debe estar en la lista
+        i = bisect_left(self._maximos, clave)
+        bloque = self._bloques[i]
+        del bloque[bisect_left(bloque, clave)]
+        self._total -= 1
+        if not bloque:
+            del self._bloques[i]
+            self._reconstruir_indices()
+        else:
+            self._maximos[i] = bloque[-1]
+            self._sumar_tamaño(i, -1)
+
+    def indice(self, clave):
+        # Posición (desde 0) de una clave que está en la lista
+        i = bisect_left(self._maximos, clave)
+        return self._claves_anteriores(i) + bisect_left(self._bloques[i], clave)
+
+    def primeras(self, limite):
+        return list(islice((clave for bloque in self._bloques for clave in bloque), max(limite, 0)))
+
+    def __len__(self):
+        return self._total
+
+
+class ClasificacionJuegos:
+    # Clasificación de juegos en memoria: claves (-puntuacion_ponderada, id_juego) en una _ListaOrdenada, el mismo
+    # orden que idx_juegos_clasificacion. La posición de un juego y la recolocación de un juego tras cada reseña
+    # aceptada cuestan O(log n) más el desplazamiento dentro de un bloque. Con invalidacion_entre_procesos se
+    # recarga entera cuando VersionesDatos indica que otro proceso ha modificado Juegos.
+    def __init__(self, juego_dao=None, invalidacion_entre_procesos=False, intervalo_verificacion=INTERVALO_VERIFICACION_VERSION):
+        self.juego_dao = juego_dao or JuegoDAO()
+        self.invalidacion_entre_procesos = invalidacion_entre_procesos
+        self.intervalo_verificacion = intervalo_verificacion
+        self._claves = _ListaOrdenada()
+        self._clave_por_juego = {}
+        self._cargada = False
+        self._actualizaciones_durante_carga = None
+        self._lock = threading.Lock()
+        self._version_conocida = None
+        self._ultima_verificacion = 0.0
+
+    def recargar(self):
+        with self._lock:
+            self._actualizaciones_durante_carga = {}
+        # La consulta ya devuelve las filas en orden de clasificación: no hace falta ordenar
+        try:
+            claves = [(-puntuacion_ponderada, id_juego) for id_juego, puntuacion_ponderada in self.juego_dao.iterar_clasificacion()]
+        except sqlite3.Error:
+            with self._lock:
+                self._actualizaciones_durante_carga = None
+            raise
+        with self._lock:
+            self._claves = _ListaOrdenada(claves)
+            self._clave_por_juego = {clave[1]: clave for clave in claves}
+            self._cargada = True
+            # Las reseñas confirmadas mientras se leía la tabla se aplican encima de lo cargado
+            pendientes, self._actualizaciones_durante_carga = self._actualizaciones_durante_carga, None
+            for id_juego, puntuacion_ponderada in pendientes.items():
+                self._recolocar(id_juego, puntuacion_ponderada)
+
+    def actualizar(self, id_juego, puntuacion_ponderada):
+        with self._lock:
+            if self._actualizaciones_durante_carga is not None:
+                self._actualizaciones_durante_carga[id_juego] = puntuacion_ponderada
+            elif self._cargada:
+                self._recolocar(id_juego, puntuacion_ponderada)
+
+    def _recolocar(self, id_juego, puntuacion_ponderada):
+        anterior = self._clave_por_juego.get(id_juego)
+        if anterior is not None:
+            self._claves.eliminar(anterior)
+        clave = (-puntuacion_ponderada, id_juego)
+        self._claves.agregar(clave)
+        self._clave_por_juego[id_juego] = clave
+
+    def posicion(self, id_juego):
+        # Posición (1 = primero) o None si el juego no existe
+        self._asegurar_actualizada()
+        with self._lock:
+            clave = self._clave_por_juego.get(id_juego)
+            if clave is not None:
+                return self._claves.indice(clave) + 1
+        # Un juego insertado después de la carga (importación, datos base) entra al consultarlo
+        if not self.agregar_juego(id_juego):
+            return None
+        with self._lock:
+            clave = self._clave_por_juego.get(id_juego)
+            return self._claves.indice(clave) + 1 if clave is not None else None
+
+    def agregar_juego(self, id_juego):
+        # Coloca un juego nuevo con su puntuación actual; False si no existe
+        juego = self.juego_dao.obtener_juego_por_id(id_juego)
+        if not juego:
+            return False
+        self.actualizar(id_juego, juego[INDICE_PUNTUACION_PONDERADA])
+        return True
+
+    def mejores(self, limite):
+        # [(id_juego, puntuacion_ponderada)] de los primeros 'limite' juegos
+        self._asegurar_actualizada()
+        with self._lock:
+            return [(id_juego, -negada) for negada, id_juego in self._claves.primeras(limite)]
+
+    def __len__(self):
+        self._asegurar_actualizada()
+        return len(self._claves)
+
+    def esta_activa(self):
+        # Si no se ha cargado (ni se está cargando) no hace falta leer la nueva puntuación para actualizarla
+        return self._cargada or self._actualizaciones_durante_carga is not None
+
+    def invalidar(self):
+        with self._lock:
+            self._cargada = False
+
+    def _asegurar_actualizada(self):
+        if self.invalidacion_entre_procesos:
+            self._verificar_version()
+        if not self._cargada:
+            self.recargar()
+
+    def _verificar_version(self):
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion < self.intervalo_verificacion:
+            return
+        self._ultima_verificacion = ahora
+        try:
+            version = self.juego_dao.obtener_version_tabla('Juegos')
+        except sqlite3.Error:
+            self.invalidacion_entre_procesos = False
+            _log.warning("No existe la tabla VersionesDatos; se desactiva la recarga de la clasificación entre procesos.")
+            return
+        if version != self._version_conocida:
+            if self._version_conocida is not None:
+                self.invalidar()
+            self._version_conocida = version
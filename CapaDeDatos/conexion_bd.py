@@ -1,76 +1,398 @@
 import sqlite3
 import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .metricas import configurar_logging, obtener_logger, obtener_registro
+from .migraciones import aplicar_migraciones, obtener_version_esquema
 
 NOMBRE_BASE_DE_DATOS = 'resenas_db.sqlite'
 
+# Parámetros por defecto del pool de conexiones
+TAMAÑO_MAXIMO_POOL = 8
+TIEMPO_MAXIMO_INACTIVIDAD = 60.0 # segundos que una conexión libre puede esperar antes de cerrarse
+TIEMPO_ESPERA_CONEXION = 10.0 # segundos que un hilo espera por una conexión libre
+INTERVALO_VERIFICACION = 5.0 # las conexiones libres más antiguas que esto se verifican antes de reutilizarse
+
+# Perfiles de almacenamiento: PRAGMAs que se aplican a cada conexión nueva.
+# WAL permite lectores concurrentes con un escritor; busy_timeout hace que SQLite espere al lock en vez de fallar.
+PERFILES_ALMACENAMIENTO = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'mmap_size': 0,
+        'cache_size': -2000, # negativo: KiB
+        'temp_store': 'DEFAULT',
+    },
+    'rendimiento': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 10000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+    },
+    'lectura': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 1024 * 1024 * 1024,
+        'cache_size': -128000,
+        'temp_store': 'MEMORY',
+    },
+}
+PERFIL_POR_DEFECTO = os.environ.get('RESENAS_PERFIL_BD', 'durable')
+RUTA_BD_POR_DEFECTO = os.environ.get('RESENAS_RUTA_BD') # None: NOMBRE_BASE_DE_DATOS en la raíz del proyecto
+
+# Reintentos ante SQLITE_BUSY / "database is locked" una vez agotado el busy_timeout
+REINTENTOS_MAXIMOS = 5
+ESPERA_INICIAL_REINTENTO = 0.01
+ESPERA_MAXIMA_REINTENTO = 0.5
+
+_perfil_actual = PERFIL_POR_DEFECTO
+_ruta_actual = RUTA_BD_POR_DEFECTO
+_estadisticas_bloqueos = {'reintentos': 0, 'reintentos_agotados': 0, 'tiempo_espera_bloqueo': 0.0}
+_lock_estadisticas_bloqueos = threading.Lock()
+_log = obtener_logger(__name__)
+
 def obtener_ruta_base_de_datos():
+    if _ruta_actual:
+        return os.path.abspath(_ruta_actual)
     dir_actual = os.path.dirname(__file__)
     ruta_proyecto = os.path.join(dir_actual, '..')
     ruta_bd = os.path.join(ruta_proyecto, NOMBRE_BASE_DE_DATOS)
     return os.path.abspath(ruta_bd)
 
+def _abrir_conexion(ruta_bd, check_same_thread=True, perfil=None):
+    configuracion = PERFILES_ALMACENAMIENTO[perfil or _perfil_actual]
+    conexion = sqlite3.connect(ruta_bd, check_same_thread=check_same_thread,
+                               timeout=configuracion['busy_timeout'] / 1000)
+    conexion.execute("PRAGMA foreign_keys = ON;")
+    for pragma in ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store'):
+        conexion.execute(f"PRAGMA {pragma} = {configuracion[pragma]};")
+    return conexion
+
 def obtener_conexion():
     try:
         ruta_bd = obtener_ruta_base_de_datos()
-        conexion = sqlite3.connect(ruta_bd)
-        conexion.execute("PRAGMA foreign_keys = ON;") 
-        return conexion
+        return _abrir_conexion(ruta_bd)
     except sqlite3.Error as e:
-        print(f"Error al conectar con la base de datos: {e}")
+        _log.error("Error al conectar con la base de datos: %s", e)
         return None
 
-def crear_tablas():
-    conexion = obtener_conexion()
-    if conexion:
-        cursor = conexion.cursor()
+def configurar_perfil_almacenamiento(nombre_perfil):
+    # Las conexiones ya abiertas conservan sus PRAGMAs: se cierra el pool para que las nuevas usen el perfil
+    global _perfil_actual
+    if nombre_perfil not in PERFILES_ALMACENAMIENTO:
+        raise ValueError(f"Perfil de almacenamiento desconocido: '{nombre_perfil}'. Opciones: {', '.join(PERFILES_ALMACENAMIENTO)}")
+    _perfil_actual = nombre_perfil
+    cerrar_pool()
+
+def obtener_perfil_almacenamiento():
+    return _perfil_actual
+
+def configurar_ruta_base_de_datos(ruta_bd=None):
+    # Apunta la aplicación a otra base de datos (p. ej. una temporal para benchmarks); None vuelve a la del proyecto
+    global _ruta_actual
+    _ruta_actual = ruta_bd
+    cerrar_pool()
+
+def es_error_bloqueo(error):
+    mensaje = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in mensaje or 'busy' in mensaje)
+
+def ejecutar_con_reintentos(operacion):
+    # Reintenta operacion() con espera exponencial (con jitter) mientras la BD esté bloqueada por otro escritor
+    intento = 0
+    inicio = time.perf_counter()
+    while True:
+        try:
+            resultado = operacion()
+        except sqlite3.OperationalError as e:
+            if not es_error_bloqueo(e):
+                raise
+            if intento >= REINTENTOS_MAXIMOS:
+                _registrar_espera_bloqueo(time.perf_counter() - inicio, intento, agotado=True)
+                raise
+            time.sleep(min(ESPERA_MAXIMA_REINTENTO, ESPERA_INICIAL_REINTENTO * 2 ** intento) * random.uniform(0.5, 1.0))
+            intento += 1
+            continue
+        if intento:
+            _registrar_espera_bloqueo(time.perf_counter() - inicio, intento)
+        return resultado
+
+def _registrar_espera_bloqueo(segundos, reintentos, agotado=False):
+    with _lock_estadisticas_bloqueos:
+        _estadisticas_bloqueos['reintentos'] += reintentos
+        if agotado:
+            _estadisticas_bloqueos['reintentos_agotados'] += 1
+        _estadisticas_bloqueos['tiempo_espera_bloqueo'] += segundos
+
+def estadisticas_bloqueos():
+    with _lock_estadisticas_bloqueos:
+        return dict(_estadisticas_bloqueos)
+
+
+class PoolConexiones:
+    def __init__(self, ruta_bd=None, tamaño_maximo=TAMAÑO_MAXIMO_POOL,
+                 tiempo_maximo_inactividad=TIEMPO_MAXIMO_INACTIVIDAD, tiempo_espera=TIEMPO_ESPERA_CONEXION, perfil=None):
+        self.ruta_bd = ruta_bd or obtener_ruta_base_de_datos()
+        self.perfil = perfil or _perfil_actual
+        self.tamaño_maximo = tamaño_maximo
+        self.tiempo_maximo_inactividad = tiempo_maximo_inactividad
+        self.tiempo_espera = tiempo_espera
+        self._cerrado = False
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        # Tras un fork el proceso hijo no debe reutilizar las conexiones ni los locks del padre:
+        # se abandonan sin cerrarlas y se empieza con un pool vacío.
+        self._pid = os.getpid()
+        self._condicion = threading.Condition(threading.Lock())
+        self._libres = deque() # (conexion, instante_devolucion), la más reciente a la derecha
+        self._en_uso = 0
+        self._local = threading.local()
+        self._estadisticas = {
+            'aciertos': 0,
+            'fallos': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'descartadas': 0,
+            'desalojadas': 0,
+        }
+
+    def obtener(self):
+        if self._pid != os.getpid():
+            self._reiniciar_estado()
+
+        # Cada hilo tiene como mucho una conexión prestada: las llamadas anidadas reutilizan la misma
+        local = self._local
+        if getattr(local, 'profundidad', 0):
+            local.profundidad += 1
+            return local.conexion
+
+        conexion = self._extraer_conexion()
+        local.conexion = conexion
+        local.profundidad = 1
+        return conexion
+
+    def devolver(self, conexion=None):
+        local = self._local
+        if not getattr(local, 'profundidad', 0):
+            return # conexión prestada antes de un fork o de cerrar el pool
+        local.profundidad -= 1
+        if local.profundidad:
+            return
+        conexion = local.conexion
+        local.conexion = None
+
+        try:
+            if conexion.in_transaction:
+                conexion.rollback()
+        except sqlite3.Error:
+            self._descartar(conexion)
+            return
+
+        with self._condicion:
+            self._en_uso -= 1
+            if self._cerrado:
+                conexion.close()
+            else:
+                self._libres.append((conexion, time.monotonic()))
+            self._condicion.notify()
+
+    @contextmanager
+    def conexion(self):
+        conexion = self.obtener()
+        try:
+            yield conexion
+        finally:
+            self.devolver(conexion)
+
+    @contextmanager
+    def transaccion(self, modo="IMMEDIATE"):
+        # Agrupa varias sentencias del hilo actual en una transacción; las transacciones anidadas
+        # se integran en la exterior, que es la única que hace commit o rollback.
+        conexion = self.obtener()
+        local = self._local
+        if getattr(local, 'en_transaccion', False):
+            try:
+                yield conexion
+            finally:
+                self.devolver(conexion)
+            return
+
+        registro = obtener_registro()
         try:
-            # Tabla Juegos
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Juegos (
-                    id_juego INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre TEXT NOT NULL,
-                    descripcion TEXT,
-                    puntuacion_media REAL DEFAULT 0.0,
-                    total_reseñas INTEGER DEFAULT 0,
-                    puntuacion_acumulada INTEGER DEFAULT 0
-                );
-            ''')
-            print("Tabla 'Juegos' verificada/creada exitosamente.")
-
-            # Tabla Usuarios
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Usuarios (
-                    id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nombre_usuario TEXT UNIQUE NOT NULL,
-                    tipo_usuario TEXT NOT NULL -- Ej: 'critico', 'usuario_normal'
-                );
-            ''')
-            print("Tabla 'Usuarios' verificada/creada exitosamente.")
-
-            # Tabla Reseñas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Reseñas (
-                    id_reseña INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_juego INTEGER NOT NULL,
-                    id_usuario INTEGER NOT NULL,
-                    puntuacion INTEGER NOT NULL CHECK (puntuacion >= 1 AND puntuacion <= 10),
-                    contenido TEXT,
-                    fecha_reseña DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    origen_simulado_ip TEXT,
-                    UNIQUE(id_juego, id_usuario),
-                    FOREIGN KEY (id_juego) REFERENCES Juegos(id_juego),
-                    FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario)
-                );
-            ''')
-            print("Tabla 'Reseñas' verificada/creada exitosamente.")
-
-            conexion.commit() 
-        except sqlite3.Error as e:
-            print(f"Error al crear tablas: {e}")
+            # BEGIN IMMEDIATE espera al lock de escritura de la base de datos (busy_timeout y reintentos)
+            inicio = time.perf_counter()
+            ejecutar_con_reintentos(lambda: conexion.execute(f"BEGIN {modo};"))
+            registro.observar('resenas_espera_bloqueo_segundos', time.perf_counter() - inicio, bloqueo='escritura_sqlite')
+            local.en_transaccion = True
+            with registro.medir('resenas_transaccion_segundos'):
+                try:
+                    yield conexion
+                except BaseException:
+                    conexion.rollback()
+                    raise
+                conexion.commit()
         finally:
+            local.en_transaccion = False
+            self.devolver(conexion)
+
+    def en_transaccion(self):
+        return getattr(self._local, 'en_transaccion', False)
+
+    def _extraer_conexion(self):
+        inicio_espera = None
+        conexion = None
+        with self._condicion:
+            while True:
+                if self._cerrado:
+                    raise sqlite3.OperationalError("El pool de conexiones está cerrado.")
+                ahora = time.monotonic()
+                self._desalojar_inactivas(ahora)
+                if self._libres:
+                    conexion, instante_devolucion = self._libres.pop()
+                    self._en_uso += 1
+                    break
+                if self._en_uso < self.tamaño_maximo:
+                    self._en_uso += 1
+                    break
+
+                if inicio_espera is None:
+                    inicio_espera = ahora
+                    self._estadisticas['esperas'] += 1
+                restante = self.tiempo_espera - (ahora - inicio_espera)
+                if restante <= 0:
+                    self._estadisticas['tiempo_espera_total'] += ahora - inicio_espera
+                    raise sqlite3.OperationalError(
+                        f"No hay conexiones libres tras esperar {self.tiempo_espera:.1f}s (máximo: {self.tamaño_maximo}).")
+                self._condicion.wait(restante)
+
+            if inicio_espera is not None:
+                self._estadisticas['tiempo_espera_total'] += time.monotonic() - inicio_espera
+            if conexion is not None:
+                self._estadisticas['aciertos'] += 1
+            else:
+                self._estadisticas['fallos'] += 1
+
+        if conexion is not None and ahora - instante_devolucion > INTERVALO_VERIFICACION:
+            if not self._conexion_sana(conexion):
+                self._descartar(conexion, liberar_hueco=False)
+                conexion = None
+
+        if conexion is None:
+            try:
+                conexion = self._nueva_conexion()
+            except sqlite3.Error:
+                with self._condicion:
+                    self._en_uso -= 1
+                    self._condicion.notify()
+                raise
+        return conexion
+
+    def _nueva_conexion(self):
+        return _abrir_conexion(self.ruta_bd, check_same_thread=False, perfil=self.perfil)
+
+    def _conexion_sana(self, conexion):
+        try:
+            conexion.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conexion, liberar_hueco=True):
+        try:
+            conexion.close()
+        except sqlite3.Error:
+            pass
+        with self._condicion:
+            self._estadisticas['descartadas'] += 1
+            if liberar_hueco:
+                self._en_uso -= 1
+                self._condicion.notify()
+
+    def _desalojar_inactivas(self, ahora):
+        while self._libres and ahora - self._libres[0][1] > self.tiempo_maximo_inactividad:
+            conexion, _ = self._libres.popleft()
             conexion.close()
-    else:
-        print("No se pudo obtener una conexión a la base de datos para crear las tablas.")
+            self._estadisticas['desalojadas'] += 1
+
+    def estadisticas(self):
+        with self._condicion:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['libres'] = len(self._libres)
+            estadisticas['en_uso'] = self._en_uso
+        estadisticas['tamaño_maximo'] = self.tamaño_maximo
+        total = estadisticas['aciertos'] + estadisticas['fallos']
+        estadisticas['tasa_aciertos'] = estadisticas['aciertos'] / total if total else 0.0
+        return estadisticas
+
+    def cerrar(self):
+        if self._pid != os.getpid():
+            self._reiniciar_estado()
+            self._cerrado = True
+            return
+        with self._condicion:
+            self._cerrado = True
+            while self._libres:
+                conexion, _ = self._libres.popleft()
+                conexion.close()
+            self._condicion.notify_all()
+
+
+_pool = None
+_lock_pool = threading.Lock()
+
+def obtener_pool():
+    global _pool
+    if _pool is None:
+        with _lock_pool:
+            if _pool is None:
+                _pool = PoolConexiones()
+    return _pool
+
+def estadisticas_pool():
+    return obtener_pool().estadisticas()
+
+def cerrar_pool():
+    global _pool
+    with _lock_pool:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+
+def _reiniciar_lock_pool_tras_fork():
+    global _lock_pool
+    _lock_pool = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_lock_pool_tras_fork)
+
+def crear_tablas():
+    # Aplica las migraciones pendientes (ver CapaDeDatos/migraciones.py). Si el esquema está al día solo se lee
+    # PRAGMA user_version, sin DDL ni mensajes, y la conexión queda en el pool para las primeras consultas.
+    configurar_logging()
+    try:
+        pool = obtener_pool()
+        conexion = pool.obtener()
+    except sqlite3.Error as e:
+        _log.error("No se pudo obtener una conexión a la base de datos para crear las tablas: %s", e)
+        return
+    try:
+        version_anterior = obtener_version_esquema(conexion)
+        version = aplicar_migraciones(conexion)
+        if version != version_anterior:
+            _log.info("Esquema de la base de datos actualizado de la versión %s a la %s.", version_anterior, version)
+    except sqlite3.Error as e:
+        _log.error("Error al crear tablas: %s", e)
+    finally:
+        pool.devolver(conexion)
 
 
 if __name__ == '__main__':
@@ -1,39 +1,201 @@
+import functools
+import re
 import sqlite3
-from .conexion_bd import obtener_conexion 
+from datetime import datetime, timezone
+from .conexion_bd import obtener_pool, ejecutar_con_reintentos
+from .metricas import configurar_logging, obtener_logger, obtener_registro
+from .migraciones import (COLUMNAS_HISTOGRAMA, TIPO_USUARIO_CRITICO, consulta_recalcular_agregados_por_tipo,
+                          consulta_reconstruir_histogramas, expresion_puntuacion_ponderada)
 import time 
 
+# Resultado por fila de ReseñaDAO.insertar_reseñas_lote
+RESEÑA_ACEPTADA = 'aceptada'
+RESEÑA_DUPLICADA = 'duplicada'
+RESEÑA_INVALIDA = 'invalida'
+
+MAX_PARAMETROS_CONSULTA = 900 # por debajo del límite de variables de SQLite en versiones antiguas
+TAMAÑO_LOTE_LECTURA = 500 # filas por fetchmany en las lecturas en streaming
+TAMAÑO_PAGINA = 20
+
+COLUMNAS_JUEGO = ("id_juego, nombre, descripcion, puntuacion_media, total_reseñas, puntuacion_acumulada, puntuacion_ponderada, "
+                  "total_reseñas_criticos, puntuacion_acumulada_criticos, puntuacion_media_criticos, "
+                  "total_reseñas_publico, puntuacion_acumulada_publico, puntuacion_media_publico")
+INDICE_PUNTUACION_PONDERADA = [columna.strip() for columna in COLUMNAS_JUEGO.split(",")].index("puntuacion_ponderada")
+
+# Órdenes estables para paginar reseñas por cursor: (ORDER BY, comparación del cursor, columnas del cursor).
+# Cada uno se apoya en un índice (id_juego, columna) cuyo desempate por id_reseña es el propio rowid.
+ORDENES_RESEÑAS = {
+    'recientes': ("fecha_reseña DESC, id_reseña DESC", "<", ("fecha_reseña", "id_reseña")),
+    'antiguas': ("fecha_reseña ASC, id_reseña ASC", ">", ("fecha_reseña", "id_reseña")),
+    'mejor_puntuadas': ("puntuacion DESC, id_reseña DESC", "<", ("puntuacion", "id_reseña")),
+}
+
+# Marcas de resaltado y número de tokens de los fragmentos de búsqueda (snippet de FTS5)
+MARCA_INICIO_COINCIDENCIA = '['
+MARCA_FIN_COINCIDENCIA = ']'
+TOKENS_FRAGMENTO = 12
+
+_PATRON_TOKEN_BUSQUEDA = re.compile(r"\w+\*?")
+
+def _expresion_busqueda(texto):
+    # Convierte el texto del usuario en una consulta FTS5 segura: cada palabra entre comillas (AND implícito),
+    # conservando el '*' final como búsqueda por prefijo. Los operadores y comillas del usuario se ignoran.
+    terminos = []
+    for token in _PATRON_TOKEN_BUSQUEDA.findall(texto or ""):
+        if token.endswith("*"):
+            terminos.append(f'"{token[:-1]}"*')
+        else:
+            terminos.append(f'"{token}"')
+    return " ".join(terminos) or None
+
+# Suma los conteos de un lote a JuegoHistograma, creando la fila del juego si aún no existe
+_CONSULTA_SUMAR_HISTOGRAMA = f'''
+    INSERT INTO JuegoHistograma (id_juego, {", ".join(COLUMNAS_HISTOGRAMA)})
+    VALUES ({", ".join("?" * (len(COLUMNAS_HISTOGRAMA) + 1))})
+    ON CONFLICT (id_juego) DO UPDATE SET {", ".join(f"{c} = {c} + excluded.{c}" for c in COLUMNAS_HISTOGRAMA)};
+'''
+
+_CONSULTA_SUMAR_ROLLUP = '''
+    INSERT INTO {tabla} (id_juego, {columna}, total_reseñas, puntuacion_acumulada) VALUES (?, ?, ?, ?)
+    ON CONFLICT (id_juego, {columna}) DO UPDATE SET
+        total_reseñas = total_reseñas + excluded.total_reseñas,
+        puntuacion_acumulada = puntuacion_acumulada + excluded.puntuacion_acumulada;
+'''
+TAMAÑO_LOTE_RELLENO_ROLLUPS = 5000
+
+_log = obtener_logger(__name__)
+
+_PATRON_TABLA_CONSULTA = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+@functools.lru_cache(maxsize=512)
+def _etiqueta_consulta(consulta):
+    # 'SELECT Juegos', 'INSERT Reseñas'...: identifica la sentencia en las métricas sin depender de sus parámetros
+    verbo = consulta.split(None, 1)[0].upper() if consulta.strip() else ""
+    tabla = _PATRON_TABLA_CONSULTA.search(consulta)
+    return f"{verbo} {tabla.group(1)}" if tabla else verbo
+
+def _fecha_actual():
+    # Mismo formato y zona (UTC) que CURRENT_TIMESTAMP de SQLite
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+def _normalizar_fecha(fecha):
+    # Fecha recibida de fuera (p. ej. una importación) al formato de _fecha_actual; None si no es válida
+    try:
+        fecha = datetime.fromisoformat(fecha)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc)
+    return fecha.strftime("%Y-%m-%d %H:%M:%S")
+
+def _fabrica_filas(clase_modelo):
+    # row_factory que construye el modelo directamente a partir de la fila, sin pasar por listas de tuplas
+    return lambda cursor, fila: clase_modelo(*fila)
+
+
 class BaseDAO:
-    def __init__(self):
-        pass
+    def __init__(self, pool=None):
+        # pool: el de otra base de datos (p. ej. una partición, ver particiones.py); por defecto el de la aplicación
+        self.pool = pool
+        configurar_logging()
 
-    def _ejecutar_consulta(self, consulta, parametros=None, es_escritura=False):
-        conexion = obtener_conexion()
-        if conexion is None:
-            print("Error: No se pudo establecer conexión con la base de datos.")
-            return None
+    def _obtener_pool(self):
+        return self.pool or obtener_pool()
 
-        cursor = conexion.cursor()
+    def _ejecutar_consulta(self, consulta, parametros=None, es_escritura=False, fabrica=None):
+        pool = self._obtener_pool()
         try:
-            if parametros:
-                cursor.execute(consulta, parametros)
-            else:
-                cursor.execute(consulta)
-
-            if es_escritura:
-                conexion.commit() 
-                return cursor.lastrowid
-            else:
-                return cursor.fetchall()
+            conexion = pool.obtener()
+        except sqlite3.Error as e:
+            # Pool agotado o cerrado: se propaga como cualquier otro error, un None se confundiría con "sin resultados"
+            obtener_registro().incrementar('resenas_consulta_errores_total', consulta=_etiqueta_consulta(consulta))
+            _log.error("Error: No se pudo establecer conexión con la base de datos: %s", e)
+            raise
+        en_transaccion = pool.en_transaccion()
+
+        def ejecutar():
+            cursor = conexion.cursor()
+            if fabrica is not None:
+                cursor.row_factory = _fabrica_filas(fabrica)
+            try:
+                if parametros:
+                    cursor.execute(consulta, parametros)
+                else:
+                    cursor.execute(consulta)
+
+                if es_escritura:
+                    if not en_transaccion:
+                        conexion.commit() 
+                    return cursor.lastrowid
+                else:
+                    return cursor.fetchall()
+            except sqlite3.Error:
+                if not en_transaccion and conexion.in_transaction:
+                    conexion.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        registro = obtener_registro()
+        inicio = time.perf_counter()
+        try:
+            # Dentro de una transacción el reintento corresponde a quien la abrió (ver PoolConexiones.transaccion)
+            return ejecutar() if en_transaccion else ejecutar_con_reintentos(ejecutar)
         except sqlite3.IntegrityError as e:
-            print(f"Error de integridad en la base de datos: {e}")
-            conexion.rollback() 
+            registro.incrementar('resenas_consulta_errores_total', consulta=_etiqueta_consulta(consulta))
+            _log.error("Error de integridad en la base de datos: %s", e)
             raise 
         except sqlite3.Error as e:
-            print(f"Error en la base de datos: {e}")
-            conexion.rollback()
+            registro.incrementar('resenas_consulta_errores_total', consulta=_etiqueta_consulta(consulta))
+            _log.error("Error en la base de datos: %s", e)
             raise 
         finally:
-            conexion.close()
+            registro.observar('resenas_consulta_segundos', time.perf_counter() - inicio, consulta=_etiqueta_consulta(consulta))
+            pool.devolver(conexion)
+
+    def _iterar_consulta(self, consulta, parametros=None, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        # Devuelve las filas de una en una leyendo por bloques con fetchmany: memoria constante.
+        # La conexión queda prestada al hilo hasta agotar o cerrar el generador; consumirlo en el mismo hilo.
+        pool = self._obtener_pool()
+        conexion = pool.obtener()
+        cursor = conexion.cursor()
+        if fabrica is not None:
+            cursor.row_factory = _fabrica_filas(fabrica)
+        try:
+            cursor.execute(consulta, parametros or ())
+            while True:
+                filas = cursor.fetchmany(tamaño_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            cursor.close()
+            pool.devolver(conexion)
+
+    def _obtener_pagina(self, consulta, parametros, tamaño_pagina, columnas_cursor):
+        # Pide una fila de más para saber si hay página siguiente; el cursor son los valores de orden de la última fila
+        filas = self._ejecutar_consulta(consulta, (*parametros, tamaño_pagina + 1)) or []
+        if len(filas) <= tamaño_pagina:
+            return filas, None
+        filas = filas[:tamaño_pagina]
+        return filas, tuple(filas[-1][i] for i in columnas_cursor)
+
+    def _transaccion(self):
+        return self._obtener_pool().transaccion()
+
+    def obtener_metadato(self, clave):
+        resultado = self._ejecutar_consulta("SELECT valor FROM Metadatos WHERE clave = ?;", (clave,))
+        return resultado[0][0] if resultado else None
+
+    def guardar_metadato(self, clave, valor):
+        with self._transaccion() as conexion:
+            conexion.execute("INSERT INTO Metadatos (clave, valor) VALUES (?, ?) "
+                             "ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor;", (clave, valor))
+
+    def obtener_version_tabla(self, tabla):
+        # Contador de VersionesDatos: lo incrementan los triggers en cada escritura de la tabla, desde cualquier proceso
+        resultado = self._ejecutar_consulta("SELECT version FROM VersionesDatos WHERE tabla = ?;", (tabla,))
+        return resultado[0][0] if resultado else None
 
 
 class JuegoDAO(BaseDAO):
@@ -41,30 +203,134 @@ class JuegoDAO(BaseDAO):
         consulta = "INSERT INTO Juegos (nombre, descripcion) VALUES (?, ?);"
         try:
             id_juego = self._ejecutar_consulta(consulta, (nombre, descripcion), es_escritura=True)
-            print(f"Juego '{nombre}' insertado con ID: {id_juego}")
+            _log.debug("Juego '%s' insertado con ID: %s", nombre, id_juego)
             return id_juego
         except Exception:
             return None 
 
-    def obtener_juego_por_id(self, id_juego):
-        consulta = "SELECT id_juego, nombre, descripcion, puntuacion_media, total_reseñas, puntuacion_acumulada FROM Juegos WHERE id_juego = ?;"
-        resultado = self._ejecutar_consulta(consulta, (id_juego,))
+    def obtener_juego_por_id(self, id_juego, fabrica=None):
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos WHERE id_juego = ?;"
+        resultado = self._ejecutar_consulta(consulta, (id_juego,), fabrica=fabrica)
         return resultado[0] if resultado else None
 
-    def obtener_juego_por_nombre(self, nombre_juego):
-        consulta = "SELECT id_juego, nombre, descripcion, puntuacion_media, total_reseñas, puntuacion_acumulada FROM Juegos WHERE nombre = ?;"
-        resultado = self._ejecutar_consulta(consulta, (nombre_juego,))
+    def obtener_juego_por_nombre(self, nombre_juego, fabrica=None):
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos WHERE nombre = ?;"
+        resultado = self._ejecutar_consulta(consulta, (nombre_juego,), fabrica=fabrica)
         return resultado[0] if resultado else None
 
-    def obtener_todos_los_juegos(self):
-        consulta = "SELECT id_juego, nombre, descripcion, puntuacion_media, total_reseñas, puntuacion_acumulada FROM Juegos;"
-        return self._ejecutar_consulta(consulta)
+    def obtener_todos_los_juegos(self, fabrica=None):
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos;"
+        return self._ejecutar_consulta(consulta, fabrica=fabrica)
+
+    def insertar_juegos_lote(self, filas):
+        # filas: (id_juego, nombre, descripcion) conservando el ID de origen. Los agregados parten de cero y los
+        # ajustan las reseñas que se inserten después; los juegos cuyo ID o nombre ya existan se omiten.
+        with self._transaccion() as conexion:
+            # rowcount de executemany suma las filas insertadas (sin contar las de los triggers de VersionesDatos)
+            return conexion.executemany("INSERT INTO Juegos (id_juego, nombre, descripcion) VALUES (?, ?, ?) ON CONFLICT DO NOTHING;", filas).rowcount
+
+    def insertar_juegos_si_no_existen(self, filas):
+        # filas: (nombre, descripcion); los nombres que ya existen se omiten (índice único de Juegos.nombre)
+        with self._transaccion() as conexion:
+            return conexion.executemany("INSERT OR IGNORE INTO Juegos (nombre, descripcion) VALUES (?, ?);", filas).rowcount
+
+    def iterar_juegos(self, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos ORDER BY id_juego;"
+        return self._iterar_consulta(consulta, tamaño_lote=tamaño_lote, fabrica=fabrica)
+
+    def obtener_pagina_juegos(self, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos WHERE id_juego > ? ORDER BY id_juego LIMIT ?;"
+        return self._obtener_pagina(consulta, (cursor[0] if cursor else 0,), tamaño_pagina, (0,))
+
+    def obtener_mejores_juegos(self, limite=TAMAÑO_PAGINA, fabrica=None):
+        # Recorre idx_juegos_clasificacion: coste proporcional a limite, no al número de juegos
+        consulta = f"SELECT {COLUMNAS_JUEGO} FROM Juegos ORDER BY puntuacion_ponderada DESC, id_juego LIMIT ?;"
+        return self._ejecutar_consulta(consulta, (limite,), fabrica=fabrica)
+
+    def iterar_clasificacion(self, tamaño_lote=TAMAÑO_LOTE_LECTURA):
+        # (id_juego, puntuacion_ponderada) ya en orden de clasificación, para cargar ClasificacionJuegos
+        consulta = "SELECT id_juego, puntuacion_ponderada FROM Juegos ORDER BY puntuacion_ponderada DESC, id_juego;"
+        return self._iterar_consulta(consulta, tamaño_lote=tamaño_lote)
+
+    def obtener_parametros_clasificacion(self):
+        # (votos_previos, media_previa) de la media bayesiana
+        consulta = "SELECT clave, valor FROM Metadatos WHERE clave IN ('clasificacion_votos_previos', 'clasificacion_media_previa');"
+        valores = dict(self._ejecutar_consulta(consulta) or [])
+        return valores.get('clasificacion_votos_previos'), valores.get('clasificacion_media_previa')
+
+    def recalibrar_clasificacion(self, votos_previos=None, media_previa=None):
+        # La media previa se fija a la media global actual, o a media_previa si se indica (y opcionalmente cambian
+        # los votos previos); como cambia la puntuación ponderada de todos los juegos, se recalculan todas en la misma transacción.
+        with self._transaccion() as conexion:
+            media_global = media_previa
+            if media_global is None:
+                media_global = conexion.execute("SELECT CAST(SUM(puntuacion_acumulada) AS REAL) / NULLIF(SUM(total_reseñas), 0) FROM Juegos;").fetchone()[0]
+            if media_global is not None:
+                conexion.execute("UPDATE Metadatos SET valor = ? WHERE clave = 'clasificacion_media_previa';", (media_global,))
+            if votos_previos is not None:
+                conexion.execute("UPDATE Metadatos SET valor = ? WHERE clave = 'clasificacion_votos_previos';", (votos_previos,))
+            conexion.execute(f"UPDATE Juegos SET puntuacion_ponderada = {expresion_puntuacion_ponderada()};")
+        _log.info("Clasificación de juegos recalibrada con la media global actual.")
+        return True
+
+    def obtener_histograma(self, id_juego):
+        # Conteos de las puntuaciones 1..10 del juego; ceros si aún no tiene reseñas
+        consulta = f"SELECT {', '.join(COLUMNAS_HISTOGRAMA)} FROM JuegoHistograma WHERE id_juego = ?;"
+        resultado = self._ejecutar_consulta(consulta, (id_juego,))
+        return tuple(resultado[0]) if resultado else (0,) * len(COLUMNAS_HISTOGRAMA)
+
+    def verificar_histogramas(self):
+        # Compara JuegoHistograma con los conteos reales de Reseñas (recorriendo idx_reseñas_juego_puntuacion).
+        # Devuelve [(id_juego, conteos_guardados, conteos_reales)] de los juegos que no coinciden.
+        vacio = (0,) * len(COLUMNAS_HISTOGRAMA)
+        reales = {}
+        consulta = "SELECT id_juego, puntuacion, COUNT(*) FROM Reseñas GROUP BY id_juego, puntuacion;"
+        for id_juego, puntuacion, cantidad in self._iterar_consulta(consulta):
+            conteos = reales.setdefault(id_juego, list(vacio))
+            conteos[puntuacion - 1] = cantidad
+        guardados = {fila[0]: tuple(fila[1:]) for fila in
+                     self._iterar_consulta(f"SELECT id_juego, {', '.join(COLUMNAS_HISTOGRAMA)} FROM JuegoHistograma;")}
+        discrepancias = []
+        for id_juego in sorted(reales.keys() | guardados.keys()):
+            real = tuple(reales.get(id_juego, vacio))
+            guardado = guardados.get(id_juego, vacio)
+            if real != guardado:
+                discrepancias.append((id_juego, guardado, real))
+        return discrepancias
+
+    def reconstruir_histogramas(self, id_juego=None):
+        try:
+            with self._transaccion() as conexion:
+                if id_juego is None:
+                    conexion.execute(consulta_reconstruir_histogramas())
+                else:
+                    conexion.execute(consulta_reconstruir_histogramas(por_juego=True), (id_juego,))
+            _log.info("Histogramas de puntuaciones reconstruidos desde las reseñas.")
+            return True
+        except Exception:
+            return False
 
-    def actualizar_puntuacion_juego(self, id_juego, nueva_puntuacion_media, nuevo_total_reseñas, nueva_puntuacion_acumulada):
-        consulta = "UPDATE Juegos SET puntuacion_media = ?, total_reseñas = ?, puntuacion_acumulada = ? WHERE id_juego = ?;"
+    def recalcular_puntuaciones(self, id_juego=None):
+        # Recalculo completo desde Reseñas (COUNT/SUM): solo para reparar agregados desincronizados
+        consulta = '''
+            UPDATE Juegos SET
+                total_reseñas = (SELECT COUNT(*) FROM Reseñas r WHERE r.id_juego = Juegos.id_juego),
+                puntuacion_acumulada = (SELECT COALESCE(SUM(puntuacion), 0) FROM Reseñas r WHERE r.id_juego = Juegos.id_juego),
+                puntuacion_media = COALESCE((SELECT AVG(puntuacion) FROM Reseñas r WHERE r.id_juego = Juegos.id_juego), 0.0)
+        '''
+        # La ponderada se calcula en una segunda sentencia, ya con los totales corregidos
+        consulta_ponderada = f"UPDATE Juegos SET puntuacion_ponderada = {expresion_puntuacion_ponderada()}"
+        parametros = ()
+        if id_juego is not None:
+            consulta += " WHERE id_juego = ?"
+            consulta_ponderada += " WHERE id_juego = ?"
+            parametros = (id_juego,)
         try:
-            self._ejecutar_consulta(consulta, (nueva_puntuacion_media, nuevo_total_reseñas, nueva_puntuacion_acumulada, id_juego), es_escritura=True)
-            print(f"Puntuación del juego ID {id_juego} actualizada.")
+            with self._transaccion() as conexion:
+                conexion.execute(consulta + ";", parametros)
+                conexion.execute(consulta_ponderada + ";", parametros)
+                conexion.execute(consulta_recalcular_agregados_por_tipo(por_juego=id_juego is not None), parametros)
+            _log.info("Puntuaciones de juegos recalculadas desde las reseñas.")
             return True
         except Exception:
             return False
@@ -75,50 +341,338 @@ class UsuarioDAO(BaseDAO):
         consulta = "INSERT INTO Usuarios (nombre_usuario, tipo_usuario) VALUES (?, ?);"
         try:
             id_usuario = self._ejecutar_consulta(consulta, (nombre_usuario, tipo_usuario), es_escritura=True)
-            print(f"Usuario '{nombre_usuario}' insertado con ID: {id_usuario}")
+            _log.debug("Usuario '%s' insertado con ID: %s", nombre_usuario, id_usuario)
             return id_usuario
         except sqlite3.IntegrityError: 
-            print(f"Error: El usuario '{nombre_usuario}' ya existe.")
+            _log.warning("Error: El usuario '%s' ya existe.", nombre_usuario)
             return None
         except Exception as e:
-            print(f"Error al insertar usuario: {e}")
+            _log.error("Error al insertar usuario: %s", e)
             return None
 
-    def obtener_usuario_por_id(self, id_usuario):
+    def obtener_usuario_por_id(self, id_usuario, fabrica=None):
         consulta = "SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios WHERE id_usuario = ?;"
-        resultado = self._ejecutar_consulta(consulta, (id_usuario,))
+        resultado = self._ejecutar_consulta(consulta, (id_usuario,), fabrica=fabrica)
         return resultado[0] if resultado else None
 
-    def obtener_usuario_por_nombre(self, nombre_usuario):
+    def obtener_usuario_por_nombre(self, nombre_usuario, fabrica=None):
         consulta = "SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios WHERE nombre_usuario = ?;"
-        resultado = self._ejecutar_consulta(consulta, (nombre_usuario,))
+        resultado = self._ejecutar_consulta(consulta, (nombre_usuario,), fabrica=fabrica)
         return resultado[0] if resultado else None
 
-    def obtener_todos_los_usuarios(self):
+    def obtener_todos_los_usuarios(self, fabrica=None):
         consulta = "SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios;"
-        return self._ejecutar_consulta(consulta)
+        return self._ejecutar_consulta(consulta, fabrica=fabrica)
+
+    def iterar_usuarios(self, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        consulta = "SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios ORDER BY id_usuario;"
+        return self._iterar_consulta(consulta, tamaño_lote=tamaño_lote, fabrica=fabrica)
+
+    def insertar_usuarios_lote(self, filas):
+        # filas: (id_usuario, nombre_usuario, tipo_usuario) conservando el ID de origen; se omiten los que ya existan
+        with self._transaccion() as conexion:
+            # rowcount de executemany suma las filas insertadas (sin contar las de los triggers de VersionesDatos)
+            return conexion.executemany("INSERT INTO Usuarios (id_usuario, nombre_usuario, tipo_usuario) VALUES (?, ?, ?) ON CONFLICT DO NOTHING;", filas).rowcount
+
+    def insertar_usuarios_si_no_existen(self, filas):
+        # filas: (nombre_usuario, tipo_usuario); los nombres que ya existen se omiten
+        with self._transaccion() as conexion:
+            return conexion.executemany("INSERT OR IGNORE INTO Usuarios (nombre_usuario, tipo_usuario) VALUES (?, ?);", filas).rowcount
+
+    def obtener_pagina_usuarios(self, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        consulta = "SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios WHERE id_usuario > ? ORDER BY id_usuario LIMIT ?;"
+        return self._obtener_pagina(consulta, (cursor[0] if cursor else 0,), tamaño_pagina, (0,))
+
+    def obtener_usuarios_por_ids(self, ids_usuarios, fabrica=None):
+        ids_usuarios = list(dict.fromkeys(ids_usuarios))
+        filas = []
+        for inicio in range(0, len(ids_usuarios), MAX_PARAMETROS_CONSULTA):
+            ids_bloque = ids_usuarios[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+            marcadores = ", ".join("?" * len(ids_bloque))
+            consulta = f"SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios WHERE id_usuario IN ({marcadores});"
+            filas.extend(self._ejecutar_consulta(consulta, tuple(ids_bloque), fabrica=fabrica) or [])
+        return filas
 
 
 class ReseñaDAO(BaseDAO):
-    def insertar_reseña(self, id_juego, id_usuario, puntuacion, contenido="", origen_simulado_ip=""):
-        consulta = "INSERT INTO Reseñas (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip) VALUES (?, ?, ?, ?, ?);"
-        try:
-            id_reseña = self._ejecutar_consulta(consulta, (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip), es_escritura=True)
-            print(f"Reseña insertada con ID: {id_reseña} para Juego ID {id_juego} y Usuario ID {id_usuario}.")
-            return id_reseña
-        except sqlite3.IntegrityError as e:
-            if "UNIQUE constraint failed: Reseñas.id_juego, Reseñas.id_usuario" in str(e):
-                print(f"Advertencia: El usuario ID {id_usuario} ya ha reseñado el juego ID {id_juego}. Reseña duplicada rechazada por la base de datos.")
-            else:
-                print(f"Error de integridad al insertar reseña: {e}")
-            return None
-        except Exception as e:
-            print(f"Error general al insertar reseña: {e}")
-            return None
-
-    def obtener_reseñas_por_juego(self, id_juego):
+    def registrar_reseña(self, id_juego, id_usuario, puntuacion, contenido="", origen_simulado_ip=""):
+        # Inserción y actualización de la puntuación del juego en una sola transacción BEGIN IMMEDIATE.
+        # El duplicado lo detecta la restricción UNIQUE(id_juego, id_usuario): devuelve None sin lanzar error.
+        # La fecha se fija aquí (y no con el DEFAULT de la tabla) para sumar la reseña a los rollups de su día y hora.
+        consulta = ("INSERT INTO Reseñas (id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id_juego, id_usuario) DO NOTHING;")
+        fecha_reseña = _fecha_actual()
+        with self._transaccion() as conexion:
+            cursor = conexion.execute(consulta, (id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip))
+            if cursor.rowcount == 0:
+                _log.debug("Advertencia: El usuario ID %s ya ha reseñado el juego ID %s. Reseña duplicada rechazada por la base de datos.",
+                           id_usuario, id_juego)
+                return None
+            id_reseña = cursor.lastrowid
+            self._aplicar_deltas_juegos(conexion, [(id_juego, id_usuario, puntuacion, fecha_reseña)])
+        _log.debug("Reseña insertada con ID: %s para Juego ID %s y Usuario ID %s.", id_reseña, id_juego, id_usuario)
+        return id_reseña
+
+    def insertar_reseñas_lote(self, filas):
+        # filas: lista de (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip[, fecha_reseña]).
+        # Todo el lote va en una transacción: validación, executemany y un único ajuste de agregados por juego.
+        # Sin fecha_reseña (o vacía) se usa la fecha actual; las importaciones la pasan para conservar la original.
+        estados = [None] * len(filas)
+        if not filas:
+            return estados
+        fecha_reseña = _fecha_actual()
+
+        with self._transaccion() as conexion:
+            juegos_validos = self._ids_existentes(conexion, "Juegos", "id_juego", {fila[0] for fila in filas})
+            usuarios_validos = self._ids_existentes(conexion, "Usuarios", "id_usuario", {fila[1] for fila in filas})
+
+            usuarios_por_juego = {}
+            for id_juego, id_usuario, *_ in filas:
+                if id_juego in juegos_validos and id_usuario in usuarios_validos:
+                    usuarios_por_juego.setdefault(id_juego, set()).add(id_usuario)
+            ya_reseñadas = set()
+            for id_juego, usuarios in usuarios_por_juego.items():
+                usuarios = list(usuarios)
+                for inicio in range(0, len(usuarios), MAX_PARAMETROS_CONSULTA):
+                    bloque = usuarios[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+                    cursor = conexion.execute(
+                        f"SELECT id_juego, id_usuario FROM Reseñas WHERE id_juego = ? AND id_usuario IN ({', '.join('?' * len(bloque))});",
+                        (id_juego, *bloque))
+                    ya_reseñadas.update(cursor.fetchall())
+
+            aceptadas = []
+            for i, (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip, *fecha_original) in enumerate(filas):
+                fecha = _normalizar_fecha(fecha_original[0]) if fecha_original and fecha_original[0] else fecha_reseña
+                if (id_juego not in juegos_validos or id_usuario not in usuarios_validos or fecha is None
+                        or not isinstance(puntuacion, int) or not 1 <= puntuacion <= 10):
+                    estados[i] = RESEÑA_INVALIDA
+                elif (id_juego, id_usuario) in ya_reseñadas:
+                    estados[i] = RESEÑA_DUPLICADA
+                else:
+                    ya_reseñadas.add((id_juego, id_usuario))
+                    aceptadas.append((id_juego, id_usuario, puntuacion, contenido, fecha, origen_simulado_ip))
+                    estados[i] = RESEÑA_ACEPTADA
+
+            conexion.executemany(
+                "INSERT INTO Reseñas (id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id_juego, id_usuario) DO NOTHING;", aceptadas)
+            self._aplicar_deltas_juegos(conexion, ((fila[0], fila[1], fila[2], fila[4]) for fila in aceptadas))
+        return estados
+
+    def _ids_existentes(self, conexion, tabla, columna_id, ids):
+        existentes = set()
+        ids = list(ids)
+        for inicio in range(0, len(ids), MAX_PARAMETROS_CONSULTA):
+            bloque = ids[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+            cursor = conexion.execute(f"SELECT {columna_id} FROM {tabla} WHERE {columna_id} IN ({', '.join('?' * len(bloque))});", tuple(bloque))
+            existentes.update(fila[0] for fila in cursor.fetchall())
+        return existentes
+
+    def _aplicar_deltas_juegos(self, conexion, reseñas_aceptadas):
+        # Actualización incremental de los agregados de Juegos: coste independiente del número de reseñas.
+        # reseñas_aceptadas: iterable de (id_juego, id_usuario, puntuacion, fecha_reseña); se agrupa para tocar cada juego una sola vez.
+        reseñas_aceptadas = list(reseñas_aceptadas)
+        criticos = self._ids_criticos(conexion, {reseña[1] for reseña in reseñas_aceptadas})
+        deltas = {}
+        histogramas = {}
+        for id_juego, id_usuario, puntuacion, _ in reseñas_aceptadas:
+            # [cantidad, suma, cantidad_criticos, suma_criticos]; lo del público es la diferencia
+            delta = deltas.setdefault(id_juego, [0, 0, 0, 0])
+            delta[0] += 1
+            delta[1] += puntuacion
+            if id_usuario in criticos:
+                delta[2] += 1
+                delta[3] += puntuacion
+            histogramas.setdefault(id_juego, [0] * len(COLUMNAS_HISTOGRAMA))[puntuacion - 1] += 1
+        consulta = f'''
+            UPDATE Juegos SET
+                total_reseñas = total_reseñas + :cantidad,
+                puntuacion_acumulada = puntuacion_acumulada + :suma,
+                puntuacion_media = CAST(puntuacion_acumulada + :suma AS REAL) / (total_reseñas + :cantidad),
+                puntuacion_ponderada = {expresion_puntuacion_ponderada("puntuacion_acumulada + :suma", "total_reseñas + :cantidad")},
+                total_reseñas_criticos = total_reseñas_criticos + :cantidad_criticos,
+                puntuacion_acumulada_criticos = puntuacion_acumulada_criticos + :suma_criticos,
+                puntuacion_media_criticos = COALESCE(CAST(puntuacion_acumulada_criticos + :suma_criticos AS REAL)
+                                                     / NULLIF(total_reseñas_criticos + :cantidad_criticos, 0), 0.0),
+                total_reseñas_publico = total_reseñas_publico + :cantidad_publico,
+                puntuacion_acumulada_publico = puntuacion_acumulada_publico + :suma_publico,
+                puntuacion_media_publico = COALESCE(CAST(puntuacion_acumulada_publico + :suma_publico AS REAL)
+                                                    / NULLIF(total_reseñas_publico + :cantidad_publico, 0), 0.0)
+            WHERE id_juego = :id_juego;
+        '''
+        conexion.executemany(consulta, (
+            {'id_juego': id_juego, 'cantidad': cantidad, 'suma': suma,
+             'cantidad_criticos': cantidad_criticos, 'suma_criticos': suma_criticos,
+             'cantidad_publico': cantidad - cantidad_criticos, 'suma_publico': suma - suma_criticos}
+            for id_juego, (cantidad, suma, cantidad_criticos, suma_criticos) in deltas.items()
+        ))
+        conexion.executemany(_CONSULTA_SUMAR_HISTOGRAMA, ((id_juego, *conteos) for id_juego, conteos in histogramas.items()))
+        self._aplicar_deltas_rollups(conexion, ((id_juego, puntuacion, fecha) for id_juego, _, puntuacion, fecha in reseñas_aceptadas))
+
+    def _ids_criticos(self, conexion, ids_usuarios):
+        # Usuarios de tipo crítico entre ids_usuarios, leídos dentro de la transacción de escritura
+        criticos = set()
+        ids_usuarios = list(ids_usuarios)
+        for inicio in range(0, len(ids_usuarios), MAX_PARAMETROS_CONSULTA):
+            bloque = ids_usuarios[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+            cursor = conexion.execute(
+                f"SELECT id_usuario FROM Usuarios WHERE tipo_usuario = ? AND id_usuario IN ({', '.join('?' * len(bloque))});",
+                (TIPO_USUARIO_CRITICO, *bloque))
+            criticos.update(fila[0] for fila in cursor.fetchall())
+        return criticos
+
+    def _aplicar_deltas_rollups(self, conexion, reseñas):
+        # reseñas: iterable de (id_juego, puntuacion, fecha_reseña 'YYYY-MM-DD HH:MM:SS'); un upsert por juego y periodo
+        por_dia = {}
+        por_hora = {}
+        for id_juego, puntuacion, fecha_reseña in reseñas:
+            for rollup, periodo in ((por_dia, fecha_reseña[:10]), (por_hora, fecha_reseña[:13] + ":00")):
+                delta = rollup.setdefault((id_juego, periodo), [0, 0])
+                delta[0] += 1
+                delta[1] += puntuacion
+        for tabla, columna, rollup in (('ReseñasPorDia', 'dia', por_dia), ('ReseñasPorHora', 'hora', por_hora)):
+            conexion.executemany(_CONSULTA_SUMAR_ROLLUP.format(tabla=tabla, columna=columna),
+                                 ((id_juego, periodo, cantidad, suma) for (id_juego, periodo), (cantidad, suma) in rollup.items()))
+
+    def rellenar_rollups(self, tamaño_lote=TAMAÑO_LOTE_RELLENO_ROLLUPS):
+        # Suma a los rollups un bloque de reseñas anteriores a la migración 6 y avanza la marca de agua en la misma
+        # transacción: si el proceso se interrumpe, la siguiente llamada continúa donde quedó sin contar dos veces.
+        # Devuelve las reseñas procesadas (0 cuando el relleno ha terminado).
+        with self._transaccion() as conexion:
+            marca_agua, limite = self._estado_relleno_rollups(conexion)
+            if marca_agua >= limite:
+                return 0
+            filas = conexion.execute(
+                "SELECT id_reseña, id_juego, puntuacion, fecha_reseña FROM Reseñas "
+                "WHERE id_reseña > ? AND id_reseña <= ? AND fecha_reseña IS NOT NULL ORDER BY id_reseña LIMIT ?;",
+                (marca_agua, limite, tamaño_lote)).fetchall()
+            nueva_marca = filas[-1][0] if filas else limite
+            self._aplicar_deltas_rollups(conexion, (fila[1:] for fila in filas))
+            conexion.execute("UPDATE Metadatos SET valor = ? WHERE clave = 'rollups_marca_agua';", (nueva_marca,))
+        return len(filas)
+
+    def obtener_estado_rollups(self):
+        # (marca_agua, limite_relleno): el relleno está completo cuando marca_agua >= limite_relleno
+        with self._obtener_pool().conexion() as conexion:
+            return self._estado_relleno_rollups(conexion)
+
+    def _estado_relleno_rollups(self, conexion):
+        valores = dict(conexion.execute(
+            "SELECT clave, valor FROM Metadatos WHERE clave IN ('rollups_marca_agua', 'rollups_limite_relleno');").fetchall())
+        return valores.get('rollups_marca_agua', 0), valores.get('rollups_limite_relleno', 0)
+
+    def obtener_rollups(self, id_juego, granularidad, desde, hasta):
+        # [(periodo, total_reseñas, puntuacion_acumulada)] con desde <= periodo <= hasta, por la clave primaria:
+        # el coste depende del número de periodos con reseñas, no del de reseñas
+        tabla, columna = {'dia': ('ReseñasPorDia', 'dia'), 'hora': ('ReseñasPorHora', 'hora')}[granularidad]
+        consulta = (f"SELECT {columna}, total_reseñas, puntuacion_acumulada FROM {tabla} "
+                    f"WHERE id_juego = ? AND {columna} BETWEEN ? AND ? ORDER BY {columna};")
+        return self._ejecutar_consulta(consulta, (id_juego, desde, hasta)) or []
+
+    def obtener_reseñas_por_juego(self, id_juego, fabrica=None):
         consulta = "SELECT id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip FROM Reseñas WHERE id_juego = ?;"
-        return self._ejecutar_consulta(consulta, (id_juego,))
+        return self._ejecutar_consulta(consulta, (id_juego,), fabrica=fabrica)
+
+    def iterar_reseñas_por_juego(self, id_juego, orden='recientes', tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        orden_sql, _, _ = ORDENES_RESEÑAS[orden]
+        consulta = (f"SELECT id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip "
+                    f"FROM Reseñas WHERE id_juego = ? ORDER BY {orden_sql};")
+        return self._iterar_consulta(consulta, (id_juego,), tamaño_lote, fabrica)
+
+    def iterar_puntuaciones_por_juego(self, id_juego, tamaño_lote=TAMAÑO_LOTE_LECTURA):
+        # (id_reseña, id_juego, id_usuario, puntuacion) de la más antigua a la más reciente, solo desde idx_reseñas_juego_fecha
+        consulta = ("SELECT id_reseña, id_juego, id_usuario, puntuacion FROM Reseñas WHERE id_juego = ? "
+                    "ORDER BY fecha_reseña, id_reseña;")
+        return self._iterar_consulta(consulta, (id_juego,), tamaño_lote)
+
+    def iterar_reseñas(self, id_juego=None, id_usuario=None, desde=None, hasta=None, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        # Todas las reseñas, o las que cumplan los filtros, en orden de id_reseña y en streaming.
+        # desde/hasta son días 'YYYY-MM-DD' incluidos (también admiten fecha y hora completas).
+        condiciones, parametros = [], []
+        if id_juego is not None:
+            condiciones.append("id_juego = ?")
+            parametros.append(id_juego)
+        if id_usuario is not None:
+            condiciones.append("id_usuario = ?")
+            parametros.append(id_usuario)
+        if desde is not None:
+            condiciones.append("fecha_reseña >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            # Un día suelto abarca hasta su último segundo
+            condiciones.append("fecha_reseña <= ?" if len(hasta) > 10 else "fecha_reseña < date(?, '+1 day')")
+            parametros.append(hasta)
+        filtro = f"WHERE {' AND '.join(condiciones)} " if condiciones else ""
+        consulta = (f"SELECT id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip "
+                    f"FROM Reseñas {filtro}ORDER BY id_reseña;")
+        return self._iterar_consulta(consulta, parametros, tamaño_lote, fabrica)
+
+    def obtener_pagina_reseñas_por_juego(self, id_juego, orden='recientes', cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        # Paginación por cursor (keyset): el coste de cada página no depende de cuántas se hayan leído antes
+        orden_sql, comparacion, columnas_cursor = ORDENES_RESEÑAS[orden]
+        columnas = ("id_reseña", "id_juego", "id_usuario", "puntuacion", "contenido", "fecha_reseña", "origen_simulado_ip")
+        consulta = f"SELECT {', '.join(columnas)} FROM Reseñas WHERE id_juego = ?"
+        parametros = (id_juego,)
+        if cursor is not None:
+            consulta += f" AND ({', '.join(columnas_cursor)}) {comparacion} (?, ?)"
+            parametros += tuple(cursor)
+        consulta += f" ORDER BY {orden_sql} LIMIT ?;"
+        return self._obtener_pagina(consulta, parametros, tamaño_pagina, tuple(columnas.index(c) for c in columnas_cursor))
+
+    def obtener_reseñas_por_usuario(self, id_usuario, fabrica=None):
+        consulta = "SELECT id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip FROM Reseñas WHERE id_usuario = ?;"
+        return self._ejecutar_consulta(consulta, (id_usuario,), fabrica=fabrica)
+
+    def obtener_puntuaciones_por_usuario(self, id_usuario):
+        # [(id_reseña, id_juego, puntuacion)] ordenadas por juego, solo desde idx_reseñas_usuario
+        consulta = "SELECT id_reseña, id_juego, puntuacion FROM Reseñas WHERE id_usuario = ? ORDER BY id_juego;"
+        return self._ejecutar_consulta(consulta, (id_usuario,)) or []
+
+    def obtener_reseñas_con_usuario_por_juego(self, id_juego, fabrica=None):
+        # Reseñas del juego junto con nombre_usuario y tipo_usuario en una sola consulta
+        consulta = '''
+            SELECT r.id_reseña, r.id_juego, r.id_usuario, r.puntuacion, r.contenido, r.fecha_reseña, r.origen_simulado_ip,
+                   u.nombre_usuario, u.tipo_usuario
+            FROM Reseñas r
+            LEFT JOIN Usuarios u ON u.id_usuario = r.id_usuario
+            WHERE r.id_juego = ?;
+        '''
+        return self._ejecutar_consulta(consulta, (id_juego,), fabrica=fabrica)
+
+    def buscar_reseñas(self, texto, id_juego=None, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        # Búsqueda de texto completo ordenada por BM25 (rank: menor es más relevante) con paginación por cursor
+        # sobre (rank, id_reseña). Devuelve (filas, siguiente_cursor); cada fila lleva el fragmento resaltado
+        # en lugar del contenido completo. Si otra escritura cambia las estadísticas del índice entre páginas,
+        # el orden puede variar ligeramente, pero nunca se repite una reseña ya devuelta con el mismo rank.
+        expresion = _expresion_busqueda(texto)
+        if expresion is None:
+            return [], None
+        consulta = '''
+            SELECT r.id_reseña, r.id_juego, r.id_usuario, r.puntuacion,
+                   snippet(ReseñasFTS, 0, ?, ?, '…', ?), r.fecha_reseña, ReseñasFTS.rank
+            FROM ReseñasFTS
+            JOIN Reseñas r ON r.id_reseña = ReseñasFTS.rowid
+            WHERE ReseñasFTS MATCH ?
+        '''
+        parametros = (MARCA_INICIO_COINCIDENCIA, MARCA_FIN_COINCIDENCIA, TOKENS_FRAGMENTO, expresion)
+        if id_juego is not None:
+            consulta += " AND r.id_juego = ?"
+            parametros += (id_juego,)
+        if cursor is not None:
+            consulta += " AND (ReseñasFTS.rank, r.id_reseña) > (?, ?)"
+            parametros += tuple(cursor)
+        consulta += " ORDER BY ReseñasFTS.rank, r.id_reseña LIMIT ?;"
+        return self._obtener_pagina(consulta, parametros, tamaño_pagina, (6, 0))
+
+    def reconstruir_indice_busqueda(self):
+        # Vuelve a indexar todo Reseñas.contenido (p. ej. tras cargas hechas con los triggers desactivados)
+        with self._transaccion() as conexion:
+            conexion.execute("INSERT INTO ReseñasFTS (ReseñasFTS) VALUES ('rebuild');")
+
+    def optimizar_indice_busqueda(self):
+        # Fusiona los segmentos del índice FTS5 en uno: consultas más rápidas tras muchas inserciones
+        with self._transaccion() as conexion:
+            conexion.execute("INSERT INTO ReseñasFTS (ReseñasFTS) VALUES ('optimize');")
 
     def verificar_existencia_reseña(self, id_juego, id_usuario):
         consulta = "SELECT COUNT(*) FROM Reseñas WHERE id_juego = ? AND id_usuario = ?;"
@@ -154,16 +708,16 @@ if __name__ == '__main__':
         # --- Insertar reseñas ---
         print("\n--- Insertando Reseñas ---")
         # Reseña exitosa
-        reseña_dao.insertar_reseña(id_juego1, id_usuario1, 9, "Excelente juego, mucha profundidad.")
+        reseña_dao.registrar_reseña(id_juego1, id_usuario1, 9, "Excelente juego, mucha profundidad.")
         # Intentar insertar la misma reseña para el mismo usuario/juego (debería fallar por UNIQUE constraint)
-        reseña_dao.insertar_reseña(id_juego1, id_usuario1, 5, "Esta reseña es duplicada!", "192.168.1.100")
+        reseña_dao.registrar_reseña(id_juego1, id_usuario1, 5, "Esta reseña es duplicada!", "192.168.1.100")
 
         if id_usuario2:
-            reseña_dao.insertar_reseña(id_juego1, id_usuario2, 10, "Obra maestra!", "10.0.0.5")
-            reseña_dao.insertar_reseña(id_juego2, id_usuario2, 7, "Interesante, pero le falta pulido.", "10.0.0.5")
+            reseña_dao.registrar_reseña(id_juego1, id_usuario2, 10, "Obra maestra!", "10.0.0.5")
+            reseña_dao.registrar_reseña(id_juego2, id_usuario2, 7, "Interesante, pero le falta pulido.", "10.0.0.5")
 
         if id_usuario3:
-            reseña_dao.insertar_reseña(id_juego1, id_usuario3, 8, "Muy bueno, lo recomiendo.", "172.16.0.1")
+            reseña_dao.registrar_reseña(id_juego1, id_usuario3, 8, "Muy bueno, lo recomiendo.", "172.16.0.1")
 
 
         #Obtener y mostrar datos
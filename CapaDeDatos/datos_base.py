@@ -0,0 +1,44 @@
+import json
+import os
+
+from .daos import JuegoDAO, UsuarioDAO
+from .metricas import obtener_logger
+
+# Juegos y usuarios iniciales, definidos en datos_base.json. Se insertan en una sola transacción con INSERT OR IGNORE
+# y se anota en Metadatos la versión del archivo: mientras coincida, sembrar_datos_base solo hace una consulta.
+# Para añadir o cambiar datos base, edita el archivo y sube su "version".
+
+RUTA_DATOS_BASE = os.path.join(os.path.dirname(__file__), 'datos_base.json')
+CLAVE_VERSION_DATOS_BASE = 'datos_base_version'
+
+_datos_cargados = {}
+_log = obtener_logger(__name__)
+
+
+def cargar_datos_base(ruta=RUTA_DATOS_BASE):
+    # Se lee una vez por proceso
+    if ruta not in _datos_cargados:
+        with open(ruta, encoding="utf-8") as archivo:
+            _datos_cargados[ruta] = json.load(archivo)
+    return _datos_cargados[ruta]
+
+def sembrar_datos_base(juego_dao=None, usuario_dao=None, ruta=RUTA_DATOS_BASE):
+    # Devuelve True si ha aplicado el archivo; False si la base de datos ya tenía esa versión de los datos base
+    juego_dao = juego_dao or JuegoDAO()
+    usuario_dao = usuario_dao or UsuarioDAO()
+    datos = cargar_datos_base(ruta)
+    version = datos['version']
+    if juego_dao.obtener_metadato(CLAVE_VERSION_DATOS_BASE) == version:
+        return False
+
+    with juego_dao._transaccion():
+        # Otro proceso pudo sembrar mientras esperábamos el lock de escritura
+        if juego_dao.obtener_metadato(CLAVE_VERSION_DATOS_BASE) == version:
+            return False
+        juegos = juego_dao.insertar_juegos_si_no_existen(
+            [(juego['nombre'], juego.get('descripcion', "")) for juego in datos['juegos']])
+        usuarios = usuario_dao.insertar_usuarios_si_no_existen(
+            [(usuario['nombre_usuario'], usuario['tipo_usuario']) for usuario in datos['usuarios']])
+        juego_dao.guardar_metadato(CLAVE_VERSION_DATOS_BASE, version)
+    _log.info("Datos base (versión %s) aplicados: %s juegos y %s usuarios nuevos.", version, juegos, usuarios)
+    return True
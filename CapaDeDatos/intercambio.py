@@ -0,0 +1,196 @@
+import collections
+import csv
+import gzip
+import itertools
+import json
+import os
+import time
+
+from .daos import COLUMNAS_JUEGO, RESEÑA_ACEPTADA, RESEÑA_INVALIDA, JuegoDAO, ReseñaDAO, UsuarioDAO
+from .metricas import obtener_logger
+from .particiones import JuegoDAOParticionado, ReseñaDAOParticionado, UsuarioDAOParticionado, obtener_particiones
+
+# Exportación e importación masiva en CSV o JSONL (opcionalmente con gzip) con memoria constante:
+# las filas se leen de la base de datos con fetchmany y del archivo línea a línea, nunca enteras.
+# Las interfaces de línea de comandos son exportar.py e importar.py, junto a main.py.
+
+FORMATOS = ('csv', 'jsonl')
+TAMAÑO_BLOQUE_IMPORTACION = 1000 # filas por transacción al importar
+INTERVALO_PROGRESO = 5.0 # segundos entre mensajes de progreso
+
+COLUMNAS_EXPORTACION = {
+    'reseñas': ("id_reseña", "id_juego", "id_usuario", "puntuacion", "contenido", "fecha_reseña", "origen_simulado_ip"),
+    'juegos': tuple(columna.strip() for columna in COLUMNAS_JUEGO.split(",")),
+    'usuarios': ("id_usuario", "nombre_usuario", "tipo_usuario"),
+}
+TABLAS = tuple(COLUMNAS_EXPORTACION)
+
+# Columnas que se leen al importar, en el orden de los métodos *_lote de los DAO, y si son enteras (en CSV todo
+# llega como texto). De juegos solo se importa la identidad: sus agregados los recalculan las reseñas importadas.
+COLUMNAS_IMPORTACION = {
+    'reseñas': (("id_juego", True), ("id_usuario", True), ("puntuacion", True), ("contenido", False),
+                ("origen_simulado_ip", False), ("fecha_reseña", False)),
+    'juegos': (("id_juego", True), ("nombre", False), ("descripcion", False)),
+    'usuarios': (("id_usuario", True), ("nombre_usuario", False), ("tipo_usuario", False)),
+}
+
+_log = obtener_logger(__name__)
+
+
+def detectar_formato(ruta, formato=None, comprimir=None):
+    # (formato, comprimir) a partir de la extensión cuando no se indican: 'reseñas.jsonl.gz' -> ('jsonl', True)
+    nombre = ruta.lower()
+    if comprimir is None:
+        comprimir = nombre.endswith(".gz")
+    if nombre.endswith(".gz"):
+        nombre = nombre[:-3]
+    if formato is None:
+        formato = 'jsonl' if nombre.endswith((".jsonl", ".ndjson", ".json")) else 'csv'
+    return formato, comprimir
+
+def abrir_archivo(ruta, modo, comprimir):
+    # newline='' lo exige el módulo csv; en JSONL no cambia nada
+    if comprimir:
+        return gzip.open(ruta, modo + "t", encoding="utf-8", newline="")
+    return open(ruta, modo, encoding="utf-8", newline="")
+
+def _dao(tabla):
+    if obtener_particiones():
+        return {'reseñas': ReseñaDAOParticionado, 'juegos': JuegoDAOParticionado, 'usuarios': UsuarioDAOParticionado}[tabla]()
+    return {'reseñas': ReseñaDAO, 'juegos': JuegoDAO, 'usuarios': UsuarioDAO}[tabla]()
+
+def _iterar_tabla(tabla, filtros):
+    if tabla == 'reseñas':
+        return _dao(tabla).iterar_reseñas(**filtros)
+    if any(valor is not None for valor in filtros.values()):
+        raise ValueError("Los filtros por juego, usuario o fechas solo se aplican a la tabla de reseñas.")
+    return _dao(tabla).iterar_juegos() if tabla == 'juegos' else _dao(tabla).iterar_usuarios()
+
+def exportar(ruta, tabla='reseñas', formato=None, comprimir=None, id_juego=None, id_usuario=None, desde=None, hasta=None):
+    # Se escribe en un archivo temporal que se renombra al terminar: una exportación interrumpida no deja un
+    # archivo a medias con el nombre final. La lectura es una sola consulta, así que ve una instantánea coherente.
+    formato, comprimir = detectar_formato(ruta, formato, comprimir)
+    columnas = COLUMNAS_EXPORTACION[tabla]
+    filas = _iterar_tabla(tabla, {'id_juego': id_juego, 'id_usuario': id_usuario, 'desde': desde, 'hasta': hasta})
+    ruta_temporal = ruta + ".parcial"
+    inicio = time.perf_counter()
+    total = 0
+    try:
+        with abrir_archivo(ruta_temporal, "w", comprimir) as archivo:
+            if formato == 'csv':
+                escritor = csv.writer(archivo)
+                escritor.writerow(columnas)
+                escribir = escritor.writerow
+            else:
+                escribir = lambda fila: archivo.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + "\n")
+            for fila in filas:
+                escribir(fila)
+                total += 1
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        filas.close()
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+
+    segundos = time.perf_counter() - inicio
+    _log.info("Exportadas %s filas de %s a '%s' (%s%s) en %.2fs (%.0f filas/s, %.1f MB).", total, tabla, ruta, formato,
+              ' + gzip' if comprimir else '', segundos, total / segundos if segundos > 0 else 0, os.path.getsize(ruta) / 1_048_576)
+    return total
+
+
+def _convertir(valor, entero):
+    if not entero:
+        return "" if valor is None else valor
+    if not isinstance(valor, str):
+        return valor # JSON ya trae los números con su tipo
+    try:
+        return int(valor)
+    except ValueError:
+        return valor # la fila se rechaza como inválida al insertarla
+
+def _leer_filas(archivo, formato, tabla):
+    columnas = COLUMNAS_IMPORTACION[tabla]
+    if formato == 'csv':
+        registros = csv.DictReader(archivo)
+    else:
+        registros = (json.loads(linea) for linea in archivo if linea.strip())
+    for registro in registros:
+        yield tuple(_convertir(registro.get(columna), entero) for columna, entero in columnas)
+
+def ruta_punto_control(ruta):
+    return ruta + ".punto_control"
+
+def _leer_punto_control(ruta_control, tabla):
+    if not os.path.exists(ruta_control):
+        return 0
+    with open(ruta_control, encoding="utf-8") as archivo:
+        punto_control = json.load(archivo)
+    if punto_control.get('tabla') != tabla:
+        raise ValueError(f"El punto de control '{ruta_control}' es de la tabla {punto_control.get('tabla')}, no de {tabla}.")
+    return punto_control['filas']
+
+def _guardar_punto_control(ruta_control, tabla, filas):
+    # os.replace es atómico: tras una caída queda el punto de control anterior o el nuevo, nunca uno a medias
+    ruta_temporal = ruta_control + ".tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as archivo:
+        json.dump({'tabla': tabla, 'filas': filas}, archivo)
+    os.replace(ruta_temporal, ruta_control)
+
+def _insertar_bloque(tabla, bloque, contadores):
+    if tabla == 'reseñas':
+        estados = _dao(tabla).insertar_reseñas_lote(bloque)
+        contadores['insertadas'] += estados.count(RESEÑA_ACEPTADA)
+        contadores['invalidas'] += estados.count(RESEÑA_INVALIDA)
+        contadores['omitidas'] += len(bloque) - estados.count(RESEÑA_ACEPTADA) - estados.count(RESEÑA_INVALIDA)
+        return
+    dao = _dao(tabla)
+    insertadas = dao.insertar_juegos_lote(bloque) if tabla == 'juegos' else dao.insertar_usuarios_lote(bloque)
+    contadores['insertadas'] += insertadas
+    contadores['omitidas'] += len(bloque) - insertadas
+
+def importar(ruta, tabla='reseñas', formato=None, comprimir=None, tamaño_bloque=TAMAÑO_BLOQUE_IMPORTACION, reanudar=True):
+    # Cada bloque es una transacción (executemany). Tras confirmarlo se guarda en '<ruta>.punto_control' cuántas
+    # filas del archivo están ya procesadas; al relanzar se saltan sin tocar la base de datos. Si la caída ocurre
+    # entre el commit y el punto de control, ese bloque se repite sin efecto: las reseñas salen como duplicadas
+    # y los juegos y usuarios ya existentes se omiten. Entre entornos se cargan juegos, usuarios y, después, reseñas.
+    formato, comprimir = detectar_formato(ruta, formato, comprimir)
+    ruta_control = ruta_punto_control(ruta)
+    saltadas = _leer_punto_control(ruta_control, tabla) if reanudar else 0
+    if saltadas:
+        _log.info("Reanudando la importación de '%s' tras %s filas ya procesadas.", ruta, saltadas)
+
+    contadores = collections.Counter()
+    procesadas = saltadas
+    inicio = ultimo_progreso = time.perf_counter()
+    with abrir_archivo(ruta, "r", comprimir) as archivo:
+        filas = _leer_filas(archivo, formato, tabla)
+        collections.deque(itertools.islice(filas, saltadas), maxlen=0)
+        while True:
+            bloque = list(itertools.islice(filas, tamaño_bloque))
+            if not bloque:
+                break
+            _insertar_bloque(tabla, bloque, contadores)
+            procesadas += len(bloque)
+            _guardar_punto_control(ruta_control, tabla, procesadas)
+            if time.perf_counter() - ultimo_progreso >= INTERVALO_PROGRESO:
+                ultimo_progreso = time.perf_counter()
+                _log.info("Importación de %s: %s filas procesadas (%.0f filas/s).",
+                          tabla, procesadas, (procesadas - saltadas) / (ultimo_progreso - inicio))
+    if os.path.exists(ruta_control):
+        os.remove(ruta_control)
+
+    segundos = time.perf_counter() - inicio
+    total = procesadas - saltadas
+    resumen = {
+        'total': total,
+        'insertadas': contadores['insertadas'],
+        'omitidas': contadores['omitidas'],
+        'invalidas': contadores['invalidas'],
+        'segundos': segundos,
+        'filas_por_segundo': total / segundos if segundos > 0 else 0.0,
+    }
+    _log.info("Importadas %s filas de %s desde '%s' (%s insertadas, %s ya existentes, %s inválidas) en %.2fs (%.0f filas/s).",
+              resumen['total'], tabla, ruta, resumen['insertadas'], resumen['omitidas'], resumen['invalidas'],
+              segundos, resumen['filas_por_segundo'])
+    return resumen
@@ -0,0 +1,78 @@
+import argparse
+import time
+
+from .conexion_bd import crear_tablas
+from .daos import JuegoDAO, ReseñaDAO, TAMAÑO_LOTE_RELLENO_ROLLUPS
+
+# Tareas de mantenimiento de los datos derivados de Reseñas.
+# Uso: python -m CapaDeDatos.mantenimiento histogramas [--reparar]
+#      python -m CapaDeDatos.mantenimiento rollups [--tamaño-lote N]
+#      python -m CapaDeDatos.mantenimiento puntuaciones [--juego ID]
+
+
+def verificar_histogramas(reparar=False):
+    juego_dao = JuegoDAO()
+    discrepancias = juego_dao.verificar_histogramas()
+    if not discrepancias:
+        print("Histogramas correctos: coinciden con las reseñas de todos los juegos.")
+        return discrepancias
+    for id_juego, guardados, reales in discrepancias:
+        print(f"Juego ID {id_juego}: histograma {list(guardados)}, reseñas {list(reales)}")
+    print(f"{len(discrepancias)} histogramas no coinciden con las reseñas.")
+    if reparar:
+        for id_juego, _, _ in discrepancias:
+            juego_dao.reconstruir_histogramas(id_juego)
+        restantes = juego_dao.verificar_histogramas()
+        print("Histogramas reparados." if not restantes else f"Quedan {len(restantes)} histogramas sin reparar.")
+    return discrepancias
+
+
+def rellenar_rollups(tamaño_lote=TAMAÑO_LOTE_RELLENO_ROLLUPS):
+    # Cada bloque se confirma junto con la marca de agua: se puede interrumpir y relanzar sin contar dos veces
+    reseña_dao = ReseñaDAO()
+    total = 0
+    while True:
+        procesadas = reseña_dao.rellenar_rollups(tamaño_lote)
+        if not procesadas:
+            break
+        total += procesadas
+        marca_agua, limite = reseña_dao.obtener_estado_rollups()
+        print(f"Relleno de rollups: {total} reseñas procesadas (hasta la reseña ID {marca_agua} de {limite}).")
+    print(f"Rollups al día ({total} reseñas añadidas en esta ejecución).")
+    return total
+
+
+def recalcular_puntuaciones(id_juego=None):
+    # Totales, medias, puntuación ponderada y agregados de críticos/público recalculados desde Reseñas
+    inicio = time.perf_counter()
+    recalculado = JuegoDAO().recalcular_puntuaciones(id_juego)
+    if recalculado:
+        print(f"Recalculado en {time.perf_counter() - inicio:.2f} segundos.")
+    return recalculado
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos de reseñas.")
+    subparsers = parser.add_subparsers(dest="tarea", required=True)
+
+    histogramas = subparsers.add_parser("histogramas", help="Verifica JuegoHistograma contra Reseñas.")
+    histogramas.add_argument("--reparar", action="store_true", help="Reconstruye los histogramas que no coincidan.")
+
+    rollups = subparsers.add_parser("rollups", help="Suma a los rollups por día/hora las reseñas anteriores a su creación.")
+    rollups.add_argument("--tamaño-lote", type=int, default=TAMAÑO_LOTE_RELLENO_ROLLUPS, help="Reseñas por transacción.")
+
+    puntuaciones = subparsers.add_parser("puntuaciones", help="Recalcula los agregados de Juegos (incluidos críticos/público).")
+    puntuaciones.add_argument("--juego", type=int, help="Solo el juego con este ID.")
+
+    argumentos = parser.parse_args(argumentos)
+    crear_tablas()
+    if argumentos.tarea == "histogramas":
+        verificar_histogramas(argumentos.reparar)
+    elif argumentos.tarea == "rollups":
+        rellenar_rollups(argumentos.tamaño_lote)
+    elif argumentos.tarea == "puntuaciones":
+        recalcular_puntuaciones(argumentos.juego)
+
+
+if __name__ == '__main__':
+    main()
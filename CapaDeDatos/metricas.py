@@ -0,0 +1,385 @@
+import atexit
+import bisect
+import copy
+import functools
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+# Instrumentación de rendimiento: un registro de métricas en memoria (contadores e histogramas de latencia con
+# p50/p95/p99) que se consulta con instantanea() o se vuelca en el formato de texto de Prometheus, y el logging de
+# la aplicación (logger 'resenas'), que pasa por una cola: quien registra solo formatea y encola el mensaje; un hilo
+# aparte lo escribe. Las métricas son por proceso. Se desactivan con RESENAS_METRICAS=0; el nivel de los mensajes
+# se elige con RESENAS_NIVEL_LOG (DEBUG, INFO, WARNING, ERROR).
+
+METRICAS_ACTIVADAS = os.environ.get('RESENAS_METRICAS', '1') == '1'
+NIVEL_LOG = os.environ.get('RESENAS_NIVEL_LOG', 'INFO').upper()
+NOMBRE_LOGGER = 'resenas'
+FORMATO_LOG = '%(message)s'
+INTERVALO_LOGGING = 0.05 # segundos que el hilo de logging acumula mensajes antes de escribirlos
+
+# Límites superiores de las cubetas, en segundos: de 10 µs a ~10 s multiplicando por √2. El percentil se interpola
+# dentro de su cubeta, así que el error es como mucho el ancho de la cubeta (~41 % del valor, mucho menos en la práctica).
+LIMITES_HISTOGRAMA = tuple(round(0.00001 * 2 ** (i / 2), 9) for i in range(41))
+
+# Métricas que registran los DAOs, el pool y GestorResenas; el texto es el HELP del volcado de Prometheus
+DESCRIPCIONES = {
+    'resenas_consulta_segundos': "Duración de cada sentencia SQL de los DAOs, por tipo de sentencia y tabla.",
+    'resenas_consulta_errores_total': "Sentencias SQL de los DAOs que terminaron en error.",
+    'resenas_transaccion_segundos': "Duración de las transacciones de escritura, de BEGIN a COMMIT o ROLLBACK.",
+    'resenas_espera_bloqueo_segundos': "Tiempo de espera para adquirir cada lock (de hilos o el de escritura de SQLite).",
+    'resenas_operacion_segundos': "Duración de las operaciones de GestorResenas.",
+    'resenas_operacion_errores_total': "Operaciones de GestorResenas que terminaron con una excepción.",
+    'resenas_envios_total': "Envíos de reseñas individuales por resultado.",
+}
+
+
+class Histograma:
+    def __init__(self, limites=LIMITES_HISTOGRAMA):
+        self.limites = limites
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.cubetas = [0] * (len(self.limites) + 1) # la última es +Inf
+            self.total = 0
+            self.suma = 0.0
+            self.maximo = 0.0
+
+    def observar(self, segundos):
+        cubeta = bisect.bisect_left(self.limites, segundos)
+        with self._lock:
+            self.cubetas[cubeta] += 1
+            self.total += 1
+            self.suma += segundos
+            if segundos > self.maximo:
+                self.maximo = segundos
+
+    def _percentil(self, cubetas, total, maximo, p):
+        # Interpolación lineal dentro de la cubeta que contiene la observación p * total
+        objetivo = p * total
+        acumulado = 0
+        for i, cantidad in enumerate(cubetas):
+            if cantidad and acumulado + cantidad >= objetivo:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = min(self.limites[i], maximo) if i < len(self.limites) else maximo
+                return inferior + (superior - inferior) * (objetivo - acumulado) / cantidad
+            acumulado += cantidad
+        return maximo
+
+    def instantanea(self):
+        with self._lock:
+            cubetas, total, suma, maximo = list(self.cubetas), self.total, self.suma, self.maximo
+        return {
+            'total': total,
+            'suma': suma,
+            'media': suma / total if total else 0.0,
+            'p50': self._percentil(cubetas, total, maximo, 0.50) if total else 0.0,
+            'p95': self._percentil(cubetas, total, maximo, 0.95) if total else 0.0,
+            'p99': self._percentil(cubetas, total, maximo, 0.99) if total else 0.0,
+            'maximo': maximo,
+            'cubetas': cubetas,
+        }
+
+
+def _clave(nombre, etiquetas):
+    etiquetas = tuple(etiquetas.items())
+    return nombre, etiquetas if len(etiquetas) < 2 else tuple(sorted(etiquetas))
+
+def _texto_etiquetas(etiquetas, extra=()):
+    pares = [*etiquetas, *extra]
+    if not pares:
+        return ""
+    escapar = lambda valor: str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{nombre}="{escapar(valor)}"' for nombre, valor in pares) + "}"
+
+
+class RegistroMetricas:
+    def __init__(self, activado=METRICAS_ACTIVADAS, limites=LIMITES_HISTOGRAMA):
+        self.activado = activado
+        self.limites = limites
+        self._contadores = {} # (nombre, etiquetas) -> valor
+        self._histogramas = {} # (nombre, etiquetas) -> Histograma
+        self._lock = threading.Lock()
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        if not self.activado:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def histograma(self, nombre, **etiquetas):
+        # El mismo objeto durante toda la vida del registro: se puede guardar para no buscarlo en cada observación
+        clave = _clave(nombre, etiquetas)
+        histograma = self._histogramas.get(clave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(clave, Histograma(self.limites))
+        return histograma
+
+    def observar(self, nombre, segundos, **etiquetas):
+        if self.activado:
+            self.histograma(nombre, **etiquetas).observar(segundos)
+
+    def medir(self, nombre, **etiquetas):
+        # with registro.medir('nombre', etiqueta=valor): ... registra la duración del bloque
+        return _Cronometro(self.histograma(nombre, **etiquetas)) if self.activado else _CRONOMETRO_INACTIVO
+
+    def reiniciar(self):
+        # Pone todo a cero conservando los histogramas (los que se guardaron siguen registrando)
+        with self._lock:
+            self._contadores.clear()
+            histogramas = list(self._histogramas.values())
+        for histograma in histogramas:
+            histograma.reiniciar()
+
+    def instantanea(self):
+        # {'contadores': {nombre: {etiquetas: valor}}, 'histogramas': {nombre: {etiquetas: {total, p50, p95, p99, ...}}}}
+        # con las etiquetas como 'clave=valor,clave=valor' ('' si no tiene) y las latencias en segundos
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = dict(self._histogramas)
+        resultado = {'contadores': {}, 'histogramas': {}}
+        for (nombre, etiquetas), valor in sorted(contadores.items()):
+            resultado['contadores'].setdefault(nombre, {})[",".join(f"{k}={v}" for k, v in etiquetas)] = valor
+        for (nombre, etiquetas), histograma in sorted(histogramas.items(), key=lambda par: par[0]):
+            datos = histograma.instantanea()
+            del datos['cubetas']
+            resultado['histogramas'].setdefault(nombre, {})[",".join(f"{k}={v}" for k, v in etiquetas)] = datos
+        return resultado
+
+    def texto_prometheus(self):
+        # Formato de exposición de texto de Prometheus (version 0.0.4); las cubetas son acumuladas, como exige el formato
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted(self._histogramas.items(), key=lambda par: par[0])
+        lineas = []
+        anterior = None
+        for (nombre, etiquetas), valor in contadores:
+            if nombre != anterior:
+                lineas.append(f"# HELP {nombre} {DESCRIPCIONES.get(nombre, nombre)}")
+                lineas.append(f"# TYPE {nombre} counter")
+                anterior = nombre
+            lineas.append(f"{nombre}{_texto_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), histograma in histogramas:
+            if nombre != anterior:
+                lineas.append(f"# HELP {nombre} {DESCRIPCIONES.get(nombre, nombre)}")
+                lineas.append(f"# TYPE {nombre} histogram")
+                anterior = nombre
+            datos = histograma.instantanea()
+            acumulado = 0
+            for limite, cantidad in zip((*histograma.limites, "+Inf"), datos['cubetas']):
+                acumulado += cantidad
+                lineas.append(f"{nombre}_bucket{_texto_etiquetas(etiquetas, (('le', limite),))} {acumulado}")
+            lineas.append(f"{nombre}_sum{_texto_etiquetas(etiquetas)} {datos['suma']}")
+            lineas.append(f"{nombre}_count{_texto_etiquetas(etiquetas)} {datos['total']}")
+        return "\n".join(lineas) + "\n"
+
+    def _reiniciar_tras_fork(self):
+        # Un lock que otro hilo tenía en el momento del fork quedaría bloqueado para siempre en el hijo
+        self._lock = threading.Lock()
+        for histograma in self._histogramas.values():
+            histograma._lock = threading.Lock()
+        self.reiniciar()
+
+
+class _Cronometro:
+    __slots__ = ('_histograma', '_inicio')
+
+    def __init__(self, histograma):
+        self._histograma = histograma
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self._histograma.observar(time.perf_counter() - self._inicio)
+
+
+class _CronometroInactivo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        pass
+
+_CRONOMETRO_INACTIVO = _CronometroInactivo()
+
+
+_registro = RegistroMetricas()
+
+def obtener_registro():
+    return _registro
+
+
+class LockMedido:
+    # threading.Lock que registra cuánto espera cada hilo para adquirirlo (resenas_espera_bloqueo_segundos{bloqueo=nombre})
+    def __init__(self, nombre, registro=None):
+        self._lock = threading.Lock()
+        self._registro = registro or obtener_registro()
+        self._histograma = self._registro.histograma('resenas_espera_bloqueo_segundos', bloqueo=nombre)
+
+    def acquire(self, blocking=True, timeout=-1):
+        # Sin espera (el caso habitual) cuenta como 0 s y no se toma el tiempo
+        if self._lock.acquire(False):
+            if self._registro.activado:
+                self._histograma.observar(0.0)
+            return True
+        if not blocking:
+            return False
+        inicio = time.perf_counter()
+        adquirido = self._lock.acquire(True, timeout)
+        if self._registro.activado:
+            self._histograma.observar(time.perf_counter() - inicio)
+        return adquirido
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self._lock.release()
+
+
+def medir_operacion(funcion):
+    # Decorador para las operaciones de GestorResenas: duración (resenas_operacion_segundos) y excepciones por operación
+    operacion = funcion.__name__
+    histograma = _registro.histograma('resenas_operacion_segundos', operacion=operacion)
+
+    @functools.wraps(funcion)
+    def medida(*args, **kwargs):
+        if not _registro.activado:
+            return funcion(*args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        except BaseException:
+            _registro.incrementar('resenas_operacion_errores_total', operacion=operacion)
+            raise
+        finally:
+            histograma.observar(time.perf_counter() - inicio)
+    return medida
+
+
+# Logging en segundo plano
+
+_configuracion_logging = None # (manejador del logger, hilo escritor o None, manejador de salida)
+_lock_logging = threading.Lock()
+
+
+class _ManejadorCola(logging.Handler):
+    # Como logging.handlers.QueueHandler (que no se usa porque importa socket y pickle: ~10 ms más de arranque):
+    # el mensaje se formatea en el hilo que registra, así los argumentos no cambian antes de escribirse.
+    def __init__(self, cola):
+        super().__init__()
+        self.cola = cola
+
+    def emit(self, registro):
+        try:
+            mensaje = self.format(registro)
+            registro = copy.copy(registro)
+            registro.message = registro.msg = mensaje
+            registro.args = registro.exc_info = registro.exc_text = registro.stack_info = None
+            self.cola.put(registro)
+        except Exception:
+            self.handleError(registro)
+
+def _escribir_registros(cola, manejador):
+    # Tras el primer mensaje espera INTERVALO_LOGGING y escribe de una vez todo lo acumulado: bajo carga el hilo se
+    # despierta unas pocas veces por segundo y no una por mensaje (cada despertar cuesta cambios de contexto y del GIL).
+    # En la cola también llegan None (parar) y los Event de vaciar_logging.
+    while True:
+        elemento = cola.get()
+        if isinstance(elemento, logging.LogRecord):
+            time.sleep(INTERVALO_LOGGING)
+        while True:
+            if elemento is None:
+                return
+            if isinstance(elemento, logging.LogRecord):
+                manejador.handle(elemento)
+            else:
+                elemento.set()
+            try:
+                elemento = cola.get_nowait()
+            except queue.Empty:
+                break
+
+def obtener_logger(modulo):
+    # Logger de un módulo de la aplicación ('resenas.<modulo>'); se configura con configurar_logging
+    return logging.getLogger(f"{NOMBRE_LOGGER}.{modulo.rsplit('.', 1)[-1]}")
+
+def configurar_logging(nivel=None, manejador=None):
+    # Idempotente: lo llaman BaseDAO y GestorResenas al crearse, así que basta con usar la capa de datos.
+    # manejador: destino de los mensajes (por defecto, la salida estándar sin adornos, como los print de antes).
+    global _configuracion_logging
+    if _configuracion_logging is not None:
+        return
+    with _lock_logging:
+        if _configuracion_logging is not None:
+            return
+        cola = queue.SimpleQueue()
+        if manejador is None:
+            manejador = logging.StreamHandler(sys.stdout)
+            manejador.setFormatter(logging.Formatter(FORMATO_LOG))
+        manejador_cola = _ManejadorCola(cola)
+        escritor = threading.Thread(target=_escribir_registros, args=(cola, manejador), name="EscritorLogging", daemon=True)
+        logger = logging.getLogger(NOMBRE_LOGGER)
+        logger.setLevel(nivel or NIVEL_LOG)
+        logger.addHandler(manejador_cola)
+        logger.propagate = False
+        escritor.start()
+        _configuracion_logging = (manejador_cola, escritor, manejador)
+    atexit.register(detener_logging)
+
+def vaciar_logging(espera=1.0):
+    # Espera a que se escriban los mensajes ya registrados: p. ej. antes de que la consola escriba lo que los sigue
+    configuracion = _configuracion_logging
+    if configuracion is None or configuracion[1] is None:
+        return
+    escritos = threading.Event()
+    configuracion[0].cola.put(escritos)
+    escritos.wait(espera)
+
+def establecer_nivel_log(nivel):
+    logging.getLogger(NOMBRE_LOGGER).setLevel(nivel.upper() if isinstance(nivel, str) else nivel)
+
+def detener_logging():
+    # Escribe los mensajes pendientes y para el hilo de logging
+    global _configuracion_logging
+    with _lock_logging:
+        if _configuracion_logging is None:
+            return
+        manejador_logger, escritor, manejador = _configuracion_logging
+        _configuracion_logging = None
+        logging.getLogger(NOMBRE_LOGGER).removeHandler(manejador_logger)
+        if escritor is not None:
+            manejador_logger.cola.put(None)
+            escritor.join()
+
+def _reiniciar_tras_fork():
+    # El hilo de logging no existe en el proceso hijo: allí se escribe directamente, sin cola, y así un hijo
+    # que termina con os._exit (multiprocessing) no pierde mensajes encolados.
+    global _lock_logging, _configuracion_logging
+    _lock_logging = threading.Lock()
+    _registro._reiniciar_tras_fork()
+    if _configuracion_logging is not None and _configuracion_logging[1] is not None:
+        manejador_cola, escritor, manejador = _configuracion_logging
+        logger = logging.getLogger(NOMBRE_LOGGER)
+        logger.removeHandler(manejador_cola)
+        logger.addHandler(manejador)
+        _configuracion_logging = (manejador, None, manejador)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
@@ -0,0 +1,351 @@
+import sqlite3
+
+from .metricas import obtener_logger
+
+# Migraciones del esquema, en orden. La versión aplicada se guarda en PRAGMA user_version:
+# cada migración pendiente se ejecuta en su propia transacción y, si el esquema ya está al día,
+# no se ejecuta ninguna sentencia DDL. Los pasos son sentencias SQL o funciones que reciben la conexión,
+# y deben poder repetirse sobre bases de datos creadas antes de existir las migraciones (IF NOT EXISTS).
+
+# Clasificación de juegos por media bayesiana: (puntuacion_acumulada + m·C) / (total_reseñas + m), donde C es
+# la media previa (global de todas las reseñas) y m los votos previos. Ambos se guardan en Metadatos para que
+# cada escritura actualice solo su juego; JuegoDAO.recalibrar_clasificacion los recalcula y reordena todo.
+VOTOS_PREVIOS_CLASIFICACION = 10
+MEDIA_PREVIA_SIN_RESEÑAS = 5.5
+
+def expresion_puntuacion_ponderada(acumulada="puntuacion_acumulada", total="total_reseñas"):
+    # Expresión SQL de la media bayesiana; acumulada y total pueden ser expresiones (p. ej. con deltas)
+    votos_previos = "(SELECT valor FROM Metadatos WHERE clave = 'clasificacion_votos_previos')"
+    media_previa = "(SELECT valor FROM Metadatos WHERE clave = 'clasificacion_media_previa')"
+    return f"CAST({acumulada} + {votos_previos} * {media_previa} AS REAL) / ({total} + {votos_previos})"
+
+# Agregados de Juegos separados por tipo de usuario: críticos ('critico') y público (el resto)
+TIPO_USUARIO_CRITICO = 'critico'
+SUFIJOS_TIPO_USUARIO = ('criticos', 'publico')
+
+# Histograma de puntuaciones por juego: conteo_1 .. conteo_10
+COLUMNAS_HISTOGRAMA = tuple(f"conteo_{puntuacion}" for puntuacion in range(1, 11))
+
+_log = obtener_logger(__name__)
+
+def _crear_versiones_datos(conexion):
+    # Contadores de versión para invalidar cachés entre procesos (ver CapaDeDatos/cache.py)
+    conexion.execute('''
+        CREATE TABLE IF NOT EXISTS VersionesDatos (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+    for tabla in ('Juegos', 'Usuarios'):
+        conexion.execute("INSERT OR IGNORE INTO VersionesDatos (tabla, version) VALUES (?, 0);", (tabla,))
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conexion.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_{tabla.lower()}_{evento.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE VersionesDatos SET version = version + 1 WHERE tabla = '{tabla}';
+                END;
+            ''')
+
+def _comprobar_nombres_juegos_unicos(conexion):
+    duplicados = conexion.execute("SELECT nombre FROM Juegos GROUP BY nombre HAVING COUNT(*) > 1;").fetchall()
+    if duplicados:
+        nombres = ", ".join(f"'{fila[0]}'" for fila in duplicados)
+        raise sqlite3.IntegrityError(f"No se puede crear el índice único sobre Juegos.nombre; hay juegos repetidos: {nombres}")
+
+def _crear_indice_busqueda(conexion):
+    # Índice FTS5 de contenido externo: el texto vive solo en Reseñas y los triggers mantienen el índice
+    # en la misma transacción que cada escritura. 'rebuild' indexa las reseñas que ya existían.
+    conexion.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS ReseñasFTS USING fts5(
+            contenido,
+            content='Reseñas',
+            content_rowid='id_reseña',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+    ''')
+    conexion.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reseñas_fts_insert AFTER INSERT ON Reseñas
+        BEGIN
+            INSERT INTO ReseñasFTS (rowid, contenido) VALUES (new.id_reseña, new.contenido);
+        END;
+    ''')
+    conexion.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reseñas_fts_delete AFTER DELETE ON Reseñas
+        BEGIN
+            INSERT INTO ReseñasFTS (ReseñasFTS, rowid, contenido) VALUES ('delete', old.id_reseña, old.contenido);
+        END;
+    ''')
+    conexion.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_reseñas_fts_update AFTER UPDATE OF contenido ON Reseñas
+        BEGIN
+            INSERT INTO ReseñasFTS (ReseñasFTS, rowid, contenido) VALUES ('delete', old.id_reseña, old.contenido);
+            INSERT INTO ReseñasFTS (rowid, contenido) VALUES (new.id_reseña, new.contenido);
+        END;
+    ''')
+    conexion.execute("INSERT INTO ReseñasFTS (ReseñasFTS) VALUES ('rebuild');")
+
+def _crear_metadatos_clasificacion(conexion):
+    conexion.execute('''
+        CREATE TABLE IF NOT EXISTS Metadatos (
+            clave TEXT PRIMARY KEY,
+            valor
+        );
+    ''')
+    media_global = conexion.execute("SELECT AVG(puntuacion) FROM Reseñas;").fetchone()[0]
+    conexion.executemany("INSERT OR IGNORE INTO Metadatos (clave, valor) VALUES (?, ?);", (
+        ('clasificacion_votos_previos', VOTOS_PREVIOS_CLASIFICACION),
+        ('clasificacion_media_previa', float(media_global if media_global is not None else MEDIA_PREVIA_SIN_RESEÑAS)),
+    ))
+
+def _agregar_columna(conexion, tabla, columna, definicion):
+    # ALTER TABLE ... ADD COLUMN no admite IF NOT EXISTS
+    columnas = {fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla});")}
+    if columna not in columnas:
+        conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion};")
+
+def _agregar_columna_puntuacion_ponderada(conexion):
+    _agregar_columna(conexion, "Juegos", "puntuacion_ponderada", "REAL NOT NULL DEFAULT 0.0")
+    conexion.execute(f"UPDATE Juegos SET puntuacion_ponderada = {expresion_puntuacion_ponderada()};")
+
+def _crear_histogramas(conexion):
+    columnas = ",\n            ".join(f"{columna} INTEGER NOT NULL DEFAULT 0" for columna in COLUMNAS_HISTOGRAMA)
+    conexion.execute(f'''
+        CREATE TABLE IF NOT EXISTS JuegoHistograma (
+            id_juego INTEGER PRIMARY KEY,
+            {columnas},
+            FOREIGN KEY (id_juego) REFERENCES Juegos(id_juego)
+        );
+    ''')
+    conexion.execute(consulta_reconstruir_histogramas())
+
+def consulta_reconstruir_histogramas(por_juego=False):
+    # Recalcula los histogramas desde Reseñas: todos, o el de un juego (parámetro id_juego) con por_juego
+    conteos = ", ".join(f"COALESCE(SUM(r.puntuacion = {puntuacion}), 0)" for puntuacion in range(1, 11))
+    asignaciones = ", ".join(f"{columna} = excluded.{columna}" for columna in COLUMNAS_HISTOGRAMA)
+    filtro = "WHERE j.id_juego = ?" if por_juego else "WHERE true" # WHERE evita la ambigüedad de ON CONFLICT tras un JOIN
+    return f'''
+        INSERT INTO JuegoHistograma (id_juego, {", ".join(COLUMNAS_HISTOGRAMA)})
+        SELECT j.id_juego, {conteos}
+        FROM Juegos j LEFT JOIN Reseñas r ON r.id_juego = j.id_juego
+        {filtro}
+        GROUP BY j.id_juego
+        ON CONFLICT (id_juego) DO UPDATE SET {asignaciones};
+    '''
+
+def _crear_rollups(conexion):
+    # Contadores por juego y día/hora (UTC, como CURRENT_TIMESTAMP). Las reseñas nuevas se suman al insertarlas;
+    # las anteriores a esta migración (id_reseña <= rollups_limite_relleno) las suma ReseñaDAO.rellenar_rollups
+    # por bloques, avanzando la marca de agua rollups_marca_agua en la misma transacción que cada bloque.
+    for tabla, columna in (('ReseñasPorDia', 'dia'), ('ReseñasPorHora', 'hora')):
+        conexion.execute(f'''
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                id_juego INTEGER NOT NULL,
+                {columna} TEXT NOT NULL,
+                total_reseñas INTEGER NOT NULL DEFAULT 0,
+                puntuacion_acumulada INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (id_juego, {columna})
+            ) WITHOUT ROWID;
+        ''')
+    limite = conexion.execute("SELECT COALESCE(MAX(id_reseña), 0) FROM Reseñas;").fetchone()[0]
+    conexion.executemany("INSERT OR IGNORE INTO Metadatos (clave, valor) VALUES (?, ?);", (
+        ('rollups_marca_agua', 0),
+        ('rollups_limite_relleno', limite),
+    ))
+
+def _agregar_agregados_por_tipo(conexion):
+    for sufijo in SUFIJOS_TIPO_USUARIO:
+        _agregar_columna(conexion, "Juegos", f"total_reseñas_{sufijo}", "INTEGER NOT NULL DEFAULT 0")
+        _agregar_columna(conexion, "Juegos", f"puntuacion_acumulada_{sufijo}", "INTEGER NOT NULL DEFAULT 0")
+        _agregar_columna(conexion, "Juegos", f"puntuacion_media_{sufijo}", "REAL NOT NULL DEFAULT 0.0")
+    conexion.execute(consulta_recalcular_agregados_por_tipo())
+
+def _crear_trigger_puntuacion_ponderada_inicial(conexion):
+    # Los juegos nuevos parten de la media previa, no del DEFAULT 0.0: sin esto, un juego sin reseñas quedaría
+    # por debajo de otro con una sola reseña de 1. Cubre cualquier INSERT (DAOs, importaciones, particiones).
+    conexion.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_juegos_puntuacion_ponderada_inicial
+        AFTER INSERT ON Juegos
+        BEGIN
+            UPDATE Juegos SET puntuacion_ponderada = {expresion_puntuacion_ponderada()} WHERE id_juego = NEW.id_juego;
+        END;
+    ''')
+    # Los juegos insertados después de la migración 4 y aún sin reseñas se quedaron en 0.0
+    conexion.execute(f"UPDATE Juegos SET puntuacion_ponderada = {expresion_puntuacion_ponderada()} WHERE total_reseñas = 0;")
+
+def consulta_recalcular_agregados_por_tipo(por_juego=False):
+    # Recalcula desde Reseñas + Usuarios los agregados por tipo de usuario: todos, o los de un juego (parámetro id_juego)
+    filtro = "WHERE j.id_juego = ?" if por_juego else ""
+    return f'''
+        UPDATE Juegos SET
+            total_reseñas_criticos = a.total_criticos,
+            puntuacion_acumulada_criticos = a.suma_criticos,
+            puntuacion_media_criticos = COALESCE(CAST(a.suma_criticos AS REAL) / NULLIF(a.total_criticos, 0), 0.0),
+            total_reseñas_publico = a.total_publico,
+            puntuacion_acumulada_publico = a.suma_publico,
+            puntuacion_media_publico = COALESCE(CAST(a.suma_publico AS REAL) / NULLIF(a.total_publico, 0), 0.0)
+        FROM (
+            SELECT j.id_juego,
+                   COUNT(CASE WHEN u.tipo_usuario = '{TIPO_USUARIO_CRITICO}' THEN 1 END) AS total_criticos,
+                   COALESCE(SUM(CASE WHEN u.tipo_usuario = '{TIPO_USUARIO_CRITICO}' THEN r.puntuacion END), 0) AS suma_criticos,
+                   COUNT(CASE WHEN r.id_reseña IS NOT NULL AND u.tipo_usuario IS NOT '{TIPO_USUARIO_CRITICO}' THEN 1 END) AS total_publico,
+                   COALESCE(SUM(CASE WHEN u.tipo_usuario IS NOT '{TIPO_USUARIO_CRITICO}' THEN r.puntuacion END), 0) AS suma_publico
+            FROM Juegos j
+            LEFT JOIN Reseñas r ON r.id_juego = j.id_juego
+            LEFT JOIN Usuarios u ON u.id_usuario = r.id_usuario
+            {filtro}
+            GROUP BY j.id_juego
+        ) AS a
+        WHERE Juegos.id_juego = a.id_juego;
+    '''
+
+
+MIGRACIONES = [
+    (1, "Tablas base", [
+        '''
+        CREATE TABLE IF NOT EXISTS Juegos (
+            id_juego INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            puntuacion_media REAL DEFAULT 0.0,
+            total_reseñas INTEGER DEFAULT 0,
+            puntuacion_acumulada INTEGER DEFAULT 0
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Usuarios (
+            id_usuario INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre_usuario TEXT UNIQUE NOT NULL,
+            tipo_usuario TEXT NOT NULL -- Ej: 'critico', 'usuario_normal'
+        );
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Reseñas (
+            id_reseña INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_juego INTEGER NOT NULL,
+            id_usuario INTEGER NOT NULL,
+            puntuacion INTEGER NOT NULL CHECK (puntuacion >= 1 AND puntuacion <= 10),
+            contenido TEXT,
+            fecha_reseña DATETIME DEFAULT CURRENT_TIMESTAMP,
+            origen_simulado_ip TEXT,
+            UNIQUE(id_juego, id_usuario),
+            FOREIGN KEY (id_juego) REFERENCES Juegos(id_juego),
+            FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario)
+        );
+        ''',
+        _crear_versiones_datos,
+    ]),
+    (2, "Índices de rendimiento", [
+        _comprobar_nombres_juegos_unicos,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_juegos_nombre ON Juegos (nombre);",
+        "CREATE INDEX IF NOT EXISTS idx_reseñas_juego_fecha ON Reseñas (id_juego, fecha_reseña);",
+        "CREATE INDEX IF NOT EXISTS idx_reseñas_juego_puntuacion ON Reseñas (id_juego, puntuacion);",
+        "CREATE INDEX IF NOT EXISTS idx_reseñas_usuario ON Reseñas (id_usuario);",
+        "ANALYZE;",
+    ]),
+    (3, "Búsqueda de texto completo en reseñas (FTS5)", [
+        _crear_indice_busqueda,
+    ]),
+    (4, "Clasificación de juegos por media bayesiana", [
+        _crear_metadatos_clasificacion,
+        _agregar_columna_puntuacion_ponderada,
+        "CREATE INDEX IF NOT EXISTS idx_juegos_clasificacion ON Juegos (puntuacion_ponderada DESC, id_juego);",
+        "ANALYZE Juegos;",
+    ]),
+    (5, "Histogramas de puntuaciones por juego", [
+        _crear_histogramas,
+    ]),
+    (6, "Rollups de reseñas por día y por hora", [
+        _crear_rollups,
+    ]),
+    (7, "Agregados de puntuación de críticos y público", [
+        _agregar_agregados_por_tipo,
+    ]),
+    (8, "Puntuación ponderada inicial de los juegos nuevos", [
+        _crear_trigger_puntuacion_ponderada_inicial,
+    ]),
+    # Índices de cobertura para las lecturas numéricas (puntuaciones por juego y por usuario): se resuelven sin
+    # tocar la tabla. id_reseña va explícito tras fecha_reseña para que la paginación por (fecha_reseña, id_reseña)
+    # siga sin ordenar aparte. Las lecturas de filas completas leen contenido y origen_simulado_ip de la tabla:
+    # cubrirlas duplicaría el texto de cada reseña en el índice.
+    (9, "Índices de cobertura de reseñas", [
+        "DROP INDEX IF EXISTS idx_reseñas_juego_fecha;",
+        "CREATE INDEX IF NOT EXISTS idx_reseñas_juego_fecha ON Reseñas (id_juego, fecha_reseña, id_reseña, id_usuario, puntuacion);",
+        "DROP INDEX IF EXISTS idx_reseñas_usuario;",
+        "CREATE INDEX IF NOT EXISTS idx_reseñas_usuario ON Reseñas (id_usuario, id_juego, puntuacion);",
+        "ANALYZE Reseñas;",
+    ]),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def obtener_version_esquema(conexion):
+    return conexion.execute("PRAGMA user_version;").fetchone()[0]
+
+def aplicar_migraciones(conexion):
+    version_actual = obtener_version_esquema(conexion)
+    if version_actual >= VERSION_ESQUEMA:
+        return version_actual
+
+    for version, descripcion, pasos in MIGRACIONES:
+        if version <= version_actual:
+            continue
+        conexion.execute("BEGIN IMMEDIATE;")
+        try:
+            # Otro proceso pudo aplicar la misma migración mientras esperábamos el lock de escritura
+            if obtener_version_esquema(conexion) >= version:
+                conexion.rollback()
+                continue
+            for paso in pasos:
+                if callable(paso):
+                    paso(conexion)
+                else:
+                    conexion.execute(paso)
+            conexion.execute(f"PRAGMA user_version = {version};")
+            conexion.commit()
+        except sqlite3.Error:
+            conexion.rollback()
+            raise
+        _log.info("Migración %s aplicada: %s.", version, descripcion)
+        version_actual = version
+    return version_actual
+
+
+# Consultas críticas de los DAOs y el índice que debe usar cada una según EXPLAIN QUERY PLAN
+CONSULTAS_CRITICAS = {
+    'juego_por_id': ("SELECT * FROM Juegos WHERE id_juego = ?;", (1,), "INTEGER PRIMARY KEY"),
+    'juego_por_nombre': ("SELECT * FROM Juegos WHERE nombre = ?;", ("x",), "idx_juegos_nombre"),
+    'existencia_reseña': ("SELECT COUNT(*) FROM Reseñas WHERE id_juego = ? AND id_usuario = ?;", (1, 1), "sqlite_autoindex_Reseñas_1"),
+    'reseñas_recientes': ("SELECT * FROM Reseñas WHERE id_juego = ? AND (fecha_reseña, id_reseña) < (?, ?) "
+                          "ORDER BY fecha_reseña DESC, id_reseña DESC LIMIT 20;", (1, "9999", 0), "idx_reseñas_juego_fecha"),
+    'reseñas_mejor_puntuadas': ("SELECT * FROM Reseñas WHERE id_juego = ? ORDER BY puntuacion DESC, id_reseña DESC LIMIT 20;",
+                                (1,), "idx_reseñas_juego_puntuacion"),
+    'reseñas_por_usuario': ("SELECT * FROM Reseñas WHERE id_usuario = ?;", (1,), "idx_reseñas_usuario"),
+    'puntuaciones_por_juego': ("SELECT id_reseña, id_juego, id_usuario, puntuacion FROM Reseñas WHERE id_juego = ? "
+                               "ORDER BY fecha_reseña, id_reseña;", (1,), "COVERING INDEX idx_reseñas_juego_fecha"),
+    'puntuaciones_por_usuario': ("SELECT id_reseña, id_juego, puntuacion FROM Reseñas WHERE id_usuario = ? ORDER BY id_juego;",
+                                 (1,), "COVERING INDEX idx_reseñas_usuario"),
+    'clasificacion_juegos': ("SELECT * FROM Juegos ORDER BY puntuacion_ponderada DESC, id_juego LIMIT 10;", (),
+                             "idx_juegos_clasificacion"),
+    'tendencia_diaria': ("SELECT dia, total_reseñas, puntuacion_acumulada FROM ReseñasPorDia WHERE id_juego = ? AND dia BETWEEN ? AND ?;",
+                         (1, "2000-01-01", "2100-01-01"), "PRIMARY KEY"),
+}
+
+def verificar_planes_consulta(conexion):
+    # Devuelve {nombre: (plan, usa_indice_esperado)}; una consulta que ordena en memoria (TEMP B-TREE) no se da por buena
+    resultados = {}
+    for nombre, (consulta, parametros, indice_esperado) in CONSULTAS_CRITICAS.items():
+        plan = " | ".join(fila[3] for fila in conexion.execute("EXPLAIN QUERY PLAN " + consulta, parametros))
+        resultados[nombre] = (plan, indice_esperado in plan and "TEMP B-TREE" not in plan)
+    return resultados
+
+
+if __name__ == '__main__':
+    from CapaDeDatos.conexion_bd import crear_tablas, obtener_conexion
+    crear_tablas()
+    conexion = obtener_conexion()
+    print(f"Versión del esquema: {obtener_version_esquema(conexion)}")
+    for nombre, (plan, correcto) in verificar_planes_consulta(conexion).items():
+        print(f"{'OK   ' if correcto else 'FALLO'} {nombre}: {plan}")
+    conexion.close()
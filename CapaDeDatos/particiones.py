@@ -0,0 +1,487 @@
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from .cache import JuegoDAOConCache, UsuarioDAOConCache
+from .conexion_bd import PoolConexiones, _abrir_conexion, crear_tablas, obtener_ruta_base_de_datos
+from .daos import INDICE_PUNTUACION_PONDERADA, MAX_PARAMETROS_CONSULTA, RESEÑA_INVALIDA, TAMAÑO_LOTE_LECTURA, TAMAÑO_PAGINA, JuegoDAO, ReseñaDAO, UsuarioDAO
+from .metricas import obtener_logger
+from .migraciones import aplicar_migraciones
+
+# Particionado horizontal: cada juego, con sus reseñas, histograma y rollups, vive en la partición id_juego % N,
+# un archivo SQLite propio con su pool de conexiones y su propio lock de escritura, de modo que las escrituras de
+# juegos de particiones distintas no se esperan entre sí. La base de datos de la aplicación hace de catálogo:
+# asigna los IDs de juegos y usuarios y es la referencia de Usuarios, que se replica en todas las particiones para
+# que cada reseña valide usuario y tipo (crítico o público) dentro de la transacción de su partición.
+# Se activa con RESENAS_NUM_PARTICIONES=N (o configurar_particiones) y los datos existentes se reparten con:
+# Uso: python -m CapaDeDatos.particiones rebalancear --a N [--de M]
+#      python -m CapaDeDatos.particiones sincronizar-usuarios
+
+NUM_PARTICIONES = int(os.environ.get('RESENAS_NUM_PARTICIONES', '1')) # 1: sin particionar
+RANGO_IDS_RESEÑAS = 1 << 40 # la partición i numera sus reseñas desde i * RANGO_IDS_RESEÑAS: IDs únicos entre particiones
+TAMAÑO_LOTE_REBALANCEO = 2000
+
+
+
+def obtener_directorio_particiones():
+    return os.path.join(os.path.dirname(obtener_ruta_base_de_datos()), 'particiones')
+
+def ruta_particion(directorio, indice, num_particiones):
+    # El número total forma parte del nombre: al rebalancear, la distribución nueva no pisa a la anterior
+    return os.path.join(directorio, f"resenas_p{indice}_de_{num_particiones}.sqlite")
+
+
+class Particiones:
+    def __init__(self, num_particiones, directorio=None):
+        if num_particiones < 2:
+            raise ValueError("Se necesitan al menos 2 particiones.")
+        self.num_particiones = num_particiones
+        self.directorio = directorio or obtener_directorio_particiones()
+        self.rutas = [ruta_particion(self.directorio, i, num_particiones) for i in range(num_particiones)]
+        self.pools = [PoolConexiones(ruta) for ruta in self.rutas]
+        self._crear_ejecutor()
+
+    def _crear_ejecutor(self):
+        # Se importa aquí: concurrent.futures (y logging) solo hacen falta con particiones
+        from concurrent.futures import ThreadPoolExecutor
+        self._pid = os.getpid()
+        self._ejecutor = ThreadPoolExecutor(max_workers=self.num_particiones, thread_name_prefix="Particion")
+
+    def indice(self, id_juego):
+        # Los IDs no enteros van a la partición 0, que los rechaza como inválidos
+        return id_juego % self.num_particiones if isinstance(id_juego, int) else 0
+
+    def en_paralelo(self, funcion):
+        # funcion(indice) en todas las particiones a la vez; resultados en orden de partición.
+        # funcion no debe volver a llamar a en_paralelo: los hilos del ejecutor son uno por partición.
+        if self._pid != os.getpid():
+            self._crear_ejecutor() # un proceso hijo (fork) no hereda los hilos del ejecutor
+        return list(self._ejecutor.map(funcion, range(self.num_particiones)))
+
+    def crear_tablas(self):
+        # Devuelve True si alguna partición no existía
+        os.makedirs(self.directorio, exist_ok=True)
+        nuevas = not all(os.path.exists(ruta) for ruta in self.rutas)
+        for indice, ruta in enumerate(self.rutas):
+            conexion = _abrir_conexion(ruta)
+            try:
+                aplicar_migraciones(conexion)
+                if indice:
+                    with conexion:
+                        conexion.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'Reseñas', ? "
+                                         "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'Reseñas');",
+                                         (indice * RANGO_IDS_RESEÑAS,))
+            finally:
+                conexion.close()
+        return nuevas
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=True)
+        for pool in self.pools:
+            pool.cerrar()
+
+
+_num_particiones = NUM_PARTICIONES
+_directorio_particiones = None
+_particiones = None
+_lock_particiones = threading.Lock()
+_log = obtener_logger(__name__)
+
+def configurar_particiones(num_particiones, directorio=None):
+    # Como configurar_ruta_base_de_datos: los DAOs creados después usan la nueva distribución
+    global _num_particiones, _directorio_particiones, _particiones
+    with _lock_particiones:
+        if _particiones is not None:
+            _particiones.cerrar()
+            _particiones = None
+        _num_particiones = num_particiones
+        _directorio_particiones = directorio
+
+def cerrar_particiones():
+    # Cierra los pools de las particiones sin cambiar la configuración: la próxima llamada a obtener_particiones los reabre
+    global _particiones
+    with _lock_particiones:
+        if _particiones is not None:
+            _particiones.cerrar()
+            _particiones = None
+
+def particionado_activo():
+    # Como obtener_particiones() pero sin abrir (ni crear) los archivos de las particiones
+    return _num_particiones >= 2
+
+def _reiniciar_lock_particiones_tras_fork():
+    global _lock_particiones
+    _lock_particiones = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_lock_particiones_tras_fork)
+
+def obtener_particiones():
+    # None si la aplicación no está particionada
+    global _particiones
+    if _num_particiones < 2:
+        return None
+    if _particiones is None:
+        with _lock_particiones:
+            if _particiones is None:
+                particiones = Particiones(_num_particiones, _directorio_particiones)
+                if particiones.crear_tablas() and JuegoDAO()._ejecutar_consulta("SELECT EXISTS (SELECT 1 FROM Juegos);")[0][0]:
+                    _log.warning("Las particiones de '%s' son nuevas pero la base de datos ya tiene juegos. "
+                                 "Repártelos antes con: python -m CapaDeDatos.particiones rebalancear --a %s --de 1",
+                                 particiones.directorio, _num_particiones)
+                _particiones = particiones
+    return _particiones
+
+
+class _DAOParticionado:
+    # El propio DAO (BaseDAO con el pool de la aplicación) lee y escribe en el catálogo; self.daos[i], en la partición i
+    CLASE_DAO = None
+
+    def _iniciar_particiones(self, particiones):
+        self.particiones = particiones or obtener_particiones()
+        self.daos = [self.CLASE_DAO(pool) for pool in self.particiones.pools]
+
+    def _dao(self, id_juego):
+        return self.daos[self.particiones.indice(id_juego)]
+
+    def _en_todas(self, funcion):
+        return self.particiones.en_paralelo(lambda indice: funcion(self.daos[indice]))
+
+    def _fabricar(self, filas, fabrica):
+        return [fabrica(*fila) for fila in filas] if fabrica is not None else list(filas)
+
+    def _leer_catalogo(self, consulta, valores):
+        # consulta con un 'IN ({})' que se rellena por bloques de MAX_PARAMETROS_CONSULTA valores
+        filas = []
+        for inicio in range(0, len(valores), MAX_PARAMETROS_CONSULTA):
+            bloque = valores[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+            filas.extend(self._ejecutar_consulta(consulta.format(', '.join('?' * len(bloque))), tuple(bloque)) or [])
+        return filas
+
+
+class JuegoDAOParticionado(_DAOParticionado, JuegoDAO):
+    # El catálogo guarda nombre y descripción de cada juego (y asigna su ID); los agregados solo están en su partición
+    CLASE_DAO = JuegoDAO
+
+    def __init__(self, particiones=None):
+        super().__init__()
+        self._iniciar_particiones(particiones)
+
+    def insertar_juego(self, nombre, descripcion=""):
+        id_juego = super().insertar_juego(nombre, descripcion)
+        if id_juego is not None:
+            self._dao(id_juego).insertar_juegos_lote([(id_juego, nombre, descripcion)])
+        return id_juego
+
+    def insertar_juegos_lote(self, filas):
+        insertados = super().insertar_juegos_lote(filas)
+        # Como con los usuarios, a las particiones llega lo que quedó en el catálogo
+        self._repartir(self._leer_catalogo("SELECT id_juego, nombre, descripcion FROM Juegos WHERE id_juego IN ({});",
+                                           [fila[0] for fila in filas]))
+        return insertados
+
+    def insertar_juegos_si_no_existen(self, filas):
+        insertados = super().insertar_juegos_si_no_existen(filas)
+        self._repartir(self._leer_catalogo("SELECT id_juego, nombre, descripcion FROM Juegos WHERE nombre IN ({});",
+                                           [fila[0] for fila in filas]))
+        return insertados
+
+    def _repartir(self, filas):
+        # Lleva a su partición juegos que ya están en el catálogo (los que ya estaban en ella se omiten)
+        por_particion = {}
+        for fila in filas:
+            por_particion.setdefault(self.particiones.indice(fila[0]), []).append(fila)
+        self.particiones.en_paralelo(lambda indice: self.daos[indice].insertar_juegos_lote(por_particion.get(indice, [])))
+
+    def obtener_juego_por_id(self, id_juego, fabrica=None):
+        return self._dao(id_juego).obtener_juego_por_id(id_juego, fabrica)
+
+    def obtener_juego_por_nombre(self, nombre_juego, fabrica=None):
+        fila = super().obtener_juego_por_nombre(nombre_juego)
+        return self.obtener_juego_por_id(fila[0], fabrica) if fila else None
+
+    def obtener_todos_los_juegos(self, fabrica=None):
+        filas = sorted(itertools.chain.from_iterable(self._en_todas(lambda dao: dao.obtener_todos_los_juegos() or [])))
+        return self._fabricar(filas, fabrica)
+
+    def iterar_juegos(self, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        filas = heapq.merge(*(dao.iterar_juegos(tamaño_lote) for dao in self.daos), key=lambda fila: fila[0])
+        return (fabrica(*fila) for fila in filas) if fabrica is not None else filas
+
+    def obtener_pagina_juegos(self, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        # La página global está dentro de la unión de las páginas de cada partición con el mismo cursor
+        paginas = self._en_todas(lambda dao: dao.obtener_pagina_juegos(cursor, tamaño_pagina))
+        filas = sorted(itertools.chain.from_iterable(filas for filas, _ in paginas))
+        hay_mas = len(filas) > tamaño_pagina or any(siguiente is not None for _, siguiente in paginas)
+        filas = filas[:tamaño_pagina]
+        return filas, ((filas[-1][0],) if hay_mas else None)
+
+    def obtener_mejores_juegos(self, limite=TAMAÑO_PAGINA, fabrica=None):
+        filas = itertools.chain.from_iterable(self._en_todas(lambda dao: dao.obtener_mejores_juegos(limite) or []))
+        filas = sorted(filas, key=lambda fila: (-fila[INDICE_PUNTUACION_PONDERADA], fila[0]))[:limite]
+        return self._fabricar(filas, fabrica)
+
+    def iterar_clasificacion(self, tamaño_lote=TAMAÑO_LOTE_LECTURA):
+        return heapq.merge(*(dao.iterar_clasificacion(tamaño_lote) for dao in self.daos), key=lambda fila: (-fila[1], fila[0]))
+
+    def obtener_parametros_clasificacion(self):
+        return self.daos[0].obtener_parametros_clasificacion()
+
+    def recalibrar_clasificacion(self, votos_previos=None, media_previa=None):
+        # Todas las particiones con la misma media previa (la global): si no, sus puntuaciones no serían comparables
+        if media_previa is None:
+            sumas = self._en_todas(lambda dao: dao._ejecutar_consulta(
+                "SELECT COALESCE(SUM(puntuacion_acumulada), 0), COALESCE(SUM(total_reseñas), 0) FROM Juegos;")[0])
+            total_reseñas = sum(total for _, total in sumas)
+            media_previa = sum(acumulada for acumulada, _ in sumas) / total_reseñas if total_reseñas else None
+        return all([dao.recalibrar_clasificacion(votos_previos, media_previa) for dao in self.daos])
+
+    def obtener_histograma(self, id_juego):
+        return self._dao(id_juego).obtener_histograma(id_juego)
+
+    def verificar_histogramas(self):
+        return sorted(itertools.chain.from_iterable(self._en_todas(lambda dao: dao.verificar_histogramas())))
+
+    def reconstruir_histogramas(self, id_juego=None):
+        if id_juego is not None:
+            return self._dao(id_juego).reconstruir_histogramas(id_juego)
+        return all(self._en_todas(lambda dao: dao.reconstruir_histogramas()))
+
+    def recalcular_puntuaciones(self, id_juego=None):
+        if id_juego is not None:
+            return self._dao(id_juego).recalcular_puntuaciones(id_juego)
+        return all(self._en_todas(lambda dao: dao.recalcular_puntuaciones()))
+
+    def obtener_version_tabla(self, tabla):
+        # Los agregados cambian en las particiones: la versión de Juegos es la suma de las suyas
+        if tabla != 'Juegos':
+            return super().obtener_version_tabla(tabla)
+        versiones = self._en_todas(lambda dao: dao.obtener_version_tabla(tabla))
+        return None if None in versiones else sum(versiones)
+
+
+class UsuarioDAOParticionado(_DAOParticionado, UsuarioDAO):
+    # Las lecturas van al catálogo; cada alta se replica después en todas las particiones
+    CLASE_DAO = UsuarioDAO
+
+    def __init__(self, particiones=None):
+        super().__init__()
+        self._iniciar_particiones(particiones)
+
+    def insertar_usuario(self, nombre_usuario, tipo_usuario):
+        id_usuario = super().insertar_usuario(nombre_usuario, tipo_usuario)
+        if id_usuario is not None:
+            self._replicar([(id_usuario, nombre_usuario, tipo_usuario)])
+        return id_usuario
+
+    def insertar_usuarios_lote(self, filas):
+        insertados = super().insertar_usuarios_lote(filas)
+        # Se replica lo que quedó en el catálogo, no lo recibido: un nombre repetido con otro ID no debe llegar a las particiones
+        self._replicar(super().obtener_usuarios_por_ids([fila[0] for fila in filas]))
+        return insertados
+
+    def insertar_usuarios_si_no_existen(self, filas):
+        insertados = super().insertar_usuarios_si_no_existen(filas)
+        self._replicar(self._leer_catalogo("SELECT id_usuario, nombre_usuario, tipo_usuario FROM Usuarios WHERE nombre_usuario IN ({});",
+                                           [fila[0] for fila in filas]))
+        return insertados
+
+    def _replicar(self, filas):
+        self._en_todas(lambda dao: dao.insertar_usuarios_lote(filas))
+
+    def sincronizar_usuarios(self, tamaño_lote=TAMAÑO_LOTE_REBALANCEO):
+        # Vuelve a replicar todo el catálogo (idempotente): repara particiones a las que no llegó un alta
+        usuarios = self.iterar_usuarios()
+        total = 0
+        while True:
+            bloque = list(itertools.islice(usuarios, tamaño_lote))
+            if not bloque:
+                return total
+            self._replicar(bloque)
+            total += len(bloque)
+
+
+class ReseñaDAOParticionado(_DAOParticionado, ReseñaDAO):
+    CLASE_DAO = ReseñaDAO
+
+    def __init__(self, particiones=None):
+        super().__init__()
+        self._iniciar_particiones(particiones)
+
+    def registrar_reseña(self, id_juego, id_usuario, puntuacion, contenido="", origen_simulado_ip=""):
+        return self._dao(id_juego).registrar_reseña(id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip)
+
+    def insertar_reseñas_lote(self, filas):
+        # Cada partición confirma su parte del lote en su propia transacción y en paralelo con las demás:
+        # el lote ya no es atómico en conjunto, pero cada reseña sigue contándose una sola vez.
+        posiciones = {}
+        for posicion, fila in enumerate(filas):
+            posiciones.setdefault(self.particiones.indice(fila[0]), []).append(posicion)
+        estados = [RESEÑA_INVALIDA] * len(filas)
+
+        def insertar(indice):
+            if indice in posiciones:
+                estados_particion = self.daos[indice].insertar_reseñas_lote([filas[p] for p in posiciones[indice]])
+                for posicion, estado in zip(posiciones[indice], estados_particion):
+                    estados[posicion] = estado
+
+        self.particiones.en_paralelo(insertar)
+        return estados
+
+    def obtener_rollups(self, id_juego, granularidad, desde, hasta):
+        return self._dao(id_juego).obtener_rollups(id_juego, granularidad, desde, hasta)
+
+    def obtener_reseñas_por_juego(self, id_juego, fabrica=None):
+        return self._dao(id_juego).obtener_reseñas_por_juego(id_juego, fabrica)
+
+    def iterar_reseñas_por_juego(self, id_juego, orden='recientes', tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        return self._dao(id_juego).iterar_reseñas_por_juego(id_juego, orden, tamaño_lote, fabrica)
+
+    def iterar_puntuaciones_por_juego(self, id_juego, tamaño_lote=TAMAÑO_LOTE_LECTURA):
+        return self._dao(id_juego).iterar_puntuaciones_por_juego(id_juego, tamaño_lote)
+
+    def iterar_reseñas(self, id_juego=None, id_usuario=None, desde=None, hasta=None, tamaño_lote=TAMAÑO_LOTE_LECTURA, fabrica=None):
+        if id_juego is not None:
+            return self._dao(id_juego).iterar_reseñas(id_juego, id_usuario, desde, hasta, tamaño_lote, fabrica)
+        filas = heapq.merge(*(dao.iterar_reseñas(None, id_usuario, desde, hasta, tamaño_lote) for dao in self.daos),
+                            key=lambda fila: fila[0])
+        return (fabrica(*fila) for fila in filas) if fabrica is not None else filas
+
+    def obtener_pagina_reseñas_por_juego(self, id_juego, orden='recientes', cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        return self._dao(id_juego).obtener_pagina_reseñas_por_juego(id_juego, orden, cursor, tamaño_pagina)
+
+    def obtener_reseñas_por_usuario(self, id_usuario, fabrica=None):
+        filas = sorted(itertools.chain.from_iterable(self._en_todas(lambda dao: dao.obtener_reseñas_por_usuario(id_usuario) or [])))
+        return self._fabricar(filas, fabrica)
+
+    def obtener_puntuaciones_por_usuario(self, id_usuario):
+        # Cada juego vive en una sola partición: basta con mezclar las listas ya ordenadas por juego
+        return list(heapq.merge(*self._en_todas(lambda dao: dao.obtener_puntuaciones_por_usuario(id_usuario)), key=lambda fila: fila[1]))
+
+    def obtener_reseñas_con_usuario_por_juego(self, id_juego, fabrica=None):
+        return self._dao(id_juego).obtener_reseñas_con_usuario_por_juego(id_juego, fabrica)
+
+    def buscar_reseñas(self, texto, id_juego=None, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        # Cada partición devuelve su página con el mismo cursor (rank, id_reseña) y se mezclan. BM25 usa las
+        # estadísticas de cada partición, así que el orden entre particiones es aproximado (como en cualquier
+        # índice distribuido); la paginación sigue sin repetir ni saltarse resultados.
+        if id_juego is not None:
+            return self._dao(id_juego).buscar_reseñas(texto, id_juego, cursor, tamaño_pagina)
+        paginas = self._en_todas(lambda dao: dao.buscar_reseñas(texto, None, cursor, tamaño_pagina))
+        filas = sorted(itertools.chain.from_iterable(filas for filas, _ in paginas), key=lambda fila: (fila[6], fila[0]))
+        hay_mas = len(filas) > tamaño_pagina or any(siguiente is not None for _, siguiente in paginas)
+        filas = filas[:tamaño_pagina]
+        return filas, ((filas[-1][6], filas[-1][0]) if hay_mas else None)
+
+    def reconstruir_indice_busqueda(self):
+        self._en_todas(lambda dao: dao.reconstruir_indice_busqueda())
+
+    def optimizar_indice_busqueda(self):
+        self._en_todas(lambda dao: dao.optimizar_indice_busqueda())
+
+    def verificar_existencia_reseña(self, id_juego, id_usuario):
+        return self._dao(id_juego).verificar_existencia_reseña(id_juego, id_usuario)
+
+    def obtener_total_reseñas_y_puntuacion_acumulada_para_juego(self, id_juego):
+        return self._dao(id_juego).obtener_total_reseñas_y_puntuacion_acumulada_para_juego(id_juego)
+
+
+class JuegoDAOParticionadoConCache(JuegoDAOConCache, JuegoDAOParticionado):
+    pass
+
+class UsuarioDAOParticionadoConCache(UsuarioDAOConCache, UsuarioDAOParticionado):
+    pass
+
+
+def rebalancear(num_destino, num_origen=None, directorio=None, tamaño_lote=TAMAÑO_LOTE_REBALANCEO):
+    # Copia juegos, usuarios y reseñas de la distribución actual (o de la base de datos sin particionar si
+    # num_origen <= 1) a una de num_destino particiones, en archivos nuevos. Es idempotente: si se interrumpe,
+    # se relanza y las reseñas ya copiadas salen como duplicadas. Las reseñas reciben IDs nuevos del rango de
+    # su partición y conservan fecha, contenido e IP; los agregados se recalculan al insertarlas.
+    num_origen = _num_particiones if num_origen is None else num_origen
+    if num_destino == num_origen:
+        raise ValueError("El origen y el destino tienen el mismo número de particiones.")
+    inicio = time.perf_counter()
+    destino = Particiones(num_destino, directorio or _directorio_particiones)
+    origen = Particiones(num_origen, directorio or _directorio_particiones) if num_origen >= 2 else None
+    try:
+        destino.crear_tablas()
+        UsuarioDAOParticionado(destino).sincronizar_usuarios(tamaño_lote)
+        juegos_destino = JuegoDAOParticionado(destino)
+        juegos = JuegoDAO().iterar_juegos()
+        while True:
+            bloque = [(id_juego, nombre, descripcion) for id_juego, nombre, descripcion, *_ in itertools.islice(juegos, tamaño_lote)]
+            if not bloque:
+                break
+            por_particion = {}
+            for fila in bloque:
+                por_particion.setdefault(destino.indice(fila[0]), []).append(fila)
+            destino.en_paralelo(lambda indice: juegos_destino.daos[indice].insertar_juegos_lote(por_particion.get(indice, [])))
+
+        reseñas_destino = ReseñaDAOParticionado(destino)
+        fuentes = [ReseñaDAO(pool) for pool in origen.pools] if origen else [ReseñaDAO()]
+        copiadas = 0
+        for fuente in fuentes:
+            reseñas = fuente.iterar_reseñas(tamaño_lote=tamaño_lote)
+            while True:
+                bloque = [(id_juego, id_usuario, puntuacion, contenido, ip, fecha)
+                          for _, id_juego, id_usuario, puntuacion, contenido, fecha, ip in itertools.islice(reseñas, tamaño_lote)]
+                if not bloque:
+                    break
+                reseñas_destino.insertar_reseñas_lote(bloque)
+                copiadas += len(bloque)
+            _log.info("Rebalanceo: %s reseñas copiadas (%.0f reseñas/s).", copiadas, copiadas / (time.perf_counter() - inicio))
+
+        votos_previos, _ = (JuegoDAOParticionado(origen) if origen else JuegoDAO()).obtener_parametros_clasificacion()
+        juegos_destino.recalibrar_clasificacion(votos_previos)
+
+        # Verificación: mismas reseñas y mismos totales que en el origen
+        def totales(daos):
+            return [sum(valores) for valores in zip(*(dao._ejecutar_consulta(
+                "SELECT COUNT(*), COALESCE(SUM(puntuacion), 0) FROM Reseñas;")[0] for dao in daos))]
+        totales_origen = totales(fuentes)
+        totales_destino = totales(reseñas_destino.daos)
+        if totales_origen != totales_destino:
+            raise sqlite3.DatabaseError(f"El rebalanceo no cuadra: origen {totales_origen}, destino {totales_destino}.")
+        _log.info("Rebalanceo de %s a %s particiones completado en %.2fs: %s reseñas en '%s'. Actívalo con "
+                  "RESENAS_NUM_PARTICIONES=%s; los datos de origen no se han borrado.", max(num_origen, 1), num_destino,
+                  time.perf_counter() - inicio, totales_destino[0], destino.directorio, num_destino)
+        return totales_destino[0]
+    finally:
+        destino.cerrar()
+        if origen:
+            origen.cerrar()
+
+
+def main(argumentos=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Particionado de las reseñas en varias bases de datos por juego.")
+    parser.add_argument("--directorio", help="Directorio de las particiones (por defecto 'particiones' junto a la base de datos).")
+    subparsers = parser.add_subparsers(dest="tarea", required=True)
+
+    rebalanceo = subparsers.add_parser("rebalancear", help="Reparte los datos en un nuevo número de particiones.")
+    rebalanceo.add_argument("--a", dest="num_destino", type=int, required=True, help="Número de particiones de destino (2 o más).")
+    rebalanceo.add_argument("--de", dest="num_origen", type=int, help="Particiones de origen (por defecto RESENAS_NUM_PARTICIONES; 1: sin particionar).")
+    rebalanceo.add_argument("--tamaño-lote", type=int, default=TAMAÑO_LOTE_REBALANCEO, help="Reseñas por transacción.")
+
+    subparsers.add_parser("sincronizar-usuarios", help="Vuelve a replicar los usuarios del catálogo en las particiones activas.")
+
+    argumentos = parser.parse_args(argumentos)
+    crear_tablas()
+    if argumentos.tarea == "rebalancear":
+        if argumentos.num_destino < 2:
+            parser.error("--a debe ser al menos 2")
+        rebalancear(argumentos.num_destino, argumentos.num_origen, argumentos.directorio, argumentos.tamaño_lote)
+    elif argumentos.tarea == "sincronizar-usuarios":
+        if argumentos.directorio:
+            configurar_particiones(_num_particiones, argumentos.directorio)
+        if obtener_particiones() is None:
+            parser.error("la aplicación no está particionada (RESENAS_NUM_PARTICIONES)")
+        print(f"{UsuarioDAOParticionado().sincronizar_usuarios()} usuarios replicados en {_num_particiones} particiones.")
+
+
+if __name__ == '__main__':
+    main()
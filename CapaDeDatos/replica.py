@@ -0,0 +1,243 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .conexion_bd import TAMAÑO_MAXIMO_POOL, PoolConexiones, _abrir_conexion, obtener_pool, obtener_ruta_base_de_datos
+from .metricas import configurar_logging, obtener_logger
+from .particiones import particionado_activo
+
+# Réplica de lectura en memoria: una copia de la base de datos cargada con la API de backup y refrescada cada
+# INTERVALO_REFRESCO segundos en un hilo propio. Cada refresco carga una generación nueva (una base de datos en
+# memoria con caché compartida, varias conexiones de lectura) y la cambia por la anterior de golpe: las lecturas
+# nunca ven una copia a medias. Si la base de datos no ha cambiado (PRAGMA data_version) no se copia nada.
+# Una réplica con más de retraso_maximo segundos de antigüedad (refresco atascado, proceso hijo tras un fork)
+# no se usa: las lecturas van a la base de datos en disco.
+# Se activa con RESENAS_REPLICA_LECTURA=1 o pasando una ReplicaLectura a GestorResenas.
+# Solo copia un archivo: con la base de datos particionada (RESENAS_NUM_PARTICIONES) las reseñas y los agregados
+# están en las particiones, así que la réplica de la base de datos principal no se crea.
+
+REPLICA_ACTIVADA = os.environ.get('RESENAS_REPLICA_LECTURA', '0') == '1'
+INTERVALO_REFRESCO = float(os.environ.get('RESENAS_REPLICA_INTERVALO', '1.0')) # segundos
+RETRASO_MAXIMO = float(os.environ.get('RESENAS_REPLICA_RETRASO_MAXIMO', '5.0')) # segundos
+
+_contador_replicas = itertools.count(1)
+_log = obtener_logger(__name__)
+
+
+class _PoolGeneracion(PoolConexiones):
+    # Conexiones de solo lectura a una generación de la réplica ('file:...?mode=memory&cache=shared')
+    def _nueva_conexion(self):
+        conexion = sqlite3.connect(self.ruta_bd, uri=True, check_same_thread=False)
+        conexion.execute("PRAGMA query_only = ON;")
+        return conexion
+
+
+class ReplicaLectura:
+    # Se usa como un PoolConexiones de solo lectura: JuegoDAO(replica), ReseñaDAO(replica)...
+    def __init__(self, ruta_bd=None, intervalo_refresco=INTERVALO_REFRESCO, retraso_maximo=RETRASO_MAXIMO,
+                 tamaño_maximo=TAMAÑO_MAXIMO_POOL):
+        configurar_logging()
+        self.ruta_bd = ruta_bd or obtener_ruta_base_de_datos()
+        if particionado_activo() and os.path.abspath(self.ruta_bd) == os.path.abspath(obtener_ruta_base_de_datos()):
+            raise ValueError("La réplica de lectura no admite una base de datos particionada: solo copiaría el catálogo, "
+                             "sin las reseñas ni los agregados de las particiones.")
+        self.intervalo_refresco = intervalo_refresco
+        self.retraso_maximo = retraso_maximo
+        self.tamaño_maximo = tamaño_maximo
+        self._id = next(_contador_replicas)
+        self._generaciones = itertools.count(1)
+        self._pid = os.getpid()
+        self._pool = None
+        self._ancla = None # mantiene viva la base de datos en memoria de la generación actual
+        self._fuente = None
+        self._version_datos = None
+        self._instante = None # momento de la base de datos en disco que refleja la réplica (time.time())
+        self._lock_refresco = threading.Lock()
+        self._local = threading.local()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._lock_estadisticas = threading.Lock()
+        self._estadisticas = {
+            'lecturas_replica': 0,
+            'lecturas_disco': 0,
+            'refrescos': 0,
+            'refrescos_sin_cambios': 0,
+            'errores_refresco': 0,
+            'segundos_ultima_copia': 0.0,
+        }
+
+    def refrescar(self):
+        # Devuelve True si se ha cargado una generación nueva
+        with self._lock_refresco:
+            inicio = time.time()
+            if self._fuente is None:
+                self._fuente = _abrir_conexion(self.ruta_bd, check_same_thread=False)
+            # data_version cambia cuando otra conexión confirma una escritura en el archivo
+            version_datos = self._fuente.execute("PRAGMA data_version;").fetchone()[0]
+            if self._pool is not None and version_datos == self._version_datos:
+                self._instante = inicio
+                self._contar('refrescos_sin_cambios')
+                return False
+
+            uri = f"file:replica_{self._pid}_{self._id}_{next(self._generaciones)}?mode=memory&cache=shared"
+            ancla = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                # En un solo paso: la copia es una instantánea coherente y en WAL no bloquea a los escritores
+                self._fuente.backup(ancla)
+            except BaseException:
+                ancla.close()
+                raise
+            anterior, ancla_anterior = self._pool, self._ancla
+            self._pool = _PoolGeneracion(uri, tamaño_maximo=self.tamaño_maximo)
+            self._ancla = ancla
+            self._version_datos = version_datos
+            self._instante = inicio
+            # Las lecturas en curso sobre la generación anterior terminan con ella: sus conexiones la mantienen viva
+            if anterior is not None:
+                anterior.cerrar()
+                ancla_anterior.close()
+            with self._lock_estadisticas:
+                self._estadisticas['refrescos'] += 1
+                self._estadisticas['segundos_ultima_copia'] = time.time() - inicio
+            return True
+
+    def retraso(self):
+        # Segundos que la réplica lleva sin reflejar la base de datos en disco (infinito si no está cargada)
+        if self._instante is None or self._pid != os.getpid():
+            return float('inf')
+        return max(0.0, time.time() - self._instante)
+
+    def _contar(self, clave):
+        with self._lock_estadisticas:
+            self._estadisticas[clave] += 1
+
+    # Interfaz de PoolConexiones que usan los DAOs (solo lectura)
+
+    def obtener(self):
+        # Como en PoolConexiones, las llamadas anidadas del mismo hilo reutilizan la conexión: ven la misma generación
+        local = self._local
+        if getattr(local, 'profundidad', 0):
+            local.profundidad += 1
+            return local.pool.obtener()
+        while True:
+            generacion = self._pool if self.retraso() <= self.retraso_maximo else None
+            pool = generacion or obtener_pool()
+            try:
+                conexion = pool.obtener()
+                break
+            except sqlite3.OperationalError:
+                if generacion is None or generacion is self._pool:
+                    raise
+                # Un refresco ha cerrado esa generación entre medias: se reintenta con la nueva
+        self._contar('lecturas_replica' if generacion is not None else 'lecturas_disco')
+        local.pool = pool
+        local.profundidad = 1
+        return conexion
+
+    def devolver(self, conexion=None):
+        local = self._local
+        if not getattr(local, 'profundidad', 0):
+            return
+        local.profundidad -= 1
+        pool = local.pool
+        if not local.profundidad:
+            local.pool = None
+        pool.devolver(conexion)
+
+    @contextmanager
+    def conexion(self):
+        conexion = self.obtener()
+        try:
+            yield conexion
+        finally:
+            self.devolver(conexion)
+
+    def en_transaccion(self):
+        return False
+
+    def transaccion(self, modo="IMMEDIATE"):
+        raise sqlite3.OperationalError("La réplica de lectura no admite escrituras.")
+
+    # Refresco periódico
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo_refresco):
+            try:
+                self.refrescar()
+            except sqlite3.Error as e:
+                self._contar('errores_refresco')
+                _log.error("Error al refrescar la réplica de lectura: %s", e)
+
+    def iniciar(self):
+        # La primera carga es síncrona: al volver, las lecturas ya pueden ir a la réplica
+        inicio = time.perf_counter()
+        self.refrescar()
+        _log.info("Réplica de lectura cargada en memoria en %.2fs (refresco cada %gs, retraso máximo %gs).",
+                  time.perf_counter() - inicio, self.intervalo_refresco, self.retraso_maximo)
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="RefrescoReplica", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+        with self._lock_refresco:
+            if self._pool is not None:
+                self._pool.cerrar()
+                self._ancla.close()
+                self._pool = self._ancla = self._instante = None
+            if self._fuente is not None:
+                self._fuente.close()
+                self._fuente = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self.detener()
+
+    def estadisticas(self):
+        with self._lock_estadisticas:
+            estadisticas = dict(self._estadisticas)
+        estadisticas['retraso'] = self.retraso()
+        total = estadisticas['lecturas_replica'] + estadisticas['lecturas_disco']
+        estadisticas['tasa_replica'] = estadisticas['lecturas_replica'] / total if total else 0.0
+        return estadisticas
+
+
+_replica = None
+_lock_replica = threading.Lock()
+
+def obtener_replica():
+    # None si la réplica no está activada (RESENAS_REPLICA_LECTURA)
+    global _replica
+    if not REPLICA_ACTIVADA:
+        return None
+    if particionado_activo():
+        _log.warning("RESENAS_REPLICA_LECTURA se ignora con la base de datos particionada: las lecturas van a las particiones.")
+        return None
+    if _replica is None:
+        with _lock_replica:
+            if _replica is None:
+                _replica = ReplicaLectura().iniciar()
+    return _replica
+
+def cerrar_replica():
+    global _replica
+    with _lock_replica:
+        if _replica is not None:
+            _replica.detener()
+            _replica = None
+
+def _reiniciar_lock_replica_tras_fork():
+    global _lock_replica
+    _lock_replica = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_lock_replica_tras_fork)
@@ -0,0 +1,330 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+
+from .conexion_bd import _abrir_conexion, cerrar_pool, obtener_ruta_base_de_datos
+from .metricas import configurar_logging, obtener_logger
+from .particiones import cerrar_particiones, obtener_particiones
+
+# Respaldos en caliente con la API de backup de SQLite: la copia avanza por pasos de PAGINAS_POR_PASO páginas
+# sobre una instantánea de lectura (WAL), así que la aplicación puede seguir escribiendo mientras tanto.
+# Con la base de datos particionada (RESENAS_NUM_PARTICIONES) las reseñas y los agregados viven en las particiones:
+# el respaldo es el catálogo más el directorio '<respaldo>.particiones' con una copia de cada partición, y se
+# verifica, restaura y borra como un conjunto. Las instantáneas de todos los archivos se abren antes de copiar.
+# Uso: python -m CapaDeDatos.respaldos crear [--directorio DIR] [--retencion N]
+#      python -m CapaDeDatos.respaldos listar | verificar RUTA | restaurar RUTA
+#      python -m CapaDeDatos.respaldos programar --intervalo SEGUNDOS
+
+PAGINAS_POR_PASO = 256
+PAUSA_ENTRE_PASOS = 0.005 # segundos entre dos pasos: reparte la E/S de la copia con la de la aplicación
+REINICIOS_MAXIMOS = 3 # con más, la copia se termina en un solo paso (ver _copiar)
+RETENCION_RESPALDOS = 7 # respaldos que se conservan; los más antiguos se borran
+INTERVALO_RESPALDOS = 6 * 3600 # segundos entre respaldos programados
+PREFIJO_RESPALDO = 'resenas_'
+EXTENSION_RESPALDO = '.sqlite'
+SUFIJO_PARTICIONES_RESPALDO = '.particiones'
+
+_log = obtener_logger(__name__)
+
+
+class _DemasiadosReinicios(Exception):
+    pass
+
+
+def obtener_directorio_respaldos():
+    return os.path.join(os.path.dirname(obtener_ruta_base_de_datos()), 'respaldos')
+
+def _copiar(origen, destino, paginas_por_paso, pausa):
+    # Devuelve (pasos, reinicios). Si otra conexión escribe en el origen entre dos pasos, SQLite reinicia la copia
+    # (las páginas restantes vuelven a crecer). En WAL se evita abriendo antes una transacción de lectura: todos
+    # los pasos leen la misma instantánea y los escritores siguen confirmando en el WAL sin esperar.
+    # Sin WAL ese lock de lectura sí bloquearía a los escritores, así que tras REINICIOS_MAXIMOS se copia de una vez.
+    estado = {'pasos': 0, 'reinicios': 0, 'restantes': None}
+    if not origen.in_transaction:
+        _abrir_instantanea(origen)
+
+    def progreso(_, restantes, total):
+        estado['pasos'] += 1
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > REINICIOS_MAXIMOS:
+                raise _DemasiadosReinicios()
+        estado['restantes'] = restantes
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    try:
+        origen.backup(destino, pages=paginas_por_paso, progress=progreso)
+    except _DemasiadosReinicios:
+        origen.backup(destino)
+        estado['pasos'] += 1
+    finally:
+        if origen.in_transaction:
+            origen.rollback()
+    return estado['pasos'], estado['reinicios']
+
+def _abrir_instantanea(origen):
+    # Transacción de lectura en WAL (ver _copiar); sin WAL no se abre nada
+    if origen.execute("PRAGMA journal_mode;").fetchone()[0] == 'wal':
+        origen.execute("BEGIN;")
+        origen.execute("SELECT COUNT(*) FROM sqlite_master;").fetchone()
+
+def directorio_particiones_respaldo(ruta_respaldo):
+    return ruta_respaldo[:-len(EXTENSION_RESPALDO)] + SUFIJO_PARTICIONES_RESPALDO
+
+def particiones_respaldo(ruta_respaldo):
+    # Rutas de las particiones de un respaldo ([] si se hizo sin particionar), ordenadas por nombre
+    directorio = directorio_particiones_respaldo(ruta_respaldo)
+    if not os.path.isdir(directorio):
+        return []
+    return [os.path.join(directorio, nombre) for nombre in sorted(os.listdir(directorio)) if nombre.endswith(EXTENSION_RESPALDO)]
+
+def _abrir_respaldo(ruta_respaldo):
+    # sqlite3.connect crearía un archivo vacío si la ruta no existe
+    if not os.path.isfile(ruta_respaldo):
+        raise FileNotFoundError(f"No existe el respaldo '{ruta_respaldo}'.")
+    return sqlite3.connect(ruta_respaldo)
+
+def _verificar_archivo(ruta):
+    conexion = _abrir_respaldo(ruta)
+    try:
+        mensajes = [fila[0] for fila in conexion.execute("PRAGMA integrity_check;")]
+    finally:
+        conexion.close()
+    return [] if mensajes == ['ok'] else mensajes
+
+def verificar_respaldo(ruta_respaldo, rutas_particiones=None):
+    # [] si PRAGMA integrity_check no encuentra problemas en el catálogo ni en sus particiones; si no, la lista de mensajes
+    errores = _verificar_archivo(ruta_respaldo)
+    if rutas_particiones is None:
+        rutas_particiones = particiones_respaldo(ruta_respaldo)
+    for ruta in rutas_particiones:
+        errores.extend(f"{os.path.basename(ruta)}: {mensaje}" for mensaje in _verificar_archivo(ruta))
+    return errores
+
+def crear_respaldo(directorio=None, retencion=RETENCION_RESPALDOS, paginas_por_paso=PAGINAS_POR_PASO, pausa=PAUSA_ENTRE_PASOS):
+    # Copia la base de datos en uso a '<directorio>/resenas_AAAAMMDD_HHMMSS_micro.sqlite' sin detener la aplicación.
+    # Se escribe con otro nombre y solo se renombra si pasa la verificación de integridad.
+    directorio = directorio or obtener_directorio_respaldos()
+    os.makedirs(directorio, exist_ok=True)
+    # Con microsegundos el orden alfabético es el cronológico incluso con varios respaldos en el mismo segundo
+    nombre = f"{PREFIJO_RESPALDO}{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S_%f')}{EXTENSION_RESPALDO}"
+    ruta_respaldo = os.path.join(directorio, nombre)
+    ruta_temporal = ruta_respaldo + ".parcial"
+    directorio_particiones = directorio_particiones_respaldo(ruta_respaldo)
+    directorio_particiones_temporal = directorio_particiones + ".parcial"
+
+    # (origen, destino temporal) de cada archivo del conjunto: el catálogo y, si las hay, todas las particiones
+    particiones = obtener_particiones()
+    copias = [(obtener_ruta_base_de_datos(), ruta_temporal)]
+    if particiones:
+        os.makedirs(directorio_particiones_temporal)
+        copias += [(ruta, os.path.join(directorio_particiones_temporal, os.path.basename(ruta))) for ruta in particiones.rutas]
+
+    inicio = time.perf_counter()
+    origenes, destinos = [], []
+    pasos = reinicios = paginas = 0
+    try:
+        for ruta_origen, ruta_destino in copias:
+            origenes.append(_abrir_conexion(ruta_origen, check_same_thread=False))
+            destinos.append(sqlite3.connect(ruta_destino))
+        # Todas las instantáneas antes de copiar nada: el conjunto refleja casi el mismo instante en cada archivo
+        for origen in origenes:
+            _abrir_instantanea(origen)
+        for origen, destino in zip(origenes, destinos):
+            pasos_archivo, reinicios_archivo = _copiar(origen, destino, paginas_por_paso, pausa)
+            # Cada archivo del respaldo es autocontenido: sin WAL
+            destino.execute("PRAGMA journal_mode = DELETE;")
+            paginas += destino.execute("PRAGMA page_count;").fetchone()[0]
+            pasos += pasos_archivo
+            reinicios += reinicios_archivo
+    except BaseException:
+        for destino in destinos:
+            destino.close()
+        # Si falló al abrir un origen puede que el destino temporal aún no exista: el error a propagar es el original
+        with suppress(FileNotFoundError):
+            os.remove(ruta_temporal)
+        shutil.rmtree(directorio_particiones_temporal, ignore_errors=True)
+        raise
+    finally:
+        for origen in origenes:
+            if origen.in_transaction:
+                origen.rollback()
+            origen.close()
+    for destino in destinos:
+        destino.close()
+    segundos_copia = time.perf_counter() - inicio
+
+    rutas_particiones_temporales = [ruta_destino for _, ruta_destino in copias[1:]]
+    errores = verificar_respaldo(ruta_temporal, rutas_particiones_temporales)
+    if errores:
+        os.rename(ruta_temporal, ruta_respaldo + ".corrupto")
+        if particiones:
+            os.rename(directorio_particiones_temporal, directorio_particiones + ".corrupto")
+        raise sqlite3.DatabaseError(f"El respaldo no supera la verificación de integridad: {'; '.join(errores[:5])}")
+    # El catálogo se renombra el último: un respaldo listado siempre tiene ya todas sus particiones
+    if particiones:
+        os.rename(directorio_particiones_temporal, directorio_particiones)
+    os.replace(ruta_temporal, ruta_respaldo)
+    segundos = time.perf_counter() - inicio
+
+    tamaño = sum(os.path.getsize(ruta) for ruta in [ruta_respaldo] + particiones_respaldo(ruta_respaldo))
+    descripcion_particiones = f", {len(copias) - 1} particiones" if particiones else ""
+    _log.info("Respaldo creado: '%s' (%s páginas%s, %.1f MB) en %.2fs (copia %.2fs en %s pasos, %s reinicios; integridad correcta).",
+              ruta_respaldo, paginas, descripcion_particiones, tamaño / 1_048_576, segundos, segundos_copia, pasos, reinicios)
+    aplicar_retencion(directorio, retencion)
+    return {
+        'ruta': ruta_respaldo,
+        'particiones': len(copias) - 1,
+        'paginas': paginas,
+        'pasos': pasos,
+        'reinicios': reinicios,
+        'segundos_copia': segundos_copia,
+        'segundos': segundos,
+    }
+
+def listar_respaldos(directorio=None):
+    # Rutas de los respaldos, del más antiguo al más reciente (el nombre lleva la fecha)
+    directorio = directorio or obtener_directorio_respaldos()
+    if not os.path.isdir(directorio):
+        return []
+    return [os.path.join(directorio, nombre) for nombre in sorted(os.listdir(directorio))
+            if nombre.startswith(PREFIJO_RESPALDO) and nombre.endswith(EXTENSION_RESPALDO)]
+
+def aplicar_retencion(directorio=None, retencion=RETENCION_RESPALDOS):
+    respaldos = listar_respaldos(directorio)
+    eliminados = respaldos[:-retencion] if retencion > 0 else []
+    for ruta in eliminados:
+        shutil.rmtree(directorio_particiones_respaldo(ruta), ignore_errors=True)
+        os.remove(ruta)
+        _log.info("Respaldo antiguo eliminado: '%s'", ruta)
+    return eliminados
+
+def restaurar_respaldo(ruta_respaldo, respaldo_previo=True):
+    # Sustituye el contenido de la base de datos en uso por el del respaldo, también con la API de backup:
+    # la escritura es una transacción, así que ninguna conexión ve la base de datos a medio restaurar.
+    # Las cachés de un GestorResenas abierto no se enteran: conviene reiniciar la aplicación después.
+    # Con particiones se restauran todas: el respaldo debe tener las mismas que la configuración actual.
+    rutas_particiones = particiones_respaldo(ruta_respaldo)
+    particiones = obtener_particiones()
+    destinos_particiones = particiones.rutas if particiones else []
+    if sorted(map(os.path.basename, rutas_particiones)) != sorted(map(os.path.basename, destinos_particiones)):
+        raise ValueError(f"El respaldo '{ruta_respaldo}' tiene {len(rutas_particiones)} particiones y la configuración actual "
+                         f"{len(destinos_particiones)} (RESENAS_NUM_PARTICIONES): restaurarlo dejaría reseñas y agregados desparejados.")
+    errores = verificar_respaldo(ruta_respaldo, rutas_particiones)
+    if errores:
+        raise sqlite3.DatabaseError(f"El respaldo '{ruta_respaldo}' está dañado: {'; '.join(errores[:5])}")
+    if respaldo_previo:
+        # Por si hay que deshacer la restauración; sin retención para no borrar el respaldo que se va a restaurar
+        crear_respaldo(os.path.dirname(os.path.abspath(ruta_respaldo)), retencion=0)
+
+    inicio = time.perf_counter()
+    cerrar_pool()
+    cerrar_particiones()
+    destinos = {os.path.basename(ruta): ruta for ruta in destinos_particiones}
+    for ruta_origen, ruta_destino in [(ruta_respaldo, obtener_ruta_base_de_datos())] + \
+                                     [(ruta, destinos[os.path.basename(ruta)]) for ruta in rutas_particiones]:
+        origen = _abrir_respaldo(ruta_origen)
+        destino = _abrir_conexion(ruta_destino)
+        try:
+            origen.backup(destino)
+        finally:
+            origen.close()
+            destino.close()
+    descripcion_particiones = f" (con {len(rutas_particiones)} particiones)" if rutas_particiones else ""
+    _log.info("Base de datos restaurada desde '%s'%s en %.2fs.", ruta_respaldo, descripcion_particiones, time.perf_counter() - inicio)
+
+
+class ProgramadorRespaldos:
+    # Hilo en segundo plano que crea un respaldo cada 'intervalo' segundos y aplica la retención
+    def __init__(self, intervalo=INTERVALO_RESPALDOS, directorio=None, retencion=RETENCION_RESPALDOS):
+        self.intervalo = intervalo
+        self.directorio = directorio
+        self.retencion = retencion
+        self.ultimo_respaldo = None
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.ultimo_respaldo = crear_respaldo(self.directorio, self.retencion)
+            except (sqlite3.Error, OSError) as e:
+                _log.error("Error en el respaldo programado: %s", e)
+            self._detener.wait(self.intervalo)
+
+    def iniciar(self):
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="ProgramadorRespaldos", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self, tiempo_espera=None):
+        # Un respaldo en curso termina antes de que el hilo salga
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join(tiempo_espera)
+        self._hilo = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self.detener()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Respaldos en caliente de la base de datos de reseñas.")
+    parser.add_argument("--directorio", help="Directorio de los respaldos (por defecto 'respaldos' junto a la base de datos).")
+    subparsers = parser.add_subparsers(dest="tarea", required=True)
+
+    crear = subparsers.add_parser("crear", help="Crea un respaldo y aplica la retención.")
+    crear.add_argument("--retencion", type=int, default=RETENCION_RESPALDOS, help="Respaldos a conservar (0: todos).")
+
+    subparsers.add_parser("listar", help="Lista los respaldos existentes.")
+
+    verificar = subparsers.add_parser("verificar", help="Comprueba la integridad de un respaldo.")
+    verificar.add_argument("ruta")
+
+    restaurar = subparsers.add_parser("restaurar", help="Restaura la base de datos desde un respaldo.")
+    restaurar.add_argument("ruta")
+    restaurar.add_argument("--sin-respaldo-previo", action="store_true", help="No respalda la base de datos actual antes de restaurar.")
+
+    programar = subparsers.add_parser("programar", help="Crea respaldos periódicamente hasta Ctrl+C.")
+    programar.add_argument("--intervalo", type=float, default=INTERVALO_RESPALDOS, help="Segundos entre respaldos.")
+    programar.add_argument("--retencion", type=int, default=RETENCION_RESPALDOS, help="Respaldos a conservar (0: todos).")
+
+    argumentos = parser.parse_args(argumentos)
+    configurar_logging()
+    if argumentos.tarea == "crear":
+        crear_respaldo(argumentos.directorio, argumentos.retencion)
+    elif argumentos.tarea == "listar":
+        respaldos = listar_respaldos(argumentos.directorio)
+        for ruta in respaldos:
+            rutas_particiones = particiones_respaldo(ruta)
+            tamaño = sum(os.path.getsize(archivo) for archivo in [ruta] + rutas_particiones)
+            descripcion_particiones = f", {len(rutas_particiones)} particiones" if rutas_particiones else ""
+            print(f"{ruta} ({tamaño / 1_048_576:.1f} MB{descripcion_particiones})")
+        print(f"{len(respaldos)} respaldos.")
+    elif argumentos.tarea == "verificar":
+        errores = verificar_respaldo(argumentos.ruta)
+        print("Integridad correcta." if not errores else "\n".join(errores))
+    elif argumentos.tarea == "restaurar":
+        restaurar_respaldo(argumentos.ruta, not argumentos.sin_respaldo_previo)
+    elif argumentos.tarea == "programar":
+        programador = ProgramadorRespaldos(argumentos.intervalo, argumentos.directorio, argumentos.retencion).iniciar()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            programador.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,41 @@
 import time
 import threading
-import multiprocessing
+
+from CapaDeDatos.metricas import vaciar_logging
 
 def _tarea_envio_reseña_hilos_target(id_hilo, id_juego, id_usuario, puntuacion, contenido, gestor_resenas, ip_simulada):
     print(f"HILO {id_hilo}: Intentando enviar reseña para Juego {id_juego} por Usuario {id_usuario} (Puntuación: {puntuacion})...")
     contenido_hilo = f"{contenido} (Desde Hilo {id_hilo})"
     puntuacion_hilo = puntuacion - (id_hilo % 2) 
 
-    gestor_resenas.enviar_reseña(
+    exito = gestor_resenas.enviar_reseña(
         id_juego=id_juego,
         id_usuario=id_usuario,
         puntuacion=puntuacion_hilo,
         contenido=contenido_hilo,
         origen_simulado_ip=ip_simulada
     )
+    if exito:
+        print(f"HILO {id_hilo}: Reseña aceptada.")
 
-def _tarea_envio_reseña_procesos_target(id_proceso, id_juego, id_usuario, puntuacion_base, contenido_base, ip_base):
+def _tarea_envio_reseña_procesos_target(id_proceso, id_juego, id_usuario, puntuacion_base, contenido_base, ip_base, cliente_escritor=None):
     from CapaLogicaDeNegocio.gestor_resenas import GestorResenas
-    gestor_local = GestorResenas()
+    gestor_local = GestorResenas(cliente_escritor=cliente_escritor)
     
     puntuacion_intento = puntuacion_base + (id_proceso % 2)
     contenido_intento = f"{contenido_base} (Desde Proceso {id_proceso})"
     ip_intento = f"{ip_base}.{id_proceso}"
 
     print(f"PROCESO {id_proceso}: Intentando enviar reseña para Juego {id_juego} por Usuario {id_usuario} (Puntuación: {puntuacion_intento})...")
-    gestor_local.enviar_reseña(
+    exito = gestor_local.enviar_reseña(
         id_juego=id_juego,
         id_usuario=id_usuario,
         puntuacion=puntuacion_intento,
         contenido=contenido_intento,
         origen_simulado_ip=ip_intento
     )
+    if exito:
+        print(f"PROCESO {id_proceso}: Reseña aceptada.")
 
 #Fin de funciones auxiliares
 
@@ -43,6 +48,7 @@ class InterfazConsola:
         print("\n" * 5) # Simula una limpieza imprimiendo varias líneas en blanco
 
     def _pausar(self):
+        vaciar_logging()
         input("\nPresiona Enter para continuar...")
 
     def mostrar_menu_principal(self):
@@ -55,7 +61,11 @@ class InterfazConsola:
         print("2. Enviar una reseña")
         print("3. Simular conflicto de concurrencia (Hilos)")
         print("4. Simular conflicto de concurrencia (Procesos)")
-        print("5. Salir")
+        print("5. Buscar en el texto de las reseñas")
+        print("6. Reconstruir/optimizar el índice de búsqueda")
+        print("7. Ver clasificación de juegos")
+        print("8. Ver métricas de rendimiento")
+        print("9. Salir")
         print("█████████████████████████████████████████")
 
     def ejecutar(self):
@@ -72,12 +82,20 @@ class InterfazConsola:
             elif opcion == '4':
                 self.simular_procesos_concurrencia()
             elif opcion == '5':
+                self.buscar_reseñas_interactivo()
+            elif opcion == '6':
+                self.mantener_indice_busqueda()
+            elif opcion == '7':
+                self.ver_clasificacion()
+            elif opcion == '8':
+                self.ver_metricas()
+            elif opcion == '9':
                 print("Saliendo de la aplicación. ¡Hasta luego!")
                 break
             else:
                 print("Opción no válida. Por favor, intenta de nuevo.")
             
-            if opcion != '5':
+            if opcion != '9':
                 self._pausar()
 
 
@@ -95,6 +113,9 @@ class InterfazConsola:
             print(f"Nombre: {juego.nombre}")
             print(f"Descripción: {juego.descripcion}")
             print(f"Puntuación Media: {juego.puntuacion_media:.2f} / 10")
+            print(f"Puntuación Ponderada: {juego.puntuacion_ponderada:.2f} / 10")
+            print(f"Críticos: {juego.puntuacion_media_criticos:.2f} ({juego.total_reseñas_criticos} reseñas) | "
+                  f"Público: {juego.puntuacion_media_publico:.2f} ({juego.total_reseñas_publico} reseñas)")
             print(f"Total de Reseñas: {juego.total_reseñas}")
             print("--------------------")
         
@@ -102,13 +123,13 @@ class InterfazConsola:
         if id_juego_ver != 'no':
             try:
                 id_juego_ver = int(id_juego_ver)
-                juego_obj, reseñas_obj = self.gestor.obtener_detalles_juego_con_reseñas(id_juego_ver)
+                juego_obj, reseñas_obj = self.gestor.obtener_detalles_juego_con_reseñas_y_usuarios(id_juego_ver)
                 if juego_obj:
+                    self._mostrar_histograma(id_juego_ver)
                     print(f"\n--- Reseñas para {juego_obj.nombre} ---")
                     if reseñas_obj:
                         for reseña in reseñas_obj:
-                            usuario = self.gestor.obtener_usuario_por_id(reseña.id_usuario)
-                            nombre_usuario = usuario.nombre_usuario if usuario else "Desconocido"
+                            nombre_usuario = reseña.nombre_usuario or "Desconocido"
                             print(f"  - Usuario: {nombre_usuario}, Puntuación: {reseña.puntuacion}/10, Contenido: '{reseña.contenido}', Fecha: {reseña.fecha_reseña}")
                     else:
                         print("No hay reseñas para este juego aún.")
@@ -118,6 +139,20 @@ class InterfazConsola:
                 print("ID de juego no válido.")
 
 
+    def _mostrar_histograma(self, id_juego):
+        histograma = self.gestor.obtener_histograma_juego(id_juego)
+        if not histograma or not histograma.total():
+            return
+        print("\n--- Distribución de puntuaciones ---")
+        maximo = max(histograma.conteos)
+        for puntuacion, cantidad in enumerate(histograma.conteos, start=1):
+            barra = "█" * round(30 * cantidad / maximo) if maximo else ""
+            print(f"  {puntuacion:>2} | {barra} {cantidad}")
+        print(f"Mediana: {histograma.mediana()}, Moda: {histograma.moda()}, "
+              f"Desviación típica: {histograma.desviacion_tipica():.2f}, "
+              f"Percentiles 25/75/90: {histograma.percentil(25)}/{histograma.percentil(75)}/{histograma.percentil(90)}")
+
+
     def enviar_reseña_interactivo(self):
         self._limpiar_pantalla()
         print("--- ENVIAR NUEVA RESEÑA ---")
@@ -170,6 +205,7 @@ class InterfazConsola:
                 origen_simulado_ip=origen_ip
             )
 
+            vaciar_logging() # los mensajes del gestor van antes del resultado
             if exito:
                 print("\nReseña enviada exitosamente.")
             else:
@@ -180,6 +216,110 @@ class InterfazConsola:
         except Exception as e:
             print(f"Ocurrió un error inesperado: {e}")
 
+    def ver_clasificacion(self):
+        self._limpiar_pantalla()
+        print("--- CLASIFICACIÓN DE JUEGOS ---")
+        print("Ordenada por media bayesiana: los juegos con pocas reseñas se acercan a la media global.")
+        limite = input("¿Cuántos juegos quieres ver? (Enter = 10): ").strip()
+        try:
+            limite = int(limite) if limite else 10
+        except ValueError:
+            print("Número no válido.")
+            return
+
+        juegos = self.gestor.obtener_clasificacion(limite)
+        if not juegos:
+            print("No hay juegos registrados en el sistema.")
+            return
+        for posicion, juego in enumerate(juegos, start=1):
+            print(f"{posicion:>3}. {juego.nombre} - Ponderada: {juego.puntuacion_ponderada:.2f} "
+                  f"(Media: {juego.puntuacion_media:.2f}, Reseñas: {juego.total_reseñas}, "
+                  f"Críticos: {juego.puntuacion_media_criticos:.2f}, Público: {juego.puntuacion_media_publico:.2f})")
+
+        id_juego = input("\n¿Quieres ver la posición de un juego? (Ingresa ID o 'no'): ").strip().lower()
+        if id_juego != 'no' and id_juego:
+            try:
+                posicion = self.gestor.obtener_posicion_juego(int(id_juego))
+                if posicion is None:
+                    print("Juego no encontrado.")
+                else:
+                    print(f"El juego ID {id_juego} ocupa la posición {posicion}.")
+            except ValueError:
+                print("ID de juego no válido.")
+
+    def buscar_reseñas_interactivo(self):
+        self._limpiar_pantalla()
+        print("--- BUSCAR EN LAS RESEÑAS ---")
+        texto = input("Palabras a buscar (usa * al final para buscar por prefijo, ej: 'grafic*'): ").strip()
+        if not texto:
+            print("No se ha indicado ningún texto.")
+            return
+        id_juego = input("ID del juego para filtrar (Enter para buscar en todos): ").strip()
+        try:
+            id_juego = int(id_juego) if id_juego else None
+        except ValueError:
+            print("ID de juego no válido.")
+            return
+
+        juegos = {j.id_juego: j.nombre for j in self.gestor.obtener_juegos()}
+        cursor = None
+        pagina = 1
+        while True:
+            inicio = time.perf_counter()
+            resultados, cursor = self.gestor.buscar_reseñas(texto, id_juego=id_juego, cursor=cursor)
+            milisegundos = (time.perf_counter() - inicio) * 1000
+            if not resultados:
+                print("No se encontraron reseñas." if pagina == 1 else "No hay más resultados.")
+                return
+            usuarios = self.gestor.obtener_usuarios_por_ids([r.id_usuario for r in resultados])
+            print(f"\n--- Resultados (página {pagina}, {milisegundos:.1f} ms) ---")
+            for resultado in resultados:
+                usuario = usuarios.get(resultado.id_usuario)
+                nombre_usuario = usuario.nombre_usuario if usuario else "Desconocido"
+                print(f"  - {juegos.get(resultado.id_juego, resultado.id_juego)} | Usuario: {nombre_usuario}, "
+                      f"Puntuación: {resultado.puntuacion}/10: '{resultado.fragmento}'")
+            if cursor is None:
+                return
+            if input("\n¿Ver más resultados? (s/n): ").strip().lower() != 's':
+                return
+            pagina += 1
+
+    def mantener_indice_busqueda(self):
+        self._limpiar_pantalla()
+        print("--- MANTENIMIENTO DEL ÍNDICE DE BÚSQUEDA ---")
+        print("1. Reconstruir (vuelve a indexar todas las reseñas)")
+        print("2. Optimizar (fusiona los segmentos del índice)")
+        opcion = input("Selecciona una opción: ").strip()
+        inicio = time.perf_counter()
+        if opcion == '1':
+            self.gestor.reconstruir_indice_busqueda()
+        elif opcion == '2':
+            self.gestor.optimizar_indice_busqueda()
+        else:
+            print("Opción no válida.")
+            return
+        print(f"Completado en {time.perf_counter() - inicio:.2f} segundos.")
+
+    def ver_metricas(self):
+        self._limpiar_pantalla()
+        print("--- MÉTRICAS DE RENDIMIENTO (desde el arranque de este proceso) ---")
+        metricas = self.gestor.estadisticas_metricas()
+        print(f"\n{'métrica':<34}{'etiquetas':<34}{'total':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for nombre, series in metricas['histogramas'].items():
+            for etiquetas, datos in series.items():
+                if datos['total']:
+                    print(f"{nombre.removeprefix('resenas_'):<34}{etiquetas:<34}{datos['total']:>8}"
+                          f"{datos['p50'] * 1000:>8.3f}ms{datos['p95'] * 1000:>8.3f}ms{datos['p99'] * 1000:>8.3f}ms")
+        for nombre, series in metricas['contadores'].items():
+            for etiquetas, valor in series.items():
+                print(f"{nombre.removeprefix('resenas_'):<34}{etiquetas:<34}{valor:>8}")
+        envios = metricas['envios']
+        if envios['total']:
+            print(f"\nEnvíos: {envios['total']} (aceptadas {envios['tasa_aceptadas']:.1%}, duplicadas {envios['tasa_duplicadas']:.1%}, "
+                  f"limitadas {envios['tasa_limitadas']:.1%}, errores {envios['tasa_errores']:.1%})")
+        if input("\n¿Mostrar en formato Prometheus? (s/n): ").strip().lower() == 's':
+            print(self.gestor.metricas_prometheus())
+
     # Simulación de concurrencia
 
     def simular_hilos_concurrencia(self):
@@ -228,6 +368,7 @@ class InterfazConsola:
         for hilo in hilos:
             hilo.join()
 
+        vaciar_logging()
         print("\n--- Simulación con HILOS finalizada ---")
         juego_final = self.gestor.obtener_juego_por_id(juego_simulacion.id_juego)
         if juego_final:
@@ -246,7 +387,8 @@ class InterfazConsola:
         self._limpiar_pantalla()
         print("--- SIMULACIÓN DE CONFLICTO DE CONCURRENCIA (PROCESOS) ---")
         print("\nEste escenario simula a VARIOS PROCESOS intentando que un mismo USUARIO envíe reseñas al mismo juego al mismo tiempo.")
-        print("Los procesos no comparten locks de memoria, pero la restricción UNIQUE de la BD es la protección final.")
+        print("Los procesos no comparten locks de memoria: todos delegan la escritura en un único proceso escritor,")
+        print("que agrupa las reseñas en transacciones y rechaza los duplicados (la restricción UNIQUE de la BD sigue siendo la protección final).")
 
         juegos = self.gestor.obtener_juegos()
         if not juegos:
@@ -273,11 +415,18 @@ class InterfazConsola:
         num_procesos = 3
         print(f"\nCreando {num_procesos} procesos para que el usuario '{usuario_simulacion.nombre_usuario}' intente reseñar el juego '{juego_simulacion.nombre}' simultáneamente...")
 
+        # multiprocessing solo se importa al usar la simulación: no retrasa el arranque de la aplicación
+        import multiprocessing
+        from CapaLogicaDeNegocio.proceso_escritor import ProcesoEscritor
+        escritor = ProcesoEscritor()
+        clientes = [escritor.crear_cliente() for _ in range(num_procesos)]
+        escritor.iniciar()
+
         procesos = []
         for i in range(num_procesos):
             proceso = multiprocessing.Process(
                 target=_tarea_envio_reseña_procesos_target, # Ahora usa la función global
-                args=(i+1, juego_simulacion.id_juego, usuario_simulacion.id_usuario, 8, "Reseña de proceso simulada", "10.0.0.1"),
+                args=(i+1, juego_simulacion.id_juego, usuario_simulacion.id_usuario, 8, "Reseña de proceso simulada", "10.0.0.1", clientes[i]),
                 name=f"Proceso-{i+1}"
             )
             procesos.append(proceso)
@@ -285,6 +434,10 @@ class InterfazConsola:
 
         for proceso in procesos:
             proceso.join()
+        escritor.detener()
+
+        # Los procesos escribieron por su cuenta: lo que tenga la caché de este proceso puede estar desactualizado
+        self.gestor.invalidar_cache()
 
         print("\n--- Simulación con PROCESOS finalizada ---")
         juego_final = self.gestor.obtener_juego_por_id(juego_simulacion.id_juego)
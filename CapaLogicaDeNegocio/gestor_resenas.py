@@ -1,142 +1,435 @@
+import contextlib
 import sqlite3
-from CapaDeDatos.daos import JuegoDAO, UsuarioDAO, ReseñaDAO
-from CapaLogicaDeNegocio.modelos import Juego, Usuario, Reseña
+from CapaDeDatos.daos import JuegoDAO, ReseñaDAO, RESEÑA_ACEPTADA, RESEÑA_DUPLICADA, RESEÑA_INVALIDA, TAMAÑO_PAGINA
+from CapaDeDatos.cache import JuegoDAOConCache, UsuarioDAOConCache
+from CapaDeDatos.datos_base import sembrar_datos_base
+from CapaDeDatos.metricas import LockMedido, medir_operacion, obtener_logger, obtener_registro
+from CapaDeDatos.clasificacion import ClasificacionJuegos
+from CapaDeDatos.particiones import (JuegoDAOParticionadoConCache, ReseñaDAOParticionado, UsuarioDAOParticionadoConCache,
+                                     obtener_particiones)
+from CapaDeDatos.replica import obtener_replica
+from CapaLogicaDeNegocio.limitador import LimitadorEnvios
+from CapaLogicaDeNegocio.modelos import Juego, Usuario, Reseña, ReseñaConUsuario, ResultadoBusqueda, HistogramaPuntuaciones, PuntoTendencia, LoteReseñas
+import itertools
+import sys
+from datetime import datetime, timedelta, timezone
 import threading
-import multiprocessing
 import time
 
+NUM_FRANJAS_LOCK_ENVIO = 64
+TAMAÑO_LOTE_RESEÑAS = 500
+
+_log = obtener_logger(__name__)
+
+def _nombre_proceso():
+    # multiprocessing no se importa al arrancar: si ningún módulo lo ha importado, este es el proceso principal
+    multiprocessing = sys.modules.get('multiprocessing')
+    return multiprocessing.current_process().name if multiprocessing else 'MainProcess'
+
+def _inicio_semana(dia):
+    # 'YYYY-MM-DD' del lunes de la semana de 'dia'
+    fecha = datetime.strptime(dia, "%Y-%m-%d").date()
+    return (fecha - timedelta(days=fecha.weekday())).isoformat()
+
+
+class LocksEstriados:
+    # Reparte las claves entre un número fijo de locks: envíos con claves distintas no se bloquean entre sí
+    def __init__(self, num_franjas=NUM_FRANJAS_LOCK_ENVIO, nombre='envio_reseña'):
+        # Todas las franjas registran su espera en la misma métrica (ver metricas.LockMedido)
+        self._locks = [LockMedido(nombre) for _ in range(num_franjas)]
+
+    def para(self, *clave):
+        return self._locks[hash(clave) % len(self._locks)]
+
+
 class GestorResenas:
-    def __init__(self):
-        self.juego_dao = JuegoDAO()
-        self.usuario_dao = UsuarioDAO()
-        self.reseña_dao = ReseñaDAO()
-        self.lock_envio_reseña = threading.Lock() 
-        self.lock_actualizacion_juego = threading.Lock() 
+    def __init__(self, invalidacion_entre_procesos=False, cliente_escritor=None, replica_lectura=None, limitador=None):
+        # Juegos y usuarios se leen a través de una caché LRU; con invalidacion_entre_procesos
+        # también se descartan las entradas cuando otro proceso modifica esas tablas.
+        # Con cliente_escritor (ver proceso_escritor.py) las reseñas se delegan al proceso escritor y las lecturas siguen siendo locales.
+        # Con RESENAS_NUM_PARTICIONES (ver particiones.py) los mismos DAOs reparten los juegos y sus reseñas entre varias bases de datos.
+        self.cliente_escritor = cliente_escritor
+        if obtener_particiones():
+            self.juego_dao = JuegoDAOParticionadoConCache(invalidacion_entre_procesos=invalidacion_entre_procesos)
+            self.usuario_dao = UsuarioDAOParticionadoConCache(invalidacion_entre_procesos=invalidacion_entre_procesos)
+            self.reseña_dao = ReseñaDAOParticionado()
+        else:
+            self.juego_dao = JuegoDAOConCache(invalidacion_entre_procesos=invalidacion_entre_procesos)
+            self.usuario_dao = UsuarioDAOConCache(invalidacion_entre_procesos=invalidacion_entre_procesos)
+            self.reseña_dao = ReseñaDAO()
+        # Con replica_lectura (o RESENAS_REPLICA_LECTURA, ver replica.py) los listados y las reseñas se leen de una copia
+        # en memoria con un retraso acotado; las lecturas por ID siguen yendo a las cachés.
+        self.replica_lectura = replica_lectura or obtener_replica()
+        if self.replica_lectura and obtener_particiones():
+            raise ValueError("La réplica de lectura no admite una base de datos particionada.")
+        if self.replica_lectura:
+            self.lectura_juego_dao = JuegoDAO(self.replica_lectura)
+            self.lectura_reseña_dao = ReseñaDAO(self.replica_lectura)
+        else:
+            self.lectura_juego_dao = self.juego_dao
+            self.lectura_reseña_dao = self.reseña_dao
+        self.clasificacion = ClasificacionJuegos(self.juego_dao, invalidacion_entre_procesos=invalidacion_entre_procesos)
+        self.lock_envio_reseña = LocksEstriados() # un lock por franja de (id_juego, id_usuario)
+        # Límites de envíos por IP y por usuario (ver limitador.py), comprobados antes de cualquier acceso a la BD
+        self.limitador = limitador or LimitadorEnvios()
+        self.lock_actualizacion_juego = LockMedido('actualizacion_juego')
+        self.metricas = obtener_registro()
 
         self._inicializar_datos_base()
 
     def _inicializar_datos_base(self):
-        print("\n--- Inicializando datos base (GestorResenas) ---")
-        # Insertar juegos si no existen
-        if not self.juego_dao.obtener_juego_por_nombre("The Witcher 3"):
-            self.juego_dao.insertar_juego("The Witcher 3", "Un RPG épico de fantasía oscura.")
-        if not self.juego_dao.obtener_juego_por_nombre("Cyberpunk 2077"):
-            self.juego_dao.insertar_juego("Cyberpunk 2077", "Un RPG futurista en un mundo distópico.")
-        if not self.juego_dao.obtener_juego_por_nombre("Elden Ring"):
-            self.juego_dao.insertar_juego("Elden Ring", "Un desafiante ARPG de mundo abierto.")
-
-        # Insertar usuarios si no existen
-        if not self.usuario_dao.obtener_usuario_por_nombre("Usuario Normal 1"):
-            self.usuario_dao.insertar_usuario("Usuario Normal 1", "usuario_normal")
-        if not self.usuario_dao.obtener_usuario_por_nombre("Usuario Normal 2"):
-            self.usuario_dao.insertar_usuario("Usuario Normal 2", "usuario_normal")
-        if not self.usuario_dao.obtener_usuario_por_nombre("Critico Pro"):
-            self.usuario_dao.insertar_usuario("Critico Pro", "critico")
-        if not self.usuario_dao.obtener_usuario_por_nombre("Gamer X"):
-            self.usuario_dao.insertar_usuario("Gamer X", "usuario_normal")
-        if not self.usuario_dao.obtener_usuario_por_nombre("Developer Y"):
-            self.usuario_dao.insertar_usuario("Developer Y", "critico")
-
-        print("--- Datos base inicializados. ---\n")
-
-
-    def _mapear_datos_a_objeto(self, datos, clase_modelo):
-        if not datos:
-            return None
-        return clase_modelo(*datos)
+        # Juegos y usuarios de CapaDeDatos/datos_base.json en una transacción; si ya están (misma versión), una consulta
+        if sembrar_datos_base(self.juego_dao, self.usuario_dao):
+            self.clasificacion.invalidar()
 
+    # Los DAOs construyen los modelos directamente con su row_factory (parámetro fabrica)
+
+    @medir_operacion
     def obtener_juegos(self):
-        juegos_raw = self.juego_dao.obtener_todos_los_juegos()
-        return [self._mapear_datos_a_objeto(j, Juego) for j in juegos_raw]
+        return self.lectura_juego_dao.obtener_todos_los_juegos(fabrica=Juego)
 
     def obtener_usuarios(self):
-        usuarios_raw = self.usuario_dao.obtener_todos_los_usuarios()
-        return [self._mapear_datos_a_objeto(u, Usuario) for u in usuarios_raw]
+        return self.usuario_dao.obtener_todos_los_usuarios(fabrica=Usuario)
 
+    @medir_operacion
     def obtener_juego_por_id(self, id_juego):
-        juego_raw = self.juego_dao.obtener_juego_por_id(id_juego)
-        return self._mapear_datos_a_objeto(juego_raw, Juego)
+        return self.juego_dao.obtener_juego_por_id(id_juego, fabrica=Juego)
 
     def obtener_usuario_por_id(self, id_usuario):
-        usuario_raw = self.usuario_dao.obtener_usuario_por_id(id_usuario)
-        return self._mapear_datos_a_objeto(usuario_raw, Usuario)
+        return self.usuario_dao.obtener_usuario_por_id(id_usuario, fabrica=Usuario)
     
     def obtener_usuario_por_nombre(self, nombre_usuario):
-        usuario_raw = self.usuario_dao.obtener_usuario_por_nombre(nombre_usuario)
-        return self._mapear_datos_a_objeto(usuario_raw, Usuario)
+        return self.usuario_dao.obtener_usuario_por_nombre(nombre_usuario, fabrica=Usuario)
 
-    def obtener_reseñas_por_juego(self, id_juego):
-        reseñas_raw = self.reseña_dao.obtener_reseñas_por_juego(id_juego)
-        return [self._mapear_datos_a_objeto(r, Reseña) for r in reseñas_raw]
+    def obtener_usuarios_por_ids(self, ids_usuarios):
+        return {u.id_usuario: u for u in self.usuario_dao.obtener_usuarios_por_ids(ids_usuarios, fabrica=Usuario)}
 
-    def _recalcular_puntuacion_media_juego(self, id_juego):
-        total_reseñas, puntuacion_acumulada = self.reseña_dao.obtener_total_reseñas_y_puntuacion_acumulada_para_juego(id_juego)
-        
-        puntuacion_media = puntuacion_acumulada / total_reseñas if total_reseñas > 0 else 0.0
-        
+    @medir_operacion
+    def obtener_reseñas_por_juego(self, id_juego):
+        return self.lectura_reseña_dao.obtener_reseñas_por_juego(id_juego, fabrica=Reseña)
+
+    @medir_operacion
+    def obtener_lote_reseñas_por_juego(self, id_juego, incluir_texto=True):
+        # Carga masiva para análisis: columnas en arrays en lugar de un objeto Reseña por fila
+        # Sin texto basta el índice de cobertura: no se lee la tabla
+        lote = LoteReseñas(incluir_texto)
+        if incluir_texto:
+            lote.extender(self.lectura_reseña_dao.iterar_reseñas_por_juego(id_juego, orden='antiguas'))
+        else:
+            lote.extender(self.lectura_reseña_dao.iterar_puntuaciones_por_juego(id_juego))
+        return lote
+
+    # Variantes en streaming y paginadas por cursor: no cargan la tabla entera en memoria
+
+    def iterar_juegos(self):
+        return self.lectura_juego_dao.iterar_juegos(fabrica=Juego)
+
+    def iterar_usuarios(self):
+        return self.usuario_dao.iterar_usuarios(fabrica=Usuario)
+
+    def iterar_reseñas_por_juego(self, id_juego, orden='recientes'):
+        return self.lectura_reseña_dao.iterar_reseñas_por_juego(id_juego, orden, fabrica=Reseña)
+
+    @medir_operacion
+    def obtener_pagina_juegos(self, cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        juegos_raw, siguiente_cursor = self.lectura_juego_dao.obtener_pagina_juegos(cursor, tamaño_pagina)
+        return [Juego(*j) for j in juegos_raw], siguiente_cursor
+
+    @medir_operacion
+    def obtener_pagina_reseñas_por_juego(self, id_juego, orden='recientes', cursor=None, tamaño_pagina=TAMAÑO_PAGINA):
+        reseñas_raw, siguiente_cursor = self.lectura_reseña_dao.obtener_pagina_reseñas_por_juego(id_juego, orden, cursor, tamaño_pagina)
+        return [Reseña(*r) for r in reseñas_raw], siguiente_cursor
+
+    def obtener_reseñas_por_usuario(self, id_usuario):
+        return self.lectura_reseña_dao.obtener_reseñas_por_usuario(id_usuario, fabrica=Reseña)
+
+    def obtener_puntuaciones_por_usuario(self, id_usuario):
+        # [(id_reseña, id_juego, puntuacion)]: sin el texto de las reseñas, solo desde el índice
+        return self.lectura_reseña_dao.obtener_puntuaciones_por_usuario(id_usuario)
+
+    def obtener_reseñas_con_usuario_por_juego(self, id_juego):
+        return self.lectura_reseña_dao.obtener_reseñas_con_usuario_por_juego(id_juego, fabrica=ReseñaConUsuario)
+
+    @medir_operacion
+    def buscar_reseñas(self, texto, id_juego=None, limite=TAMAÑO_PAGINA, cursor=None):
+        # Búsqueda de texto completo (FTS5) ordenada por relevancia BM25; devuelve (resultados, siguiente_cursor)
+        resultados_raw, siguiente_cursor = self.lectura_reseña_dao.buscar_reseñas(texto, id_juego, cursor, limite)
+        return [ResultadoBusqueda(*r) for r in resultados_raw], siguiente_cursor
+
+    def reconstruir_indice_busqueda(self):
+        self.reseña_dao.reconstruir_indice_busqueda()
+        _log.info("Índice de búsqueda de reseñas reconstruido.")
+
+    def optimizar_indice_busqueda(self):
+        self.reseña_dao.optimizar_indice_busqueda()
+        _log.info("Índice de búsqueda de reseñas optimizado.")
+
+    def estadisticas_cache(self):
+        return {
+            'juegos': self.juego_dao.cache.estadisticas(),
+            'usuarios': self.usuario_dao.cache.estadisticas(),
+        }
+
+    def estadisticas_limitador(self):
+        return self.limitador.estadisticas()
+
+    def estadisticas_metricas(self):
+        # Instantánea del registro de métricas (ver CapaDeDatos/metricas.py) más las tasas de los envíos individuales
+        instantanea = self.metricas.instantanea()
+        envios = {clave.split("=", 1)[1]: valor for clave, valor in instantanea['contadores'].get('resenas_envios_total', {}).items()}
+        total = sum(envios.values())
+        aceptadas, duplicadas, limitadas = envios.get(RESEÑA_ACEPTADA, 0), envios.get(RESEÑA_DUPLICADA, 0), envios.get('limitada', 0)
+        instantanea['envios'] = {
+            'total': total,
+            'tasa_aceptadas': aceptadas / total if total else 0.0,
+            'tasa_duplicadas': duplicadas / total if total else 0.0,
+            'tasa_limitadas': limitadas / total if total else 0.0,
+            'tasa_errores': (total - aceptadas - duplicadas - limitadas) / total if total else 0.0,
+        }
+        return instantanea
+
+    def metricas_prometheus(self):
+        return self.metricas.texto_prometheus()
+
+    def invalidar_cache(self):
+        self.juego_dao.invalidar_todo()
+        self.usuario_dao.invalidar_todo()
+
+    def reparar_puntuaciones(self, id_juego=None):
+        # Las puntuaciones se mantienen de forma incremental al registrar cada reseña;
+        # esto las reconstruye desde cero (todas o las de un juego) si llegaran a desincronizarse.
         with self.lock_actualizacion_juego:
-            self.juego_dao.actualizar_puntuacion_juego(id_juego, puntuacion_media, total_reseñas, puntuacion_acumulada)
-            print(f"DEBUG: Juego ID {id_juego} - Media: {puntuacion_media:.2f}, Total: {total_reseñas}, Acumulado: {puntuacion_acumulada}")
+            recalculado = self.juego_dao.recalcular_puntuaciones(id_juego)
+        self.clasificacion.invalidar()
+        return recalculado
 
+    # Clasificación por media bayesiana (puntuacion_ponderada): un juego con una sola reseña de 10
+    # no supera a otro con miles de nueves, porque ambos se acercan a la media global según sus votos.
 
+    @medir_operacion
+    def obtener_clasificacion(self, limite=10):
+        # Los 'limite' mejores juegos, leídos por idx_juegos_clasificacion
+        return self.lectura_juego_dao.obtener_mejores_juegos(limite, fabrica=Juego)
+
+    @medir_operacion
+    def obtener_posicion_juego(self, id_juego):
+        # Posición del juego en la clasificación (1 = primero) en O(log n), o None si no existe
+        return self.clasificacion.posicion(id_juego)
+
+    def recalibrar_clasificacion(self, votos_previos=None):
+        # Actualiza la media previa a la media global actual (la de Metadatos se fija al crear el esquema)
+        with self.lock_actualizacion_juego:
+            recalibrado = self.juego_dao.recalibrar_clasificacion(votos_previos)
+        self.clasificacion.invalidar()
+        return recalibrado
+
+    @medir_operacion
+    def obtener_histograma_juego(self, id_juego):
+        # Distribución de puntuaciones desde JuegoHistograma (sin leer Reseñas); None si el juego no existe
+        if not self.obtener_juego_por_id(id_juego):
+            return None
+        return HistogramaPuntuaciones(id_juego, self.lectura_juego_dao.obtener_histograma(id_juego))
+
+    def verificar_histogramas(self, reparar=False):
+        # Devuelve los juegos cuyo histograma no coincide con Reseñas; con reparar=True los reconstruye
+        discrepancias = self.juego_dao.verificar_histogramas()
+        if reparar:
+            for id_juego, _, _ in discrepancias:
+                self.juego_dao.reconstruir_histogramas(id_juego)
+        return discrepancias
+
+    @medir_operacion
+    def obtener_tendencia(self, id_juego, granularidad='dia', periodos=90, hasta=None):
+        # Serie de 'periodos' puntos ('hora', 'dia' o 'semana', en UTC) que termina en el periodo de 'hasta' (por defecto, ahora).
+        # Se lee de los rollups: el coste depende del número de periodos, no del número de reseñas. En bases de datos
+        # anteriores a los rollups, las reseñas antiguas cuentan tras el relleno (python -m CapaDeDatos.mantenimiento rollups).
+        if granularidad not in ('hora', 'dia', 'semana'):
+            raise ValueError(f"Granularidad desconocida: '{granularidad}'. Opciones: hora, dia, semana")
+        hasta = hasta or datetime.now(timezone.utc)
+        if granularidad == 'hora':
+            ultimo = hasta.replace(minute=0, second=0, microsecond=0)
+            inicios = [(ultimo - timedelta(hours=i)).strftime("%Y-%m-%d %H:00") for i in range(periodos - 1, -1, -1)]
+            filas = self.lectura_reseña_dao.obtener_rollups(id_juego, 'hora', inicios[0], inicios[-1])
+            return self._puntos_tendencia(inicios, filas, lambda hora: hora)
+
+        if granularidad == 'dia':
+            inicios = [(hasta.date() - timedelta(days=i)).isoformat() for i in range(periodos - 1, -1, -1)]
+            filas = self.lectura_reseña_dao.obtener_rollups(id_juego, 'dia', inicios[0], inicios[-1])
+            return self._puntos_tendencia(inicios, filas, lambda dia: dia)
+
+        # Semanas de lunes a domingo, sumando los rollups diarios
+        ultimo = hasta.date() - timedelta(days=hasta.weekday())
+        inicios = [(ultimo - timedelta(weeks=i)).isoformat() for i in range(periodos - 1, -1, -1)]
+        filas = self.lectura_reseña_dao.obtener_rollups(id_juego, 'dia', inicios[0], hasta.date().isoformat())
+        return self._puntos_tendencia(inicios, filas, _inicio_semana)
+
+    def _puntos_tendencia(self, inicios, filas, periodo_de):
+        # Reparte las filas de rollup en los periodos pedidos; los periodos sin reseñas quedan a cero
+        puntos = {inicio: PuntoTendencia(inicio) for inicio in inicios}
+        for periodo, total_reseñas, puntuacion_acumulada in filas:
+            punto = puntos.get(periodo_de(periodo))
+            if punto is not None:
+                punto.total_reseñas += total_reseñas
+                punto.puntuacion_acumulada += puntuacion_acumulada
+        return list(puntos.values())
+
+    def _actualizar_clasificacion(self, *ids_juegos):
+        # Recoloca en la clasificación en memoria los juegos con reseñas nuevas (ya invalidados en la caché)
+        if not self.clasificacion.esta_activa():
+            return
+        for id_juego in ids_juegos:
+            juego = self.obtener_juego_por_id(id_juego)
+            if juego:
+                self.clasificacion.actualizar(id_juego, juego.puntuacion_ponderada)
+
+    @medir_operacion
     def enviar_reseña(self, id_juego, id_usuario, puntuacion, contenido="", origen_simulado_ip=""):
+        motivo = self.limitador.comprobar(origen_simulado_ip, id_usuario)
+        if motivo:
+            self.metricas.incrementar('resenas_envios_total', resultado='limitada')
+            _log.warning("Hilo/Proceso %s o %s: Reseña rechazada por el limitador de envíos (%s, IP '%s', usuario %s).",
+                         threading.current_thread().name, _nombre_proceso(), motivo, origen_simulado_ip, id_usuario)
+            return False
+
         # Verificamos si el usuario y el juego existen y los mapeamos a objetos de modelo
         # FIX: Mapear las tuplas a objetos de modelo
-        juego = self._mapear_datos_a_objeto(self.juego_dao.obtener_juego_por_id(id_juego), Juego)
-        usuario = self._mapear_datos_a_objeto(self.usuario_dao.obtener_usuario_por_id(id_usuario), Usuario)
+        juego = self.obtener_juego_por_id(id_juego)
+        usuario = self.obtener_usuario_por_id(id_usuario)
 
         if not juego:
-            print(f"Error: El juego con ID {id_juego} no existe.")
+            self.metricas.incrementar('resenas_envios_total', resultado='inexistente')
+            _log.warning("Error: El juego con ID %s no existe.", id_juego)
             return False
         if not usuario:
-            print(f"Error: El usuario con ID {id_usuario} no existe.")
+            self.metricas.incrementar('resenas_envios_total', resultado='inexistente')
+            _log.warning("Error: El usuario con ID %s no existe.", id_usuario)
             return False
-        
-        #Logica de Concurrencia (Exclusión Mutua)
-        with self.lock_envio_reseña:
-            print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: Intentando enviar reseña...")
-            
-            time.sleep(0.01)
 
-            if self.reseña_dao.verificar_existencia_reseña(id_juego, id_usuario):
-                print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: "
-                    f"El usuario '{usuario.nombre_usuario}' (ID: {id_usuario}) ya ha enviado una reseña para '{juego.nombre}' (ID: {id_juego}). Reseña rechazada.")
-                return False
+        if self.cliente_escritor is not None:
+            return self._enviar_reseña_a_proceso_escritor(juego, usuario, puntuacion, contenido, origen_simulado_ip)
+        
+        #Logica de Concurrencia: solo se serializan los envíos del mismo (juego, usuario);
+        #la transacción y la restricción UNIQUE de la BD garantizan que no haya duplicados entre procesos
+        with self.lock_envio_reseña.para(id_juego, id_usuario):
+            _log.debug("Hilo/Proceso %s o %s: Intentando enviar reseña...", threading.current_thread().name, _nombre_proceso())
 
             try:
-                id_reseña = self.reseña_dao.insertar_reseña(id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip)
+                id_reseña = self.reseña_dao.registrar_reseña(id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip)
                 if id_reseña:
-                    print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: "
-                        f"Reseña enviada exitosamente por '{usuario.nombre_usuario}' para '{juego.nombre}' (Puntuación: {puntuacion}).")
-                    
-                    self._recalcular_puntuacion_media_juego(id_juego)
+                    self.juego_dao.invalidar(id_juego)
+                    self._actualizar_clasificacion(id_juego)
+                    self.metricas.incrementar('resenas_envios_total', resultado=RESEÑA_ACEPTADA)
+                    _log.debug("Hilo/Proceso %s o %s: Reseña enviada exitosamente por '%s' para '%s' (Puntuación: %s).",
+                               threading.current_thread().name, _nombre_proceso(), usuario.nombre_usuario, juego.nombre, puntuacion)
                     return True
                 else:
-                    print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: "
-                        f"Fallo al enviar reseña. Es posible que ya exista una reseña de este usuario para este juego (duplicado detectado).")
+                    self.metricas.incrementar('resenas_envios_total', resultado=RESEÑA_DUPLICADA)
+                    _log.warning("Hilo/Proceso %s o %s: El usuario '%s' (ID: %s) ya ha enviado una reseña para '%s' (ID: %s). Reseña rechazada.",
+                                 threading.current_thread().name, _nombre_proceso(), usuario.nombre_usuario, id_usuario, juego.nombre, id_juego)
                     return False
             except sqlite3.IntegrityError as e:
-                print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: "
-                    f"Error de integridad (posible duplicado) al intentar insertar reseña: {e}")
+                self.metricas.incrementar('resenas_envios_total', resultado='error')
+                _log.error("Hilo/Proceso %s o %s: Error de integridad al intentar insertar reseña: %s",
+                           threading.current_thread().name, _nombre_proceso(), e)
                 return False
             except Exception as e:
-                print(f"Hilo/Proceso {threading.current_thread().name} o {multiprocessing.current_process().name}: "
-                    f"Error inesperado al enviar reseña: {e}")
+                self.metricas.incrementar('resenas_envios_total', resultado='error')
+                _log.error("Hilo/Proceso %s o %s: Error inesperado al enviar reseña: %s",
+                           threading.current_thread().name, _nombre_proceso(), e)
                 return False
 
+    def _enviar_reseña_a_proceso_escritor(self, juego, usuario, puntuacion, contenido, origen_simulado_ip):
+        _log.debug("Hilo/Proceso %s o %s: Enviando reseña al proceso escritor...", threading.current_thread().name, _nombre_proceso())
+        try:
+            estado = self.cliente_escritor.enviar_reseña(juego.id_juego, usuario.id_usuario, puntuacion, contenido, origen_simulado_ip)
+        except Exception as e:
+            # Colas cerradas o rotas: la reseña no llegó al proceso escritor
+            _log.error("Hilo/Proceso %s o %s: Error al comunicarse con el proceso escritor: %s",
+                       threading.current_thread().name, _nombre_proceso(), e)
+            estado = 'error'
+        self.metricas.incrementar('resenas_envios_total', resultado=estado)
+        if estado == RESEÑA_ACEPTADA:
+            self.juego_dao.invalidar(juego.id_juego)
+            self._actualizar_clasificacion(juego.id_juego)
+            _log.debug("Hilo/Proceso %s o %s: Reseña enviada exitosamente por '%s' para '%s' (Puntuación: %s).",
+                       threading.current_thread().name, _nombre_proceso(), usuario.nombre_usuario, juego.nombre, puntuacion)
+            return True
+        if estado == RESEÑA_DUPLICADA:
+            _log.warning("Hilo/Proceso %s o %s: El usuario '%s' (ID: %s) ya ha enviado una reseña para '%s' (ID: %s). Reseña rechazada.",
+                         threading.current_thread().name, _nombre_proceso(), usuario.nombre_usuario, usuario.id_usuario, juego.nombre, juego.id_juego)
+        else:
+            _log.warning("Hilo/Proceso %s o %s: El proceso escritor rechazó la reseña (estado: %s).",
+                         threading.current_thread().name, _nombre_proceso(), estado)
+        return False
+
+    @medir_operacion
+    def enviar_reseñas_lote(self, reseñas, tamaño_lote=TAMAÑO_LOTE_RESEÑAS):
+        # Ingesta masiva: consume el iterable por bloques de tamaño_lote, cada uno en una sola transacción.
+        # Cada reseña puede ser una tupla (id_juego, id_usuario, puntuacion[, contenido[, origen_simulado_ip]]) o un dict.
+        inicio = time.perf_counter()
+        estados = []
+        iterador = iter(reseñas)
+        while True:
+            bloque = [self._normalizar_reseña_lote(r) for r in itertools.islice(iterador, tamaño_lote)]
+            if not bloque:
+                break
+            try:
+                estados_bloque = self.reseña_dao.insertar_reseñas_lote(bloque)
+            except sqlite3.Error as e:
+                _log.error("Error al insertar el lote de reseñas (filas %s a %s): %s", len(estados), len(estados) + len(bloque) - 1, e)
+                raise
+            juegos_actualizados = {fila[0] for fila, estado in zip(bloque, estados_bloque) if estado == RESEÑA_ACEPTADA}
+            self.juego_dao.invalidar(*juegos_actualizados)
+            self._actualizar_clasificacion(*juegos_actualizados)
+            estados.extend(estados_bloque)
+
+        segundos = time.perf_counter() - inicio
+        resumen = {
+            'total': len(estados),
+            'aceptadas': estados.count(RESEÑA_ACEPTADA),
+            'duplicadas': estados.count(RESEÑA_DUPLICADA),
+            'invalidas': estados.count(RESEÑA_INVALIDA),
+            'estados': estados,
+            'segundos': segundos,
+            'filas_por_segundo': len(estados) / segundos if segundos > 0 else 0.0,
+        }
+        _log.info("Lote procesado: %s reseñas (%s aceptadas, %s duplicadas, %s inválidas) en %.2fs (%.0f filas/s).",
+                  resumen['total'], resumen['aceptadas'], resumen['duplicadas'], resumen['invalidas'], segundos, resumen['filas_por_segundo'])
+        return resumen
+
+    def _normalizar_reseña_lote(self, reseña):
+        if isinstance(reseña, dict):
+            return (reseña.get('id_juego'), reseña.get('id_usuario'), reseña.get('puntuacion'),
+                    reseña.get('contenido', ""), reseña.get('origen_simulado_ip', ""))
+        id_juego, id_usuario, puntuacion, *resto = reseña
+        contenido = resto[0] if len(resto) > 0 else ""
+        origen_simulado_ip = resto[1] if len(resto) > 1 else ""
+        return (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip)
+
+    def _lectura_coherente(self):
+        # Con réplica, el juego y sus reseñas se leen con la misma conexión: de la misma generación de la copia
+        return self.replica_lectura.conexion() if self.replica_lectura else contextlib.nullcontext()
+
+    @medir_operacion
     def obtener_detalles_juego_con_reseñas(self, id_juego):
-        juego_obj = self.obtener_juego_por_id(id_juego)
-        if not juego_obj:
-            return None, []
-        
-        reseñas_obj = []
-        reseñas_raw = self.reseña_dao.obtener_reseñas_por_juego(id_juego)
-        for r in reseñas_raw:
-            reseñas_obj.append(self._mapear_datos_a_objeto(r, Reseña))
-        
-        return juego_obj, reseñas_obj
+        with self._lectura_coherente():
+            juego_obj = self.lectura_juego_dao.obtener_juego_por_id(id_juego, fabrica=Juego)
+            if not juego_obj:
+                return None, []
+            
+            return juego_obj, self.obtener_reseñas_por_juego(id_juego)
+
+    @medir_operacion
+    def obtener_detalles_juego_con_reseñas_y_usuarios(self, id_juego):
+        # Igual que obtener_detalles_juego_con_reseñas, pero cada reseña trae nombre y tipo del usuario (sin consultas N+1)
+        with self._lectura_coherente():
+            juego_obj = self.lectura_juego_dao.obtener_juego_por_id(id_juego, fabrica=Juego)
+            if not juego_obj:
+                return None, []
+            return juego_obj, self.obtener_reseñas_con_usuario_por_juego(id_juego)
 
 if __name__ == '__main__':
+    import multiprocessing
     from CapaDeDatos.conexion_bd import crear_tablas
     crear_tablas()
 
@@ -246,6 +539,7 @@ if __name__ == '__main__':
 
             for proceso in procesos:
                 proceso.join()
+            gestor.invalidar_cache()
 
             print("\n--- Simulación con PROCESOS finalizada ---")
             juego_final = gestor.obtener_juego_por_id(id_juego_cyberpunk)
@@ -271,8 +565,7 @@ if __name__ == '__main__':
         if juego_thewitcher_final_final:
             print(f"Juego: {juego_thewitcher_final_final.nombre}, Puntuación Media: {juego_thewitcher_final_final.puntuacion_media:.2f}, Total Reseñas: {juego_thewitcher_final_final.total_reseñas}")
             print("Reseñas detalladas:")
-            reseñas_detalles = gestor.obtener_reseñas_por_juego(id_juego_thewitcher)
+            reseñas_detalles = gestor.obtener_reseñas_con_usuario_por_juego(id_juego_thewitcher)
             for r in reseñas_detalles:
-                usuario_reseña = gestor.obtener_usuario_por_id(r.id_usuario)
-                nombre_usuario = usuario_reseña.nombre_usuario if usuario_reseña else "Desconocido"
+                nombre_usuario = r.nombre_usuario or "Desconocido"
                 print(f"  - Usuario: {nombre_usuario}, Puntuación: {r.puntuacion} - '{r.contenido}'")
\ No newline at end of file
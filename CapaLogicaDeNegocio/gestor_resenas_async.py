@@ -0,0 +1,158 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from CapaDeDatos.conexion_bd import TAMAÑO_MAXIMO_POOL
+from CapaLogicaDeNegocio.gestor_resenas import GestorResenas
+
+MAX_LECTURAS_CONCURRENTES = TAMAÑO_MAXIMO_POOL - 1 # se deja una conexión del pool para el escritor
+MAX_ESCRITURAS_PENDIENTES = 100
+
+
+def _lectura(nombre_metodo):
+    async def metodo(self, *args, **kwargs):
+        self._comprobar_iniciado()
+        return await self._leer(getattr(self.gestor, nombre_metodo), *args, **kwargs)
+    metodo.__name__ = nombre_metodo
+    return metodo
+
+def _escritura(nombre_metodo):
+    async def metodo(self, *args, **kwargs):
+        self._comprobar_iniciado()
+        return await self._escribir(getattr(self.gestor, nombre_metodo), *args, **kwargs)
+    metodo.__name__ = nombre_metodo
+    return metodo
+
+
+class AsyncGestorResenas:
+    # Fachada asyncio de GestorResenas: cada llamada bloqueante de sqlite3 se ejecuta en hilos propios.
+    # Las lecturas se solapan en un pool de hilos limitado por un semáforo; las escrituras pasan por una
+    # cola acotada (contrapresión) que consume una única tarea escritora sobre un hilo dedicado.
+    def __init__(self, gestor=None, max_lecturas_concurrentes=MAX_LECTURAS_CONCURRENTES,
+                 max_escrituras_pendientes=MAX_ESCRITURAS_PENDIENTES):
+        self.gestor = gestor
+        self.max_lecturas_concurrentes = max_lecturas_concurrentes
+        self.max_escrituras_pendientes = max_escrituras_pendientes
+        self._ejecutor_lecturas = ThreadPoolExecutor(max_workers=max_lecturas_concurrentes, thread_name_prefix="LectorResenas")
+        self._ejecutor_escritura = ThreadPoolExecutor(max_workers=1, thread_name_prefix="EscritorResenas")
+        self._semaforo_lecturas = None
+        self._cola_escrituras = None
+        self._tarea_escritora = None
+
+    async def iniciar(self):
+        loop = asyncio.get_running_loop()
+        if self.gestor is None:
+            # La construcción de GestorResenas inserta los datos base: también fuera del bucle de eventos
+            self.gestor = await loop.run_in_executor(self._ejecutor_escritura, GestorResenas)
+        self._semaforo_lecturas = asyncio.Semaphore(self.max_lecturas_concurrentes)
+        self._cola_escrituras = asyncio.Queue(maxsize=self.max_escrituras_pendientes)
+        self._tarea_escritora = asyncio.create_task(self._bucle_escritor(), name="EscritorResenas")
+        return self
+
+    async def cerrar(self):
+        # Termina las escrituras ya encoladas antes de liberar los hilos
+        if self._tarea_escritora is not None:
+            await self._cola_escrituras.put(None)
+            await self._tarea_escritora
+            self._tarea_escritora = None
+        self._ejecutor_lecturas.shutdown(wait=True)
+        self._ejecutor_escritura.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return await self.iniciar()
+
+    async def __aexit__(self, tipo_excepcion, excepcion, traza):
+        await self.cerrar()
+
+    def _comprobar_iniciado(self):
+        # Lecturas y escrituras necesitan el gestor, el semáforo y la tarea escritora que crea iniciar()
+        if self._tarea_escritora is None:
+            raise RuntimeError("AsyncGestorResenas no está iniciado (usa 'await iniciar()' o 'async with').")
+
+    async def _leer(self, funcion, *args, **kwargs):
+        self._comprobar_iniciado()
+        async with self._semaforo_lecturas:
+            loop = asyncio.get_running_loop()
+            # Si la corrutina se cancela, el hilo termina la consulta en curso pero el resultado se descarta
+            return await loop.run_in_executor(self._ejecutor_lecturas, functools.partial(funcion, *args, **kwargs))
+
+    async def _escribir(self, funcion, *args, **kwargs):
+        self._comprobar_iniciado()
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola_escrituras.put((futuro, functools.partial(funcion, *args, **kwargs)))
+        return await futuro
+
+    async def _bucle_escritor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            elemento = await self._cola_escrituras.get()
+            try:
+                if elemento is None:
+                    return
+                futuro, operacion = elemento
+                if futuro.cancelled():
+                    continue # el llamante se canceló antes de que llegara su turno: no se escribe nada
+                try:
+                    resultado = await asyncio.shield(loop.run_in_executor(self._ejecutor_escritura, operacion))
+                except Exception as e:
+                    if not futuro.cancelled():
+                        futuro.set_exception(e)
+                else:
+                    if not futuro.cancelled():
+                        futuro.set_result(resultado)
+            finally:
+                self._cola_escrituras.task_done()
+
+    def escrituras_pendientes(self):
+        return self._cola_escrituras.qsize() if self._cola_escrituras is not None else 0
+
+    # Lecturas (concurrentes)
+    obtener_juegos = _lectura('obtener_juegos')
+    obtener_usuarios = _lectura('obtener_usuarios')
+    obtener_juego_por_id = _lectura('obtener_juego_por_id')
+    obtener_usuario_por_id = _lectura('obtener_usuario_por_id')
+    obtener_usuario_por_nombre = _lectura('obtener_usuario_por_nombre')
+    obtener_usuarios_por_ids = _lectura('obtener_usuarios_por_ids')
+    obtener_reseñas_por_juego = _lectura('obtener_reseñas_por_juego')
+    obtener_reseñas_por_usuario = _lectura('obtener_reseñas_por_usuario')
+    obtener_puntuaciones_por_usuario = _lectura('obtener_puntuaciones_por_usuario')
+    obtener_reseñas_con_usuario_por_juego = _lectura('obtener_reseñas_con_usuario_por_juego')
+    obtener_lote_reseñas_por_juego = _lectura('obtener_lote_reseñas_por_juego')
+    obtener_pagina_juegos = _lectura('obtener_pagina_juegos')
+    obtener_pagina_reseñas_por_juego = _lectura('obtener_pagina_reseñas_por_juego')
+    obtener_detalles_juego_con_reseñas = _lectura('obtener_detalles_juego_con_reseñas')
+    obtener_detalles_juego_con_reseñas_y_usuarios = _lectura('obtener_detalles_juego_con_reseñas_y_usuarios')
+    buscar_reseñas = _lectura('buscar_reseñas')
+    obtener_clasificacion = _lectura('obtener_clasificacion')
+    obtener_posicion_juego = _lectura('obtener_posicion_juego')
+    obtener_histograma_juego = _lectura('obtener_histograma_juego')
+    obtener_tendencia = _lectura('obtener_tendencia')
+    estadisticas_cache = _lectura('estadisticas_cache')
+
+    # Escrituras (serializadas por la tarea escritora)
+    enviar_reseña = _escritura('enviar_reseña')
+    enviar_reseñas_lote = _escritura('enviar_reseñas_lote')
+    reparar_puntuaciones = _escritura('reparar_puntuaciones')
+    reconstruir_indice_busqueda = _escritura('reconstruir_indice_busqueda')
+    optimizar_indice_busqueda = _escritura('optimizar_indice_busqueda')
+    recalibrar_clasificacion = _escritura('recalibrar_clasificacion')
+    verificar_histogramas = _escritura('verificar_histogramas')
+
+
+if __name__ == '__main__':
+    from CapaDeDatos.conexion_bd import crear_tablas
+
+    async def demostracion():
+        async with AsyncGestorResenas() as gestor:
+            juegos, usuarios = await asyncio.gather(gestor.obtener_juegos(), gestor.obtener_usuarios())
+            print(f"{len(juegos)} juegos y {len(usuarios)} usuarios leídos en paralelo.")
+            resultados = await asyncio.gather(*(
+                gestor.enviar_reseña(juegos[0].id_juego, usuario.id_usuario, 8, "Reseña desde asyncio", "127.0.0.1")
+                for usuario in usuarios
+            ))
+            print(f"Reseñas aceptadas: {sum(resultados)} de {len(resultados)}")
+            juego, reseñas = await gestor.obtener_detalles_juego_con_reseñas(juegos[0].id_juego)
+            print(f"{juego} con {len(reseñas)} reseñas.")
+
+    crear_tablas()
+    asyncio.run(demostracion())
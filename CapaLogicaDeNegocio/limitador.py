@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Limitación de envíos de reseñas en memoria, antes de tocar la base de datos: cubos de tokens por IP y por usuario
+# (ventana deslizante: se rellenan de forma continua a 'limite' tokens por 'ventana' segundos) y un count-min sketch
+# de intentos por IP, que con memoria fija detecta los orígenes que inundan aunque haya millones de IPs distintas.
+# Los umbrales se configuran con variables de entorno o al construir LimitadorEnvios; un límite 0 lo desactiva.
+
+LIMITE_POR_IP = int(os.environ.get('RESENAS_LIMITE_IP', '30')) # envíos por ventana
+LIMITE_POR_USUARIO = int(os.environ.get('RESENAS_LIMITE_USUARIO', '10'))
+UMBRAL_ABUSO_IP = int(os.environ.get('RESENAS_UMBRAL_ABUSO_IP', '300')) # intentos por ventana, incluidos los rechazados
+VENTANA_LIMITE = float(os.environ.get('RESENAS_VENTANA_LIMITE', '60')) # segundos
+MAX_CLAVES_LIMITADOR = 100_000 # cubos por tipo de clave; se olvidan antes los que llevan más tiempo sin usarse
+ANCHO_SKETCH = 4096
+PROFUNDIDAD_SKETCH = 4
+MAX_ORIGENES_PRINCIPALES = 32
+
+MOTIVO_LIMITE_IP = 'limite_ip'
+MOTIVO_LIMITE_USUARIO = 'limite_usuario'
+MOTIVO_ORIGEN_ABUSIVO = 'origen_abusivo'
+
+
+class CubosTokens:
+    # Un cubo por clave: (tokens, instante de la última recarga)
+    def __init__(self, capacidad, ventana, max_claves=MAX_CLAVES_LIMITADOR):
+        self.capacidad = capacidad
+        self.tasa = capacidad / ventana # tokens por segundo
+        self.max_claves = max_claves
+        self._cubos = OrderedDict()
+
+    def consumir(self, clave, ahora):
+        tokens, instante = self._cubos.pop(clave, (self.capacidad, ahora))
+        tokens = min(self.capacidad, tokens + (ahora - instante) * self.tasa)
+        permitido = tokens >= 1
+        if permitido:
+            tokens -= 1
+        # Un cubo lleno equivale a uno nuevo: olvidar el menos reciente no concede tokens de más salvo que esté a medias
+        self._cubos[clave] = (tokens, ahora)
+        if len(self._cubos) > self.max_claves:
+            self._cubos.popitem(last=False)
+        return permitido
+
+    def __len__(self):
+        return len(self._cubos)
+
+
+class SketchConteoMinimo:
+    # Count-min sketch con ventana deslizante aproximada: dos tablas (ventana actual y anterior) que rotan cada
+    # 'ventana' segundos; la anterior pesa en proporción a lo que queda de ella. Nunca subestima: cada fila cuenta
+    # de más solo por colisiones, y el mínimo de las filas acota el error a ~ e * total / ancho con alta probabilidad.
+    def __init__(self, ventana, ancho=ANCHO_SKETCH, profundidad=PROFUNDIDAD_SKETCH, max_principales=MAX_ORIGENES_PRINCIPALES):
+        self.ventana = ventana
+        self.ancho = ancho
+        self.profundidad = profundidad
+        self.max_principales = max_principales
+        self._actual = [array('L', bytes(array('L').itemsize * ancho)) for _ in range(profundidad)]
+        self._anterior = [array('L', bytes(array('L').itemsize * ancho)) for _ in range(profundidad)]
+        self._inicio_ventana = None
+        self._principales = {} # candidatos a mayores emisores: clave -> última estimación
+
+    def _posiciones(self, clave):
+        # Doble hashing sobre el hash de la cadena (SipHash, bien mezclado): filas independientes con un solo hash.
+        # hash((fila, clave)) no sirve: dos claves que colisionan en una fila colisionan en todas.
+        valor = hash(str(clave)) & 0xFFFFFFFFFFFFFFFF
+        base, paso = valor & 0xFFFFFFFF, (valor >> 32) | 1
+        return [(base + fila * paso) % self.ancho for fila in range(self.profundidad)]
+
+    def _rotar(self, ahora):
+        if self._inicio_ventana is None:
+            self._inicio_ventana = ahora
+        transcurrido = ahora - self._inicio_ventana
+        if transcurrido < self.ventana:
+            return
+        vacio = bytes(array('L').itemsize * self.ancho)
+        # Si ha pasado más de una ventana entera, la anterior también queda vacía
+        self._anterior = self._actual if transcurrido < 2 * self.ventana else [array('L', vacio) for _ in range(self.profundidad)]
+        self._actual = [array('L', vacio) for _ in range(self.profundidad)]
+        self._inicio_ventana = ahora
+        self._principales.clear()
+
+    def _estimar(self, posiciones, ahora):
+        peso_anterior = max(0.0, 1 - (ahora - self._inicio_ventana) / self.ventana)
+        return min(actual[posicion] + anterior[posicion] * peso_anterior
+                   for actual, anterior, posicion in zip(self._actual, self._anterior, posiciones))
+
+    def añadir(self, clave, ahora):
+        # Cuenta un intento de 'clave' y devuelve la estimación de sus intentos en la última ventana
+        self._rotar(ahora)
+        posiciones = self._posiciones(clave)
+        for fila, posicion in zip(self._actual, posiciones):
+            fila[posicion] += 1
+        estimacion = self._estimar(posiciones, ahora)
+        self._actualizar_principales(clave, estimacion)
+        return estimacion
+
+    def estimar(self, clave, ahora):
+        self._rotar(ahora)
+        return self._estimar(self._posiciones(clave), ahora)
+
+    def _actualizar_principales(self, clave, estimacion):
+        if clave in self._principales or len(self._principales) < self.max_principales:
+            self._principales[clave] = estimacion
+            return
+        menor = min(self._principales, key=self._principales.get)
+        if estimacion > self._principales[menor]:
+            del self._principales[menor]
+            self._principales[clave] = estimacion
+
+    def principales(self, ahora, n=10):
+        # [(clave, intentos estimados)] de los n mayores emisores de la ventana, de más a menos
+        return sorted(((clave, self.estimar(clave, ahora)) for clave in list(self._principales)),
+                      key=lambda par: par[1], reverse=True)[:n]
+
+
+class LimitadorEnvios:
+    def __init__(self, limite_ip=LIMITE_POR_IP, limite_usuario=LIMITE_POR_USUARIO, umbral_abuso_ip=UMBRAL_ABUSO_IP,
+                 ventana=VENTANA_LIMITE, max_claves=MAX_CLAVES_LIMITADOR, reloj=time.monotonic):
+        self.umbral_abuso_ip = umbral_abuso_ip
+        self.reloj = reloj # segundos monótonos; las pruebas lo sustituyen por un reloj manual
+        self._por_ip = CubosTokens(limite_ip, ventana, max_claves) if limite_ip else None
+        self._por_usuario = CubosTokens(limite_usuario, ventana, max_claves) if limite_usuario else None
+        self._sketch = SketchConteoMinimo(ventana) if umbral_abuso_ip else None
+        self._lock = threading.Lock()
+        self._contadores = {
+            'permitidos': 0,
+            MOTIVO_LIMITE_IP: 0,
+            MOTIVO_LIMITE_USUARIO: 0,
+            MOTIVO_ORIGEN_ABUSIVO: 0,
+        }
+
+    def comprobar(self, origen_ip, id_usuario):
+        # None si el envío puede seguir; si no, el motivo del rechazo. Sin IP solo se aplica el límite por usuario.
+        ahora = self.reloj()
+        with self._lock:
+            motivo = None
+            if origen_ip and self._sketch is not None and self._sketch.añadir(origen_ip, ahora) > self.umbral_abuso_ip:
+                motivo = MOTIVO_ORIGEN_ABUSIVO
+            elif origen_ip and self._por_ip is not None and not self._por_ip.consumir(origen_ip, ahora):
+                motivo = MOTIVO_LIMITE_IP
+            elif self._por_usuario is not None and not self._por_usuario.consumir(id_usuario, ahora):
+                motivo = MOTIVO_LIMITE_USUARIO
+            self._contadores[motivo or 'permitidos'] += 1
+            return motivo
+
+    def origenes_principales(self, n=10):
+        if self._sketch is None:
+            return []
+        with self._lock:
+            return self._sketch.principales(self.reloj(), n)
+
+    def estadisticas(self):
+        with self._lock:
+            estadisticas = dict(self._contadores)
+            estadisticas['ips_con_cubo'] = len(self._por_ip) if self._por_ip is not None else 0
+            estadisticas['usuarios_con_cubo'] = len(self._por_usuario) if self._por_usuario is not None else 0
+        estadisticas['origenes_principales'] = self.origenes_principales()
+        return estadisticas
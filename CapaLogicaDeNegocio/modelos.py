@@ -1,20 +1,43 @@
+from array import array
+from math import ceil, sqrt
+
+# Los modelos usan __slots__: sin __dict__ por instancia ocupan menos memoria y se construyen más rápido,
+# lo que se nota al cargar cientos de miles de filas.
+
 class Juego:
-    def __init__(self, id_juego, nombre, descripcion="", puntuacion_media=0.0, total_reseñas=0, puntuacion_acumulada=0):
+    __slots__ = ('id_juego', 'nombre', 'descripcion', 'puntuacion_media', 'total_reseñas', 'puntuacion_acumulada', 'puntuacion_ponderada',
+                 'total_reseñas_criticos', 'puntuacion_acumulada_criticos', 'puntuacion_media_criticos',
+                 'total_reseñas_publico', 'puntuacion_acumulada_publico', 'puntuacion_media_publico')
+
+    def __init__(self, id_juego, nombre, descripcion="", puntuacion_media=0.0, total_reseñas=0, puntuacion_acumulada=0,
+                 puntuacion_ponderada=0.0,
+                 total_reseñas_criticos=0, puntuacion_acumulada_criticos=0, puntuacion_media_criticos=0.0,
+                 total_reseñas_publico=0, puntuacion_acumulada_publico=0, puntuacion_media_publico=0.0):
         self.id_juego = id_juego
         self.nombre = nombre
         self.descripcion = descripcion
         self.puntuacion_media = puntuacion_media
         self.total_reseñas = total_reseñas
         self.puntuacion_acumulada = puntuacion_acumulada
+        self.puntuacion_ponderada = puntuacion_ponderada # media bayesiana usada en la clasificación
+        # Los mismos agregados separados por tipo de usuario: críticos y público (usuarios normales)
+        self.total_reseñas_criticos = total_reseñas_criticos
+        self.puntuacion_acumulada_criticos = puntuacion_acumulada_criticos
+        self.puntuacion_media_criticos = puntuacion_media_criticos
+        self.total_reseñas_publico = total_reseñas_publico
+        self.puntuacion_acumulada_publico = puntuacion_acumulada_publico
+        self.puntuacion_media_publico = puntuacion_media_publico
 
     def __str__(self):
         return (f"Juego(ID: {self.id_juego}, Nombre: '{self.nombre}', Media: {self.puntuacion_media:.2f}, "
-                f"Reseñas: {self.total_reseñas}, Acumulado: {self.puntuacion_acumulada})")
+                f"Reseñas: {self.total_reseñas}, Acumulado: {self.puntuacion_acumulada}, Ponderada: {self.puntuacion_ponderada:.2f})")
 
     def __repr__(self):
         return self.__str__()
 
 class Usuario:
+    __slots__ = ('id_usuario', 'nombre_usuario', 'tipo_usuario')
+
     def __init__(self, id_usuario, nombre_usuario, tipo_usuario):
         self.id_usuario = id_usuario
         self.nombre_usuario = nombre_usuario
@@ -27,6 +50,8 @@ class Usuario:
         return self.__str__()
 
 class Reseña:
+    __slots__ = ('id_reseña', 'id_juego', 'id_usuario', 'puntuacion', 'contenido', 'fecha_reseña', 'origen_simulado_ip')
+
     def __init__(self, id_reseña, id_juego, id_usuario, puntuacion, contenido="", fecha_reseña=None, origen_simulado_ip=""):
         self.id_reseña = id_reseña
         self.id_juego = id_juego
@@ -41,4 +66,229 @@ class Reseña:
                 f"Puntuación: {self.puntuacion}, Fecha: {self.fecha_reseña})")
 
     def __repr__(self):
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
+
+class ReseñaConUsuario(Reseña):
+    __slots__ = ('nombre_usuario', 'tipo_usuario')
+
+    def __init__(self, id_reseña, id_juego, id_usuario, puntuacion, contenido="", fecha_reseña=None, origen_simulado_ip="",
+                 nombre_usuario=None, tipo_usuario=None):
+        super().__init__(id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip)
+        self.nombre_usuario = nombre_usuario
+        self.tipo_usuario = tipo_usuario
+
+    def __str__(self):
+        return (f"Reseña(ID: {self.id_reseña}, Juego ID: {self.id_juego}, Usuario: '{self.nombre_usuario}' ({self.tipo_usuario}), "
+                f"Puntuación: {self.puntuacion}, Fecha: {self.fecha_reseña})")
+
+class ResultadoBusqueda:
+    # Reseña encontrada por la búsqueda de texto completo: fragmento resaltado en vez del contenido y rango BM25
+    __slots__ = ('id_reseña', 'id_juego', 'id_usuario', 'puntuacion', 'fragmento', 'fecha_reseña', 'rango')
+
+    def __init__(self, id_reseña, id_juego, id_usuario, puntuacion, fragmento, fecha_reseña=None, rango=0.0):
+        self.id_reseña = id_reseña
+        self.id_juego = id_juego
+        self.id_usuario = id_usuario
+        self.puntuacion = puntuacion
+        self.fragmento = fragmento
+        self.fecha_reseña = fecha_reseña
+        self.rango = rango # bm25 de FTS5: cuanto más negativo, más relevante
+
+    def __str__(self):
+        return (f"ResultadoBusqueda(ID: {self.id_reseña}, Juego ID: {self.id_juego}, Usuario ID: {self.id_usuario}, "
+                f"Puntuación: {self.puntuacion}, Fragmento: '{self.fragmento}')")
+
+    def __repr__(self):
+        return self.__str__()
+
+class HistogramaPuntuaciones:
+    # Distribución de las puntuaciones 1..10 de un juego. Todas las estadísticas salen de los diez contadores,
+    # sin leer las reseñas: coste constante sea cual sea el número de reseñas del juego.
+    __slots__ = ('id_juego', 'conteos')
+
+    def __init__(self, id_juego, conteos):
+        self.id_juego = id_juego
+        self.conteos = tuple(conteos) # conteos[i] = reseñas con puntuación i + 1
+
+    def total(self):
+        return sum(self.conteos)
+
+    def distribucion(self):
+        # {puntuacion: proporción de reseñas}
+        total = self.total()
+        return {puntuacion: (cantidad / total if total else 0.0) for puntuacion, cantidad in enumerate(self.conteos, start=1)}
+
+    def media(self):
+        total = self.total()
+        return sum(p * c for p, c in enumerate(self.conteos, start=1)) / total if total else 0.0
+
+    def _puntuacion_en_posicion(self, posicion):
+        # Puntuación de la reseña que ocupa 'posicion' (1..total) si se ordenaran todas de menor a mayor
+        acumulado = 0
+        for puntuacion, cantidad in enumerate(self.conteos, start=1):
+            acumulado += cantidad
+            if acumulado >= posicion:
+                return puntuacion
+        return None
+
+    def mediana(self):
+        total = self.total()
+        if not total:
+            return None
+        if total % 2:
+            return self._puntuacion_en_posicion(total // 2 + 1)
+        return (self._puntuacion_en_posicion(total // 2) + self._puntuacion_en_posicion(total // 2 + 1)) / 2
+
+    def moda(self):
+        # La puntuación más repetida (la menor si hay empate)
+        if not self.total():
+            return None
+        return max(range(1, len(self.conteos) + 1), key=lambda puntuacion: (self.conteos[puntuacion - 1], -puntuacion))
+
+    def desviacion_tipica(self):
+        # Desviación típica poblacional
+        total = self.total()
+        if not total:
+            return 0.0
+        media = self.media()
+        return sqrt(sum(c * (p - media) ** 2 for p, c in enumerate(self.conteos, start=1)) / total)
+
+    def percentil(self, p):
+        # Percentil por rango más cercano (p entre 0 y 100): siempre es una de las puntuaciones reales
+        total = self.total()
+        if not total:
+            return None
+        return self._puntuacion_en_posicion(max(1, ceil(p / 100 * total)))
+
+    def __str__(self):
+        return (f"HistogramaPuntuaciones(Juego ID: {self.id_juego}, Reseñas: {self.total()}, "
+                f"Mediana: {self.mediana()}, Moda: {self.moda()})")
+
+    def __repr__(self):
+        return self.__str__()
+
+class PuntoTendencia:
+    # Reseñas de un juego en un periodo (hora, día o semana) según los rollups
+    __slots__ = ('inicio', 'total_reseñas', 'puntuacion_acumulada')
+
+    def __init__(self, inicio, total_reseñas=0, puntuacion_acumulada=0):
+        self.inicio = inicio # 'YYYY-MM-DD' o 'YYYY-MM-DD HH:00' (UTC)
+        self.total_reseñas = total_reseñas
+        self.puntuacion_acumulada = puntuacion_acumulada
+
+    def puntuacion_media(self):
+        return self.puntuacion_acumulada / self.total_reseñas if self.total_reseñas else 0.0
+
+    def __str__(self):
+        return f"PuntoTendencia({self.inicio}, Reseñas: {self.total_reseñas}, Media: {self.puntuacion_media():.2f})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class LoteReseñas:
+    # Lote de reseñas en columnas (arrays de enteros y listas de textos) para lecturas masivas y análisis.
+    # Con incluir_texto=False solo se guardan las columnas numéricas.
+    __slots__ = ('incluir_texto', 'ids_reseña', 'ids_juego', 'ids_usuario', 'puntuaciones', 'contenidos', 'fechas', 'origenes')
+
+    def __init__(self, incluir_texto=True):
+        self.incluir_texto = incluir_texto
+        self.ids_reseña = array('q')
+        self.ids_juego = array('q')
+        self.ids_usuario = array('q')
+        self.puntuaciones = array('b')
+        self.contenidos = [] if incluir_texto else None
+        self.fechas = [] if incluir_texto else None
+        self.origenes = [] if incluir_texto else None
+
+    def agregar(self, id_reseña, id_juego, id_usuario, puntuacion, contenido="", fecha_reseña=None, origen_simulado_ip=""):
+        self.ids_reseña.append(id_reseña)
+        self.ids_juego.append(id_juego)
+        self.ids_usuario.append(id_usuario)
+        self.puntuaciones.append(puntuacion)
+        if self.incluir_texto:
+            self.contenidos.append(contenido)
+            self.fechas.append(fecha_reseña)
+            self.origenes.append(origen_simulado_ip)
+
+    def extender(self, filas):
+        agregar_id_reseña = self.ids_reseña.append
+        agregar_id_juego = self.ids_juego.append
+        agregar_id_usuario = self.ids_usuario.append
+        agregar_puntuacion = self.puntuaciones.append
+        if not self.incluir_texto:
+            for fila in filas:
+                agregar_id_reseña(fila[0])
+                agregar_id_juego(fila[1])
+                agregar_id_usuario(fila[2])
+                agregar_puntuacion(fila[3])
+            return
+        agregar_contenido = self.contenidos.append
+        agregar_fecha = self.fechas.append
+        agregar_origen = self.origenes.append
+        for id_reseña, id_juego, id_usuario, puntuacion, contenido, fecha_reseña, origen_simulado_ip in filas:
+            agregar_id_reseña(id_reseña)
+            agregar_id_juego(id_juego)
+            agregar_id_usuario(id_usuario)
+            agregar_puntuacion(puntuacion)
+            agregar_contenido(contenido)
+            agregar_fecha(fecha_reseña)
+            agregar_origen(origen_simulado_ip)
+
+    def __len__(self):
+        return len(self.ids_reseña)
+
+    def __getitem__(self, i):
+        if self.incluir_texto:
+            return Reseña(self.ids_reseña[i], self.ids_juego[i], self.ids_usuario[i], self.puntuaciones[i],
+                          self.contenidos[i], self.fechas[i], self.origenes[i])
+        return Reseña(self.ids_reseña[i], self.ids_juego[i], self.ids_usuario[i], self.puntuaciones[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def puntuacion_media(self):
+        return sum(self.puntuaciones) / len(self.puntuaciones) if self.puntuaciones else 0.0
+
+    def __str__(self):
+        return f"LoteReseñas({len(self)} reseñas, Media: {self.puntuacion_media():.2f})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+if __name__ == '__main__':
+    # Memoria por fila y tiempo de construcción: clase con __dict__ (como antes) frente a __slots__ y LoteReseñas
+    import time
+    import tracemalloc
+
+    class ReseñaConDict:
+        def __init__(self, id_reseña, id_juego, id_usuario, puntuacion, contenido="", fecha_reseña=None, origen_simulado_ip=""):
+            self.id_reseña = id_reseña
+            self.id_juego = id_juego
+            self.id_usuario = id_usuario
+            self.puntuacion = puntuacion
+            self.contenido = contenido
+            self.fecha_reseña = fecha_reseña
+            self.origen_simulado_ip = origen_simulado_ip
+
+    num_filas = 200_000
+    filas = [(i, i % 50, i, i % 10 + 1, "Texto de la reseña", "2025-07-14 21:46:46", "10.0.0.1") for i in range(num_filas)]
+
+    def medir(nombre, construir):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = construir()
+        segundos = time.perf_counter() - inicio
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{nombre:<22} {memoria / num_filas:8.1f} bytes/fila   {segundos * 1e9 / num_filas:8.1f} ns/fila")
+        return resultado
+
+    medir("Clase con __dict__", lambda: [ReseñaConDict(*f) for f in filas])
+    medir("Reseña (__slots__)", lambda: [Reseña(*f) for f in filas])
+    lote = LoteReseñas()
+    medir("LoteReseñas", lambda: lote.extender(filas))
+    lote_numerico = LoteReseñas(incluir_texto=False)
+    medir("LoteReseñas sin texto", lambda: lote_numerico.extender(filas))
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from CapaDeDatos.metricas import obtener_logger
+
+TAMAÑO_GRUPO_COMMIT = 200 # reseñas máximas por transacción
+VENTANA_GRUPO_COMMIT = 0.005 # segundos que se espera a más peticiones antes de hacer commit
+ESTADO_ERROR = 'error' # además de los estados de ReseñaDAO.insertar_reseñas_lote
+TIEMPO_ESPERA_ESCRITOR = float(os.environ.get('RESENAS_ESPERA_ESCRITOR', '30')) # segundos máximos por respuesta
+INTERVALO_COMPROBACION_ESCRITOR = 0.5 # cada cuánto se comprueba, mientras se espera, que el escritor siga vivo
+
+_log = obtener_logger(__name__)
+_DESCARTADA = object()
+
+
+def _confirmar_grupo(reseña_dao, grupo):
+    # Un estado por petición. Si el grupo falla entero (error de la BD, una reseña mal formada...) se reintenta
+    # reseña a reseña: solo las que vuelven a fallar reciben 'error' y el proceso escritor sigue vivo.
+    try:
+        return reseña_dao.insertar_reseñas_lote([reseña for _, _, reseña in grupo])
+    except Exception as e:
+        _log.error("Proceso escritor: error al confirmar un grupo de %s reseñas (%s); se reintentan de una en una.", len(grupo), e)
+    estados = []
+    for _, _, reseña in grupo:
+        try:
+            estados.extend(reseña_dao.insertar_reseñas_lote([reseña]))
+        except Exception as e:
+            _log.error("Proceso escritor: reseña %r rechazada por error: %s", reseña, e)
+            estados.append(ESTADO_ERROR)
+    return estados
+
+
+def _bucle_escritor(cola_peticiones, colas_respuesta, tamaño_grupo, ventana, terminado):
+    # terminado se activa al salir, sea cual sea el motivo: los clientes dejan de esperar respuestas
+    try:
+        _atender_peticiones(cola_peticiones, colas_respuesta, tamaño_grupo, ventana)
+    finally:
+        terminado.set()
+
+def _atender_peticiones(cola_peticiones, colas_respuesta, tamaño_grupo, ventana):
+    # Único proceso que escribe reseñas: agrupa las peticiones que llegan dentro de la ventana (o hasta
+    # tamaño_grupo) y las confirma en una sola transacción, con un ajuste de agregados por juego y grupo.
+    from CapaDeDatos.daos import ReseñaDAO
+    from CapaDeDatos.particiones import ReseñaDAOParticionado, obtener_particiones
+    reseña_dao = ReseñaDAOParticionado() if obtener_particiones() else ReseñaDAO()
+
+    terminar = False
+    while not terminar:
+        peticion = _recibir_peticion(cola_peticiones, colas_respuesta)
+        if peticion is None:
+            break
+        grupo = [peticion] if peticion is not _DESCARTADA else []
+        limite = time.monotonic() + ventana
+        while len(grupo) < tamaño_grupo:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                peticion = _recibir_peticion(cola_peticiones, colas_respuesta, timeout=restante)
+            except queue.Empty:
+                break
+            if peticion is None:
+                terminar = True
+                break
+            if peticion is not _DESCARTADA:
+                grupo.append(peticion)
+
+        if grupo:
+            for (id_cliente, id_peticion, _), estado in zip(grupo, _confirmar_grupo(reseña_dao, grupo)):
+                colas_respuesta[id_cliente].put((id_peticion, estado))
+
+def _recibir_peticion(cola_peticiones, colas_respuesta, timeout=None):
+    # (id_cliente, id_peticion, reseña), None (parar) o _DESCARTADA si el mensaje no se puede leer o no tiene esa forma:
+    # sin un cliente conocido no hay a quién responder, así que solo se registra
+    try:
+        peticion = cola_peticiones.get(timeout=timeout)
+    except queue.Empty:
+        raise
+    except Exception as e:
+        _log.error("Proceso escritor: petición ilegible descartada: %s", e)
+        return _DESCARTADA
+    if peticion is None:
+        return None
+    if not (isinstance(peticion, tuple) and len(peticion) == 3 and peticion[0] in colas_respuesta):
+        _log.error("Proceso escritor: petición mal formada descartada: %r", peticion)
+        return _DESCARTADA
+    return peticion
+
+
+class ClienteEscritor:
+    # Extremo que usa cada proceso trabajador para enviar reseñas al proceso escritor y esperar su resultado
+    def __init__(self, id_cliente, cola_peticiones, cola_respuestas, terminado, escritor=None):
+        self.id_cliente = id_cliente
+        self._cola_peticiones = cola_peticiones
+        self._cola_respuestas = cola_respuestas
+        self._terminado = terminado
+        self._escritor = escritor # ProcesoEscritor, solo en el proceso que lo creó (is_alive no vale en otros)
+        self._siguiente_peticion = 0
+        self._lock = None
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado['_lock'] = None
+        estado['_escritor'] = None
+        return estado
+
+    def _escritor_caido(self):
+        return self._terminado.is_set() or (self._escritor is not None and self._escritor.esta_activo() is False)
+
+    def enviar_reseña(self, id_juego, id_usuario, puntuacion, contenido="", origen_simulado_ip="", tiempo_espera=TIEMPO_ESPERA_ESCRITOR):
+        # Devuelve el estado de la reseña ('aceptada', 'duplicada', 'invalida' o 'error'). Nunca se queda esperando
+        # indefinidamente: si el escritor ha terminado o no responde en tiempo_espera segundos, el estado es 'error'.
+        if self._lock is None:
+            self._lock = threading.Lock()
+        with self._lock:
+            if self._escritor_caido():
+                _log.error("Cliente %s: el proceso escritor no está activo; reseña no enviada.", self.id_cliente)
+                return ESTADO_ERROR
+            id_peticion = self._siguiente_peticion
+            self._siguiente_peticion += 1
+            self._cola_peticiones.put((self.id_cliente, id_peticion, (id_juego, id_usuario, puntuacion, contenido, origen_simulado_ip)))
+            limite = time.monotonic() + tiempo_espera
+            caido = False
+            while True:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    _log.error("Cliente %s: sin respuesta del proceso escritor tras %.1fs.", self.id_cliente, tiempo_espera)
+                    return ESTADO_ERROR
+                try:
+                    id_respuesta, estado = self._cola_respuestas.get(timeout=min(restante, INTERVALO_COMPROBACION_ESCRITOR))
+                except queue.Empty:
+                    # Tras ver caído al escritor se espera un intervalo más: sus últimas respuestas pueden estar en camino
+                    if caido:
+                        _log.error("Cliente %s: el proceso escritor ha terminado sin responder.", self.id_cliente)
+                        return ESTADO_ERROR
+                    caido = self._escritor_caido()
+                    continue
+                if id_respuesta == id_peticion:
+                    return estado
+                # Respuesta de una petición anterior cuya espera se abandonó por tiempo: se descarta
+
+
+class ProcesoEscritor:
+    def __init__(self, tamaño_grupo=TAMAÑO_GRUPO_COMMIT, ventana=VENTANA_GRUPO_COMMIT, contexto=None):
+        self.tamaño_grupo = tamaño_grupo
+        self.ventana = ventana
+        self._contexto = contexto or multiprocessing.get_context()
+        self._cola_peticiones = self._contexto.Queue()
+        self._colas_respuesta = {}
+        self._terminado = self._contexto.Event()
+        self._proceso = None
+        self._pid_creador = os.getpid()
+
+    def crear_cliente(self):
+        # Las colas de respuesta las hereda el proceso escritor al arrancar: los clientes se crean antes de iniciar()
+        if self._proceso is not None:
+            raise RuntimeError("Los clientes del proceso escritor deben crearse antes de iniciarlo.")
+        id_cliente = len(self._colas_respuesta)
+        cola_respuestas = self._contexto.Queue()
+        self._colas_respuesta[id_cliente] = cola_respuestas
+        return ClienteEscritor(id_cliente, self._cola_peticiones, cola_respuestas, self._terminado, self)
+
+    def iniciar(self):
+        self._proceso = self._contexto.Process(
+            target=_bucle_escritor,
+            args=(self._cola_peticiones, self._colas_respuesta, self.tamaño_grupo, self.ventana, self._terminado),
+            name="EscritorResenas",
+            daemon=True,
+        )
+        self._proceso.start()
+        return self
+
+    def detener(self, tiempo_espera=None):
+        # Las peticiones encoladas antes de la señal de parada se confirman antes de salir
+        if self._proceso is None:
+            return
+        self._cola_peticiones.put(None)
+        self._proceso.join(tiempo_espera)
+        self._proceso = None
+
+    def esta_activo(self):
+        # None si no se puede saber: aún no iniciado, ya detenido, o consultado desde otro proceso (p. ej. tras un fork)
+        if self._proceso is None or os.getpid() != self._pid_creador:
+            return None
+        return self._proceso.is_alive()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo_excepcion, excepcion, traza):
+        self.detener()
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from CapaDeDatos.conexion_bd import PERFIL_POR_DEFECTO, configurar_ruta_base_de_datos, crear_tablas
+from CapaDeDatos.daos import JuegoDAO, ReseñaDAO, UsuarioDAO
+from CapaDeDatos.metricas import METRICAS_ACTIVADAS, NIVEL_LOG, configurar_logging, establecer_nivel_log
+from CapaDeDatos.particiones import (JuegoDAOParticionado, ReseñaDAOParticionado, UsuarioDAOParticionado, configurar_particiones,
+                                     obtener_particiones)
+from CapaLogicaDeNegocio.gestor_resenas import GestorResenas
+from CapaLogicaDeNegocio.limitador import LimitadorEnvios
+
+# Micro-benchmarks de los caminos más usados de los DAOs y de GestorResenas sobre una base de datos temporal con
+# juegos, usuarios y reseñas generados con una semilla fija. Cada caso se repite --rondas veces; se informa de la
+# mediana de operaciones por segundo entre rondas y de los percentiles de latencia de todas las operaciones.
+# Los resultados se guardan en JSON y se pueden comparar con los de una ejecución anterior (la base): un caso con
+# menos ops/s o más latencia p95 que la base, más allá de la tolerancia, es una regresión (código de salida 1).
+# Uso: python benchmark.py [--juegos N] [--usuarios N] [--reseñas N] [--operaciones N] [--salida resultados.json]
+#      python benchmark.py --comparar base.json [--tolerancia 0.15]
+
+VERSION_FORMATO = 1
+NUM_JUEGOS_POR_DEFECTO = 200
+NUM_USUARIOS_POR_DEFECTO = 2000
+NUM_RESEÑAS_POR_DEFECTO = 50_000
+OPERACIONES_POR_DEFECTO = 1000 # por ronda, en los casos baratos; los caros hacen una fracción
+RONDAS_POR_DEFECTO = 3
+TOLERANCIA_POR_DEFECTO = 0.15 # cambio relativo que se considera regresión
+UMBRAL_ABSOLUTO_P95_MS = 0.02 # por debajo de esta diferencia el p95 no cuenta como regresión (ruido del reloj)
+SEMILLA = 42
+
+
+class _Contexto:
+    # Datos y objetos que comparten los casos. La reseña n es del usuario n // num_juegos + 1 al juego
+    # n % num_juegos + 1: las escrituras siguen la numeración tras las reseñas iniciales y nunca repiten un par.
+    def __init__(self, num_juegos, num_reseñas):
+        self.num_juegos = num_juegos
+        self.siguiente_reseña = num_reseñas
+        self.aleatorio = random.Random(SEMILLA)
+        self.juego_dao, _, self.reseña_dao = _daos()
+        # Sin límites de envío: el benchmark envía desde una sola "IP" muchas más reseñas de las que se permitirían
+        self.gestor = GestorResenas(limitador=LimitadorEnvios(limite_ip=0, limite_usuario=0, umbral_abuso_ip=0))
+
+    def nueva_reseña(self):
+        n = self.siguiente_reseña
+        self.siguiente_reseña += 1
+        return n % self.num_juegos + 1, n // self.num_juegos + 1, self.aleatorio.randint(1, 10)
+
+    def juego_aleatorio(self):
+        return self.aleatorio.randint(1, self.num_juegos)
+
+
+def _registrar_reseña(contexto):
+    id_juego, id_usuario, puntuacion = contexto.nueva_reseña()
+    contexto.reseña_dao.registrar_reseña(id_juego, id_usuario, puntuacion, "Reseña del benchmark")
+
+def _enviar_reseña(contexto):
+    id_juego, id_usuario, puntuacion = contexto.nueva_reseña()
+    contexto.gestor.enviar_reseña(id_juego, id_usuario, puntuacion, "Reseña del benchmark")
+
+# (nombre, fracción de --operaciones por ronda, operación). Orden fijo: las escrituras van primero y las lecturas
+# ven ya sus filas.
+CASOS = (
+    ('dao.registrar_reseña', 1, _registrar_reseña),
+    ('gestor.enviar_reseña', 1, _enviar_reseña),
+    ('dao.recalcular_puntuaciones_juego', 0.2, lambda c: c.juego_dao.recalcular_puntuaciones(c.juego_aleatorio())),
+    ('dao.recalcular_puntuaciones', 0.005, lambda c: c.juego_dao.recalcular_puntuaciones()),
+    ('dao.obtener_juego_por_id', 1, lambda c: c.juego_dao.obtener_juego_por_id(c.juego_aleatorio())),
+    ('gestor.obtener_juego_por_id', 1, lambda c: c.gestor.obtener_juego_por_id(c.juego_aleatorio())),
+    ('dao.obtener_reseñas_por_juego', 0.2, lambda c: c.reseña_dao.obtener_reseñas_por_juego(c.juego_aleatorio())),
+    ('gestor.obtener_reseñas_por_juego', 0.2, lambda c: c.gestor.obtener_reseñas_por_juego(c.juego_aleatorio())),
+    ('dao.obtener_todos_los_juegos', 0.1, lambda c: c.juego_dao.obtener_todos_los_juegos()),
+    ('gestor.obtener_juegos', 0.1, lambda c: c.gestor.obtener_juegos()),
+)
+NOMBRES_CASOS = tuple(nombre for nombre, _, _ in CASOS)
+
+
+def _daos():
+    # (juegos, usuarios, reseñas) de la distribución configurada, como los que usa GestorResenas
+    if obtener_particiones():
+        return JuegoDAOParticionado(), UsuarioDAOParticionado(), ReseñaDAOParticionado()
+    return JuegoDAO(), UsuarioDAO(), ReseñaDAO()
+
+def _preparar_datos(num_juegos, num_usuarios, num_reseñas):
+    aleatorio = random.Random(SEMILLA)
+    juego_dao, usuario_dao, reseña_dao = _daos()
+    juego_dao.insertar_juegos_lote([(i, f"Juego {i}", "") for i in range(1, num_juegos + 1)])
+    usuario_dao.insertar_usuarios_lote([(i, f"usuario{i}", 'critico' if i % 10 == 0 else 'usuario_normal')
+                                        for i in range(1, num_usuarios + 1)])
+    for inicio in range(0, num_reseñas, 5000):
+        reseña_dao.insertar_reseñas_lote([
+            (n % num_juegos + 1, n // num_juegos + 1, aleatorio.randint(1, 10), "texto " * aleatorio.randint(5, 60), "")
+            for n in range(inicio, min(inicio + 5000, num_reseñas))
+        ])
+
+def _resumen(latencias, ops_por_segundo):
+    latencias = sorted(latencias)
+    def percentil(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000
+    return {
+        'operaciones': len(latencias),
+        'ops_por_segundo': ops_por_segundo,
+        'media_ms': statistics.fmean(latencias) * 1000,
+        'p50_ms': statistics.median(latencias) * 1000,
+        'p95_ms': percentil(0.95),
+        'p99_ms': percentil(0.99),
+        'max_ms': latencias[-1] * 1000,
+    }
+
+def _medir_caso(contexto, operacion, operaciones, rondas):
+    # Unas pocas operaciones de calentamiento (cachés, sentencias preparadas) que no cuentan
+    for _ in range(min(20, operaciones)):
+        operacion(contexto)
+    latencias, ops_por_ronda = [], []
+    for _ in range(rondas):
+        inicio_ronda = time.perf_counter()
+        for _ in range(operaciones):
+            inicio = time.perf_counter()
+            operacion(contexto)
+            latencias.append(time.perf_counter() - inicio)
+        ops_por_ronda.append(operaciones / (time.perf_counter() - inicio_ronda))
+    return _resumen(latencias, statistics.median(ops_por_ronda))
+
+def ejecutar_benchmark(num_juegos=NUM_JUEGOS_POR_DEFECTO, num_usuarios=NUM_USUARIOS_POR_DEFECTO, num_reseñas=NUM_RESEÑAS_POR_DEFECTO,
+                       operaciones=OPERACIONES_POR_DEFECTO, rondas=RONDAS_POR_DEFECTO, casos=NOMBRES_CASOS, num_particiones=1):
+    casos = [caso for caso in CASOS if caso[0] in casos]
+    # Cada escritura necesita un par (juego, usuario) nuevo: usuarios de sobra para todas las rondas
+    escrituras = sum(max(1, int(operaciones * fraccion)) * rondas + 20 for nombre, fraccion, _ in casos if nombre in
+                     ('dao.registrar_reseña', 'gestor.enviar_reseña'))
+    num_usuarios = max(num_usuarios, (num_reseñas + escrituras) // num_juegos + 1)
+    parametros = {
+        'juegos': num_juegos,
+        'usuarios': num_usuarios,
+        'reseñas': num_reseñas,
+        'operaciones': operaciones,
+        'rondas': rondas,
+        'particiones': num_particiones,
+        'perfil_bd': PERFIL_POR_DEFECTO,
+        'metricas': METRICAS_ACTIVADAS,
+    }
+
+    directorio = tempfile.mkdtemp(prefix="benchmark_")
+    configurar_ruta_base_de_datos(os.path.join(directorio, "benchmark.sqlite"))
+    configurar_particiones(num_particiones, os.path.join(directorio, "particiones"))
+    # Los mensajes informativos (p. ej. de cada recalculado) ensuciarían la tabla y costarían tiempo medido
+    configurar_logging()
+    establecer_nivel_log('WARNING')
+    try:
+        crear_tablas()
+        inicio = time.perf_counter()
+        _preparar_datos(num_juegos, num_usuarios, num_reseñas)
+        print(f"Datos de prueba: {num_juegos} juegos, {num_usuarios} usuarios y {num_reseñas} reseñas "
+              f"cargados en {time.perf_counter() - inicio:.1f}s.")
+        contexto = _Contexto(num_juegos, num_reseñas)
+
+        resultados = {}
+        print(f"\n{'caso':<36}{'ops':>7}{'ops/s':>10}{'p50':>11}{'p95':>11}{'p99':>11}")
+        for nombre, fraccion, operacion in casos:
+            resultado = _medir_caso(contexto, operacion, max(1, int(operaciones * fraccion)), rondas)
+            resultados[nombre] = resultado
+            print(f"{nombre:<36}{resultado['operaciones']:>7}{resultado['ops_por_segundo']:>10.0f}"
+                  f"{resultado['p50_ms']:>9.3f}ms{resultado['p95_ms']:>9.3f}ms{resultado['p99_ms']:>9.3f}ms")
+    finally:
+        establecer_nivel_log(NIVEL_LOG)
+        configurar_particiones(1)
+        configurar_ruta_base_de_datos(None)
+        shutil.rmtree(directorio)
+
+    return {
+        'version': VERSION_FORMATO,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'entorno': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'plataforma': platform.platform()},
+        'parametros': parametros,
+        'resultados': resultados,
+    }
+
+
+def comparar(actual, base, tolerancia=TOLERANCIA_POR_DEFECTO):
+    # Imprime la comparación caso a caso y devuelve la lista de regresiones [(caso, descripción)]
+    if base.get('parametros') != actual['parametros']:
+        print("\nAviso: la base se midió con otros parámetros; la comparación puede no ser válida.")
+        print(f"  base:   {base.get('parametros')}\n  actual: {actual['parametros']}")
+
+    regresiones = []
+    print(f"\n{'caso':<36}{'ops/s base':>12}{'actual':>10}{'cambio':>9}{'p95 base':>12}{'actual':>11}{'cambio':>9}")
+    for nombre, resultado in actual['resultados'].items():
+        anterior = base.get('resultados', {}).get(nombre)
+        if anterior is None:
+            print(f"{nombre:<36}{'(sin base)':>12}")
+            continue
+        cambio_ops = resultado['ops_por_segundo'] / anterior['ops_por_segundo'] - 1
+        cambio_p95 = resultado['p95_ms'] / anterior['p95_ms'] - 1 if anterior['p95_ms'] else 0.0
+        motivos = []
+        if cambio_ops < -tolerancia:
+            motivos.append(f"ops/s {cambio_ops:+.0%}")
+        if cambio_p95 > tolerancia and resultado['p95_ms'] - anterior['p95_ms'] > UMBRAL_ABSOLUTO_P95_MS:
+            motivos.append(f"p95 {cambio_p95:+.0%}")
+        print(f"{nombre:<36}{anterior['ops_por_segundo']:>12.0f}{resultado['ops_por_segundo']:>10.0f}{cambio_ops:>+9.1%}"
+              f"{anterior['p95_ms']:>10.3f}ms{resultado['p95_ms']:>9.3f}ms{cambio_p95:>+9.1%}"
+              f"{'  REGRESIÓN' if motivos else ''}")
+        if motivos:
+            regresiones.append((nombre, ", ".join(motivos)))
+
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones (tolerancia {tolerancia:.0%}): "
+              + "; ".join(f"{nombre} ({motivos})" for nombre, motivos in regresiones))
+    else:
+        print(f"\nSin regresiones (tolerancia {tolerancia:.0%}).")
+    return regresiones
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de los DAOs y de GestorResenas sobre una base de datos temporal.")
+    parser.add_argument("--juegos", type=int, default=NUM_JUEGOS_POR_DEFECTO)
+    parser.add_argument("--usuarios", type=int, default=NUM_USUARIOS_POR_DEFECTO,
+                        help="Mínimo de usuarios; se crean más si las escrituras del benchmark los necesitan.")
+    parser.add_argument("--reseñas", type=int, default=NUM_RESEÑAS_POR_DEFECTO, help="Reseñas cargadas antes de medir.")
+    parser.add_argument("--operaciones", type=int, default=OPERACIONES_POR_DEFECTO, help="Operaciones por ronda de los casos baratos.")
+    parser.add_argument("--rondas", type=int, default=RONDAS_POR_DEFECTO)
+    parser.add_argument("--particiones", type=int, default=1, help="Número de particiones (ver CapaDeDatos/particiones.py).")
+    parser.add_argument("--casos", nargs="+", choices=NOMBRES_CASOS, default=NOMBRES_CASOS, metavar="CASO",
+                        help=f"Casos a medir (por defecto todos): {', '.join(NOMBRES_CASOS)}.")
+    parser.add_argument("--salida", help="Guarda los resultados en este archivo JSON (sirve de base para --comparar).")
+    parser.add_argument("--comparar", metavar="BASE", help="Compara con los resultados JSON de una ejecución anterior.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_POR_DEFECTO,
+                        help="Cambio relativo a partir del cual un caso es una regresión (0.15 = 15%%).")
+    argumentos = parser.parse_args(argumentos)
+
+    base = None
+    if argumentos.comparar:
+        # Se lee antes de medir: una ruta equivocada no debe costar una ejecución entera
+        try:
+            with open(argumentos.comparar, encoding="utf-8") as archivo:
+                base = json.load(archivo)
+        except (OSError, ValueError) as e:
+            parser.error(f"No se pudo leer la base '{argumentos.comparar}': {e}")
+        if base.get('version') != VERSION_FORMATO:
+            parser.error(f"'{argumentos.comparar}' no es un archivo de resultados de este benchmark (versión {base.get('version')}).")
+
+    resultados = ejecutar_benchmark(argumentos.juegos, argumentos.usuarios, argumentos.reseñas, argumentos.operaciones,
+                                    argumentos.rondas, argumentos.casos, argumentos.particiones)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en '{argumentos.salida}'.")
+    if base is not None:
+        return 1 if comparar(resultados, base, argumentos.tolerancia) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import argparse
+from datetime import datetime
+
+from CapaDeDatos.conexion_bd import configurar_ruta_base_de_datos, crear_tablas
+from CapaDeDatos.intercambio import FORMATOS, TABLAS, exportar
+
+# Exporta una tabla (o las reseñas filtradas) a CSV o JSONL en streaming.
+# Uso: python exportar.py reseñas.csv.gz [--juego ID] [--usuario ID] [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+#      python exportar.py juegos.jsonl --tabla juegos
+
+
+def _fecha(texto):
+    try:
+        datetime.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: '{texto}' (se espera AAAA-MM-DD o AAAA-MM-DD HH:MM:SS)")
+    return texto
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Exporta reseñas, juegos o usuarios a CSV o JSONL con memoria constante.")
+    parser.add_argument("salida", help="Archivo de destino; el formato y la compresión se deducen de la extensión (.csv, .jsonl, .gz).")
+    parser.add_argument("--tabla", choices=TABLAS, default='reseñas')
+    parser.add_argument("--formato", choices=FORMATOS, help="Formato del archivo si la extensión no lo indica.")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Comprime con gzip aunque el nombre no acabe en .gz.")
+    parser.add_argument("--juego", type=int, help="Solo las reseñas del juego con este ID.")
+    parser.add_argument("--usuario", type=int, help="Solo las reseñas del usuario con este ID.")
+    parser.add_argument("--desde", type=_fecha, help="Solo las reseñas de este día en adelante.")
+    parser.add_argument("--hasta", type=_fecha, help="Solo las reseñas hasta este día (incluido).")
+    parser.add_argument("--bd", help="Base de datos de origen (por defecto la de la aplicación).")
+    argumentos = parser.parse_args(argumentos)
+
+    if argumentos.tabla != 'reseñas' and any(valor is not None for valor in (
+            argumentos.juego, argumentos.usuario, argumentos.desde, argumentos.hasta)):
+        parser.error("los filtros --juego, --usuario, --desde y --hasta solo se aplican a --tabla reseñas")
+    if argumentos.bd:
+        configurar_ruta_base_de_datos(argumentos.bd)
+    crear_tablas()
+    exportar(argumentos.salida, argumentos.tabla, argumentos.formato, argumentos.gzip,
+             argumentos.juego, argumentos.usuario, argumentos.desde, argumentos.hasta)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+from CapaDeDatos.conexion_bd import configurar_ruta_base_de_datos, crear_tablas
+from CapaDeDatos.intercambio import FORMATOS, TABLAS, TAMAÑO_BLOQUE_IMPORTACION, importar
+
+# Importa un archivo generado por exportar.py (o con las mismas columnas) en bloques transaccionales.
+# Si se interrumpe, al relanzar el mismo comando continúa desde el último bloque confirmado.
+# Uso: python importar.py juegos.jsonl --tabla juegos
+#      python importar.py usuarios.jsonl --tabla usuarios
+#      python importar.py reseñas.csv.gz [--tamaño-bloque N] [--desde-el-principio]
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Importa reseñas, juegos o usuarios desde CSV o JSONL con memoria constante.")
+    parser.add_argument("entrada", help="Archivo de origen; el formato y la compresión se deducen de la extensión (.csv, .jsonl, .gz).")
+    parser.add_argument("--tabla", choices=TABLAS, default='reseñas')
+    parser.add_argument("--formato", choices=FORMATOS, help="Formato del archivo si la extensión no lo indica.")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Descomprime con gzip aunque el nombre no acabe en .gz.")
+    parser.add_argument("--tamaño-bloque", type=int, default=TAMAÑO_BLOQUE_IMPORTACION, help="Filas por transacción.")
+    parser.add_argument("--desde-el-principio", action="store_true", help="Ignora el punto de control de una importación anterior.")
+    parser.add_argument("--bd", help="Base de datos de destino (por defecto la de la aplicación).")
+    argumentos = parser.parse_args(argumentos)
+
+    if argumentos.tamaño_bloque < 1:
+        parser.error("--tamaño-bloque debe ser al menos 1")
+    if argumentos.bd:
+        configurar_ruta_base_de_datos(argumentos.bd)
+    crear_tablas()
+    importar(argumentos.entrada, argumentos.tabla, argumentos.formato, argumentos.gzip,
+             argumentos.tamaño_bloque, reanudar=not argumentos.desde_el_principio)
+
+if __name__ == '__main__':
+    main()
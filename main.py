@@ -1,14 +1,22 @@
+import time
+INICIO = time.perf_counter() # antes del resto de importaciones: el tiempo de arranque las incluye
+
 from CapaDeDatos.conexion_bd import crear_tablas # Importamos para asegurar que la DB esté lista
 from CapaLogicaDeNegocio.gestor_resenas import GestorResenas
 from CapaDePresentacion.consola import InterfazConsola
 
 def main():
     print("Iniciando la aplicación de reseñas de videojuegos...")
+    importaciones = time.perf_counter()
     crear_tablas()
+    esquema = time.perf_counter()
     gestor_resenas = GestorResenas()
+    listo = time.perf_counter()
+    print(f"Aplicación lista en {(listo - INICIO) * 1000:.0f} ms (importaciones {(importaciones - INICIO) * 1000:.0f} ms, "
+          f"esquema {(esquema - importaciones) * 1000:.1f} ms, gestor y datos base {(listo - esquema) * 1000:.1f} ms).")
     interfaz = InterfazConsola(gestor_resenas)
     interfaz.ejecutar()
     print("Aplicación finalizada.")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,12 @@
+import pytest
+
+from CapaDeDatos.conexion_bd import configurar_ruta_base_de_datos, crear_tablas, obtener_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    # Base de datos temporal con todas las migraciones aplicadas; al terminar se vuelve a la del proyecto
+    configurar_ruta_base_de_datos(str(tmp_path / "resenas_test.sqlite"))
+    crear_tablas()
+    yield obtener_pool()
+    configurar_ruta_base_de_datos(None)
@@ -0,0 +1,69 @@
+import random
+from bisect import bisect_left, insort
+
+from CapaDeDatos.clasificacion import ClasificacionJuegos, _ListaOrdenada
+from CapaDeDatos.daos import INDICE_PUNTUACION_PONDERADA
+
+
+def test_lista_ordenada_equivale_a_una_lista_con_bisect():
+    aleatorio = random.Random(14)
+    referencia = sorted((-aleatorio.uniform(1, 10), id_juego) for id_juego in range(300))
+    lista = _ListaOrdenada(referencia, tamaño_bloque=4)
+    for paso in range(3000):
+        if referencia and aleatorio.random() < 0.5:
+            clave = aleatorio.choice(referencia)
+            del referencia[bisect_left(referencia, clave)]
+            lista.eliminar(clave)
+        else:
+            clave = (-aleatorio.uniform(1, 10), 300 + paso)
+            insort(referencia, clave)
+            lista.agregar(clave)
+        assert len(lista) == len(referencia)
+        if referencia:
+            clave = aleatorio.choice(referencia)
+            assert lista.indice(clave) == referencia.index(clave)
+    assert lista.primeras(len(referencia) + 5) == referencia
+
+
+def test_lista_ordenada_vacia_y_vaciada():
+    lista = _ListaOrdenada(tamaño_bloque=2)
+    assert len(lista) == 0 and lista.primeras(3) == []
+    for clave in [(-5.0, 1), (-7.0, 2), (-5.0, 3)]:
+        lista.agregar(clave)
+    assert lista.primeras(2) == [(-7.0, 2), (-5.0, 1)]
+    for clave in [(-5.0, 1), (-7.0, 2), (-5.0, 3)]:
+        lista.eliminar(clave)
+    assert len(lista) == 0
+    lista.agregar((-1.0, 4))
+    assert lista.indice((-1.0, 4)) == 0
+
+
+class _JuegoDAOFalso:
+    def __init__(self, puntuaciones):
+        self.puntuaciones = puntuaciones
+
+    def iterar_clasificacion(self):
+        return iter(sorted(self.puntuaciones.items(), key=lambda juego: (-juego[1], juego[0])))
+
+    def obtener_juego_por_id(self, id_juego):
+        if id_juego not in self.puntuaciones:
+            return None
+        fila = [None] * (INDICE_PUNTUACION_PONDERADA + 1)
+        fila[INDICE_PUNTUACION_PONDERADA] = self.puntuaciones[id_juego]
+        return tuple(fila)
+
+
+def test_clasificacion_recoloca_y_agrega_juegos():
+    juego_dao = _JuegoDAOFalso({1: 7.0, 2: 5.5, 3: 8.0})
+    clasificacion = ClasificacionJuegos(juego_dao)
+    assert clasificacion.mejores(3) == [(3, 8.0), (1, 7.0), (2, 5.5)]
+
+    clasificacion.actualizar(2, 9.0)
+    assert clasificacion.posicion(2) == 1
+    assert clasificacion.posicion(3) == 2
+
+    # Un juego insertado después de la carga entra al consultarlo
+    juego_dao.puntuaciones[4] = 7.5
+    assert clasificacion.posicion(4) == 3
+    assert clasificacion.posicion(99) is None
+    assert len(clasificacion) == 4
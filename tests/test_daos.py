@@ -0,0 +1,95 @@
+import pytest
+
+from CapaDeDatos.daos import RESEÑA_ACEPTADA, RESEÑA_DUPLICADA, RESEÑA_INVALIDA, JuegoDAO, ReseñaDAO, UsuarioDAO
+from CapaDeDatos.migraciones import MEDIA_PREVIA_SIN_RESEÑAS, TIPO_USUARIO_CRITICO
+
+COLUMNAS_AGREGADOS = ("total_reseñas, puntuacion_acumulada, puntuacion_media, puntuacion_ponderada, "
+                      "total_reseñas_criticos, puntuacion_acumulada_criticos, puntuacion_media_criticos, "
+                      "total_reseñas_publico, puntuacion_acumulada_publico, puntuacion_media_publico")
+
+
+@pytest.fixture
+def daos(pool):
+    juego_dao, usuario_dao, reseña_dao = JuegoDAO(), UsuarioDAO(), ReseñaDAO()
+    juego_dao.insertar_juegos_lote([(1, "Juego 1", ""), (2, "Juego 2", "")])
+    usuario_dao.insertar_usuarios_lote([(1, "critica", TIPO_USUARIO_CRITICO), (2, "ana", "publico"), (3, "luis", "publico")])
+    return juego_dao, reseña_dao
+
+
+def _agregados(id_juego):
+    return tuple(JuegoDAO()._ejecutar_consulta(f"SELECT {COLUMNAS_AGREGADOS} FROM Juegos WHERE id_juego = ?;", (id_juego,))[0])
+
+
+def test_juego_nuevo_parte_de_la_media_previa(daos):
+    assert _agregados(1)[:4] == (0, 0, 0.0, MEDIA_PREVIA_SIN_RESEÑAS)
+
+
+def test_deltas_de_registrar_reseña(daos):
+    juego_dao, reseña_dao = daos
+    assert reseña_dao.registrar_reseña(1, 1, 8) is not None
+    assert reseña_dao.registrar_reseña(1, 2, 4) is not None
+    assert reseña_dao.registrar_reseña(1, 2, 9) is None
+
+    total, acumulada, media, _, criticos, acumulada_criticos, media_criticos, publico, acumulada_publico, media_publico = _agregados(1)
+    assert (total, acumulada, media) == (2, 12, 6.0)
+    assert (criticos, acumulada_criticos, media_criticos) == (1, 8, 8.0)
+    assert (publico, acumulada_publico, media_publico) == (1, 4, 4.0)
+    assert juego_dao.obtener_histograma(1)[3] == 1 and juego_dao.obtener_histograma(1)[7] == 1
+    assert sum(juego_dao.obtener_histograma(1)) == 2
+
+
+def test_deltas_coinciden_con_el_recalculo_completo(daos):
+    juego_dao, reseña_dao = daos
+    reseña_dao.registrar_reseña(1, 3, 7)
+    reseña_dao.insertar_reseñas_lote([
+        (1, 1, 10, "", "", "2024-05-01 10:00:00"),
+        (1, 2, 2, "", "", "2024-05-01 11:30:00"),
+        (2, 1, 6, "", ""),
+        (2, 3, 5, "", ""),
+    ])
+    por_deltas = [_agregados(1), _agregados(2)]
+    histogramas = [juego_dao.obtener_histograma(1), juego_dao.obtener_histograma(2)]
+
+    assert juego_dao.recalcular_puntuaciones()
+    assert [_agregados(1), _agregados(2)] == pytest.approx(por_deltas)
+    assert juego_dao.verificar_histogramas() == []
+    assert [juego_dao.obtener_histograma(1), juego_dao.obtener_histograma(2)] == histogramas
+    assert reseña_dao.obtener_rollups(1, 'dia', "2024-05-01", "2024-05-01") == [("2024-05-01", 2, 12)]
+    assert [fila[1:] for fila in reseña_dao.obtener_rollups(1, 'hora', "2024-05-01 00", "2024-05-01 23")] == [(1, 10), (1, 2)]
+
+
+def test_estados_de_insertar_reseñas_lote(daos):
+    _, reseña_dao = daos
+    reseña_dao.registrar_reseña(1, 1, 5)
+    estados = reseña_dao.insertar_reseñas_lote([
+        (1, 2, 7, "", ""),      # aceptada
+        (1, 1, 7, "", ""),      # ya existía
+        (1, 2, 3, "", ""),      # repetida dentro del mismo lote
+        (99, 2, 7, "", ""),     # juego inexistente
+        (2, 99, 7, "", ""),     # usuario inexistente
+        (2, 2, 11, "", ""),     # puntuación fuera de rango
+        (2, 2, "7", "", ""),    # puntuación no entera
+        (2, 3, 7, "", "", "no es una fecha"),
+        (2, 2, 1, "", "", "2024-01-01T12:00:00+02:00"),
+    ])
+    assert estados == [RESEÑA_ACEPTADA, RESEÑA_DUPLICADA, RESEÑA_DUPLICADA, RESEÑA_INVALIDA, RESEÑA_INVALIDA,
+                       RESEÑA_INVALIDA, RESEÑA_INVALIDA, RESEÑA_INVALIDA, RESEÑA_ACEPTADA]
+    assert _agregados(1)[:2] == (2, 12)
+    assert _agregados(2)[:2] == (1, 1)
+    assert reseña_dao.obtener_rollups(2, 'dia', "2024-01-01", "2024-01-01") == [("2024-01-01", 1, 1)]
+
+
+def test_lote_vacio(daos):
+    _, reseña_dao = daos
+    assert reseña_dao.insertar_reseñas_lote([]) == []
+
+
+def test_lecturas_de_puntuaciones_desde_el_indice(daos):
+    _, reseña_dao = daos
+    reseña_dao.insertar_reseñas_lote([
+        (1, 2, 9, "", "", "2024-05-02 10:00:00"),
+        (1, 1, 4, "", "", "2024-05-01 10:00:00"),
+        (2, 2, 6, "", "", "2024-05-01 10:00:00"),
+    ])
+    assert [fila[1:] for fila in reseña_dao.iterar_puntuaciones_por_juego(1)] == [(1, 1, 4), (1, 2, 9)]
+    assert [fila[1:] for fila in reseña_dao.obtener_puntuaciones_por_usuario(2)] == [(1, 9), (2, 6)]
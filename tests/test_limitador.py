@@ -0,0 +1,120 @@
+import random
+from collections import Counter
+
+import pytest
+
+from CapaLogicaDeNegocio.gestor_resenas import GestorResenas
+from CapaLogicaDeNegocio.limitador import (MOTIVO_LIMITE_IP, MOTIVO_LIMITE_USUARIO, MOTIVO_ORIGEN_ABUSIVO, CubosTokens,
+                                          LimitadorEnvios, SketchConteoMinimo)
+
+
+class _Reloj:
+    # Reloj manual: solo avanza cuando la prueba lo pide
+    def __init__(self, ahora=1000.0):
+        self.ahora = ahora
+
+    def __call__(self):
+        return self.ahora
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+def test_limite_por_ip():
+    limitador = LimitadorEnvios(limite_ip=3, limite_usuario=0, umbral_abuso_ip=0, ventana=60, reloj=_Reloj())
+    assert [limitador.comprobar("10.0.0.1", id_usuario) for id_usuario in range(1, 4)] == [None] * 3
+    assert limitador.comprobar("10.0.0.1", 4) == MOTIVO_LIMITE_IP
+    assert limitador.comprobar("10.0.0.2", 4) is None
+    estadisticas = limitador.estadisticas()
+    assert (estadisticas['permitidos'], estadisticas[MOTIVO_LIMITE_IP], estadisticas['ips_con_cubo']) == (4, 1, 2)
+
+
+def test_limite_por_usuario_aunque_cambie_de_ip():
+    limitador = LimitadorEnvios(limite_ip=0, limite_usuario=2, umbral_abuso_ip=0, ventana=60, reloj=_Reloj())
+    assert limitador.comprobar("10.0.0.1", 7) is None
+    assert limitador.comprobar("10.0.0.2", 7) is None
+    assert limitador.comprobar("10.0.0.3", 7) == MOTIVO_LIMITE_USUARIO
+    # Sin IP solo cuenta el límite por usuario
+    assert limitador.comprobar("", 7) == MOTIVO_LIMITE_USUARIO
+    assert limitador.comprobar("", 8) is None
+
+
+def test_los_cubos_se_rellenan_a_lo_largo_de_la_ventana():
+    reloj = _Reloj()
+    limitador = LimitadorEnvios(limite_ip=0, limite_usuario=4, umbral_abuso_ip=0, ventana=60, reloj=reloj)
+    assert [limitador.comprobar("", 1) for _ in range(5)] == [None] * 4 + [MOTIVO_LIMITE_USUARIO]
+
+    # 4 tokens por 60 s: uno cada 15 s
+    reloj.avanzar(14.9)
+    assert limitador.comprobar("", 1) == MOTIVO_LIMITE_USUARIO
+    reloj.avanzar(0.1)
+    assert limitador.comprobar("", 1) is None
+    assert limitador.comprobar("", 1) == MOTIVO_LIMITE_USUARIO
+
+    # Tras mucho tiempo sin envíos el cubo no pasa de su capacidad
+    reloj.avanzar(3600)
+    assert [limitador.comprobar("", 1) for _ in range(5)] == [None] * 4 + [MOTIVO_LIMITE_USUARIO]
+
+
+def test_el_sketch_nunca_subestima():
+    aleatorio = random.Random(22)
+    # Tabla estrecha para forzar colisiones; claves con distribución muy sesgada
+    sketch = SketchConteoMinimo(ventana=60, ancho=64, profundidad=3)
+    reales = Counter()
+    ahora = 1000.0
+    for _ in range(5000):
+        clave = f"10.0.{aleatorio.randrange(4)}.{int(aleatorio.paretovariate(1.2)) % 256}"
+        reales[clave] += 1
+        ahora += 0.001
+        assert sketch.añadir(clave, ahora) >= reales[clave]
+    assert all(sketch.estimar(clave, ahora) >= total for clave, total in reales.items())
+    assert sketch.estimar("192.168.0.1", ahora) >= 0
+
+    # El mayor emisor encabeza los principales
+    assert sketch.principales(ahora, 1)[0][0] == reales.most_common(1)[0][0]
+
+    # Tras rotar, lo contado en la ventana actual tampoco se subestima
+    ahora += 60
+    sketch.añadir("10.0.0.1", ahora)
+    assert sketch.estimar("10.0.0.1", ahora) >= 1
+
+
+def test_origen_abusivo():
+    limitador = LimitadorEnvios(limite_ip=0, limite_usuario=0, umbral_abuso_ip=5, ventana=60, reloj=_Reloj())
+    assert [limitador.comprobar("10.6.6.6", id_usuario) for id_usuario in range(6)] == [None] * 5 + [MOTIVO_ORIGEN_ABUSIVO]
+    assert limitador.comprobar("10.0.0.1", 1) is None
+    assert limitador.origenes_principales(1) == [("10.6.6.6", 6)]
+
+
+def test_origen_abusivo_se_rechaza_sin_acceder_a_la_bd(pool, monkeypatch):
+    reloj = _Reloj()
+    gestor = GestorResenas(limitador=LimitadorEnvios(limite_ip=0, limite_usuario=0, umbral_abuso_ip=3, ventana=60, reloj=reloj))
+    for id_usuario in range(3):
+        gestor.limitador.comprobar("10.6.6.6", id_usuario)
+
+    def sin_bd(*args, **kwargs):
+        pytest.fail("El envío rechazado ha llegado a la base de datos o a las cachés")
+    monkeypatch.setattr(pool, "obtener", sin_bd)
+    monkeypatch.setattr(gestor, "obtener_juego_por_id", sin_bd)
+    monkeypatch.setattr(gestor, "obtener_usuario_por_id", sin_bd)
+    assert gestor.enviar_reseña(1, 1, 8, "texto", origen_simulado_ip="10.6.6.6") is False
+    assert gestor.estadisticas_limitador()[MOTIVO_ORIGEN_ABUSIVO] == 1
+
+
+def test_desalojo_al_llegar_a_max_claves():
+    cubos = CubosTokens(capacidad=1, ventana=60, max_claves=3)
+    for clave in "abc":
+        assert cubos.consumir(clave, 1000.0)
+    assert cubos.consumir("d", 1000.0)
+    assert len(cubos) == 3 and "a" not in cubos._cubos
+
+    # Usar una clave la hace la más reciente; se olvida la que lleva más tiempo sin usarse
+    assert not cubos.consumir("b", 1000.0)
+    assert cubos.consumir("e", 1000.0)
+    assert len(cubos) == 3 and set(cubos._cubos) == {"b", "d", "e"}
+
+    limitador = LimitadorEnvios(limite_ip=1, limite_usuario=1, umbral_abuso_ip=0, ventana=60, max_claves=10, reloj=_Reloj())
+    for n in range(50):
+        limitador.comprobar(f"10.0.0.{n}", n)
+    estadisticas = limitador.estadisticas()
+    assert (estadisticas['ips_con_cubo'], estadisticas['usuarios_con_cubo']) == (10, 10)
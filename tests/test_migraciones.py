@@ -0,0 +1,18 @@
+import pytest
+
+from CapaDeDatos.migraciones import CONSULTAS_CRITICAS, VERSION_ESQUEMA, obtener_version_esquema, verificar_planes_consulta
+
+
+def test_migraciones_dejan_el_esquema_al_dia(pool):
+    with pool.conexion() as conexion:
+        assert obtener_version_esquema(conexion) == VERSION_ESQUEMA
+
+
+@pytest.mark.parametrize("nombre", sorted(CONSULTAS_CRITICAS))
+def test_consulta_critica_usa_su_indice(pool, nombre):
+    with pool.conexion() as conexion:
+        plan, correcto = verificar_planes_consulta(conexion)[nombre]
+    assert correcto, f"{nombre}: {plan}"
+    # Ningún paso del plan puede recorrer una tabla entera sin índice
+    recorridos_completos = [paso for paso in plan.split(" | ") if paso.startswith("SCAN") and "USING" not in paso]
+    assert not recorridos_completos, f"{nombre}: {plan}"
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from CapaDeDatos import respaldos
+from CapaDeDatos.daos import JuegoDAO, ReseñaDAO, UsuarioDAO
+
+
+def _contar_reseñas(ruta):
+    conexion = sqlite3.connect(ruta)
+    try:
+        return conexion.execute("SELECT COUNT(*) FROM Reseñas;").fetchone()[0]
+    finally:
+        conexion.close()
+
+
+@pytest.fixture
+def datos(pool):
+    JuegoDAO().insertar_juegos_lote([(id_juego, f"Juego {id_juego}", "") for id_juego in range(1, 21)])
+    UsuarioDAO().insertar_usuarios_lote([(id_usuario, f"usuario{id_usuario}", "publico") for id_usuario in range(1, 202)])
+    ReseñaDAO().insertar_reseñas_lote([(id_juego, id_usuario, 5, "texto " * 50, "")
+                                       for id_juego in range(1, 11) for id_usuario in range(1, 101)])
+    return pool
+
+
+def test_respaldo_con_escrituras_en_curso_se_verifica_y_restaura(datos, tmp_path):
+    directorio = str(tmp_path / "respaldos")
+    parar = threading.Event()
+
+    def escribir():
+        reseña_dao = ReseñaDAO()
+        for id_usuario in range(101, 201):
+            for id_juego in range(1, 21):
+                if parar.is_set():
+                    return
+                reseña_dao.registrar_reseña(id_juego, id_usuario, 7)
+
+    escritor = threading.Thread(target=escribir)
+    escritor.start()
+    try:
+        # Pasos pequeños con pausa: la copia se intercala con las escrituras del otro hilo
+        respaldo = respaldos.crear_respaldo(directorio, retencion=0, paginas_por_paso=4, pausa=0.001)
+    finally:
+        parar.set()
+        escritor.join()
+
+    assert respaldos.verificar_respaldo(respaldo['ruta']) == []
+    reseñas_respaldo = _contar_reseñas(respaldo['ruta'])
+    assert reseñas_respaldo >= 1000
+
+    # El usuario 201 no lo usa el escritor: esta reseña es posterior al respaldo seguro
+    assert ReseñaDAO().registrar_reseña(1, 201, 1) is not None
+    ruta_bd = datos.ruta_bd
+    assert _contar_reseñas(ruta_bd) > reseñas_respaldo
+
+    respaldos.restaurar_respaldo(respaldo['ruta'], respaldo_previo=False)
+    assert _contar_reseñas(ruta_bd) == reseñas_respaldo
+    # Los agregados restaurados son los del mismo instante que las reseñas
+    assert JuegoDAO().recalcular_puntuaciones()
+    assert sum(juego[4] for juego in JuegoDAO().obtener_todos_los_juegos()) == reseñas_respaldo
+
+
+def test_retencion_conserva_los_mas_recientes(datos, tmp_path):
+    directorio = str(tmp_path / "respaldos")
+    creados = [respaldos.crear_respaldo(directorio, retencion=2)['ruta'] for _ in range(3)]
+    assert respaldos.listar_respaldos(directorio) == creados[1:]
+    assert not os.path.exists(creados[0])
+
+    eliminados = respaldos.aplicar_retencion(directorio, retencion=1)
+    assert eliminados == [creados[1]]
+    assert respaldos.listar_respaldos(directorio) == creados[2:]
+
+
+def test_respaldo_dañado_no_se_restaura(datos, tmp_path):
+    respaldo = respaldos.crear_respaldo(str(tmp_path / "respaldos"), retencion=0)['ruta']
+    with open(respaldo, "r+b") as archivo:
+        archivo.seek(4096)
+        archivo.write(b"\xff" * 4096)
+    reseñas = _contar_reseñas(datos.ruta_bd)
+    # Según la página dañada, integrity_check devuelve mensajes o SQLite no llega a abrir el archivo
+    try:
+        errores = respaldos.verificar_respaldo(respaldo)
+    except sqlite3.DatabaseError as e:
+        errores = [str(e)]
+    assert errores
+    with pytest.raises(sqlite3.DatabaseError):
+        respaldos.restaurar_respaldo(respaldo, respaldo_previo=False)
+    assert _contar_reseñas(datos.ruta_bd) == reseñas
+
+
+def test_error_al_abrir_el_origen_se_propaga_sin_dejar_archivos(datos, tmp_path, monkeypatch):
+    def fallar(*args, **kwargs):
+        raise sqlite3.OperationalError("origen no disponible")
+
+    monkeypatch.setattr(respaldos, "_abrir_conexion", fallar)
+    directorio = tmp_path / "respaldos"
+    with pytest.raises(sqlite3.OperationalError, match="origen no disponible"):
+        respaldos.crear_respaldo(str(directorio), retencion=0)
+    assert os.listdir(directorio) == []